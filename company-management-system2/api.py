@@ -0,0 +1,597 @@
+import hashlib
+import json
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user, login_user
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.exc import CircularDependencyError, IntegrityError
+from werkzeug.exceptions import HTTPException
+
+import hierarchy
+from audit import audit_writer
+from cache import fragment_cache
+from identity import identity_cache
+from listing import paginate_listing
+from models import db, Department, Member, User, Announcement
+
+MAX_BATCH_SIZE = 1000
+
+# JSON 接口（v1）：与部门、成员、用户、公告页面的增删改查一一对应，面向数据同步脚本和前端
+api_bp = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+
+# 接口错误：统一以 JSON 返回，errors 为批量操作中逐条的错误
+class ApiError(Exception):
+    def __init__(self, status, message, errors=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.errors = errors or []
+
+
+# 单条数据校验失败，由批量操作收集后统一返回
+class ItemError(Exception):
+    pass
+
+
+@api_bp.errorhandler(ApiError)
+def handle_api_error(error):
+    body = {'error': error.message}
+    if error.errors:
+        body['errors'] = error.errors
+    return jsonify(body), error.status
+
+
+@api_bp.errorhandler(HTTPException)
+def handle_http_error(error):
+    return jsonify({'error': error.description}), error.code
+
+
+# 除登录接口外都要求已登录；未登录返回 401 而不是跳转到登录页
+@api_bp.before_request
+def require_login():
+    if request.endpoint != 'api_v1.create_session' and not current_user.is_authenticated:
+        raise ApiError(401, '未登录')
+
+
+def _isoformat(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _text(data, key, required):
+    value = data.get(key)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if required:
+            raise ItemError(f'{key} 不能为空')
+        return None
+    if not isinstance(value, str):
+        raise ItemError(f'{key} 必须是字符串')
+    return value.strip()
+
+
+def _optional_id(data, key):
+    value = data.get(key)
+    if value in (None, ''):
+        return None
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ItemError(f'{key} 必须是整数')
+    return value
+
+
+# 资源定义：字段序列化、列表排序/搜索列、批量写入前的集合预取和逐条校验
+class Resource:
+    name = None
+    label = None
+    model = None
+    sort_columns = {}
+    search_columns = ()
+    default_sort = 'id'
+
+    def fields(self):
+        raise NotImplementedError
+
+    def serialize(self, obj, fields=None):
+        getters = self.fields()
+        return {field: _isoformat(getters[field](obj)) for field in (fields or getters)}
+
+    def query(self):
+        return self.model.query
+
+    # 针对本批所有数据一次性查出校验需要的已有记录，避免逐条查询
+    def prefetch(self, creates, updates, deletes):
+        return {}
+
+    # 校验一条新增/修改数据并返回要写入的字段；obj 为 None 表示新增
+    def validate(self, data, obj, context):
+        raise NotImplementedError
+
+    def check_delete(self, obj, context):
+        pass
+
+    def describe(self, obj):
+        return str(obj.id)
+
+    def after_commit(self, updated, deleted):
+        pass
+
+
+def _check_unique(context, key, value, obj, message):
+    owner = context[key].get(value)
+    if owner is not None and (obj is None or owner != obj.id):
+        raise ItemError(message)
+    context[key][value] = obj.id if obj is not None else -1
+
+
+class DepartmentResource(Resource):
+    name = 'departments'
+    label = '部门'
+    model = Department
+    sort_columns = {'id': Department.id, 'name': Department.name, 'create_time': Department.create_time,
+                    'path': Department.path, 'subtree_headcount': Department.subtree_headcount}
+    search_columns = (Department.name,)
+
+    def fields(self):
+        return {
+            'id': lambda department: department.id,
+            'name': lambda department: department.name,
+            'manager_id': lambda department: department.manager_id,
+            'manager_name': lambda department: department.manager.username if department.manager else None,
+            'parent_id': lambda department: department.parent_id,
+            'parent_name': lambda department: department.parent.name if department.parent else None,
+            'path': lambda department: department.path,
+            'depth': lambda department: department.depth,
+            'subtree_headcount': lambda department: department.subtree_headcount,
+            'create_time': lambda department: department.create_time
+        }
+
+    def query(self):
+        return Department.query.options(joinedload(Department.parent))
+
+    def prefetch(self, creates, updates, deletes):
+        names = {data.get('name') for data in creates + updates if isinstance(data.get('name'), str)}
+        manager_ids = {data.get('manager_id') for data in creates + updates if isinstance(data.get('manager_id'), int)}
+        parent_ids = {data.get('parent_id') for data in creates + updates if isinstance(data.get('parent_id'), int)}
+        return {
+            'names': dict(db.session.execute(
+                select(Department.name, Department.id).where(Department.name.in_(names))
+            ).all()) if names else {},
+            'users': {user.id: user for user in User.query.filter(User.id.in_(manager_ids))} if manager_ids else {},
+            'parents': {department.id: department for department in
+                        Department.query.filter(Department.id.in_(parent_ids))} if parent_ids else {},
+            'with_members': set(db.session.execute(
+                select(Member.department_id).where(Member.department_id.in_(deletes)).distinct()
+            ).scalars()) if deletes else set(),
+            'with_children': set(db.session.execute(
+                select(Department.parent_id).where(Department.parent_id.in_(deletes)).distinct()
+            ).scalars()) if deletes else set()
+        }
+
+    def validate(self, data, obj, context):
+        values = {}
+        if obj is None or 'name' in data:
+            values['name'] = _text(data, 'name', required=True)
+            _check_unique(context, 'names', values['name'], obj, f"部门 {values['name']} 已存在")
+        if 'manager_id' in data:
+            values['manager_id'] = _optional_id(data, 'manager_id')
+            if values['manager_id'] is not None and values['manager_id'] not in context['users']:
+                raise ItemError(f"部门经理 {values['manager_id']} 不存在")
+        # 修改 parent_id 即把整个分支移动到新的上级部门下
+        if 'parent_id' in data:
+            values['parent_id'] = _optional_id(data, 'parent_id')
+            parent = context['parents'].get(values['parent_id'])
+            if values['parent_id'] is not None and parent is None:
+                raise ItemError(f"上级部门 {values['parent_id']} 不存在")
+            try:
+                hierarchy.check_parent(obj, parent)
+            except hierarchy.HierarchyError as e:
+                raise ItemError(str(e))
+            values['parent'] = parent
+        return values
+
+    def check_delete(self, obj, context):
+        if obj.id in context['with_members']:
+            raise ItemError('该部门下有成员，无法删除')
+        if obj.id in context['with_children']:
+            raise ItemError('该部门下有下级部门，无法删除')
+
+    def describe(self, obj):
+        return obj.name
+
+
+class MemberResource(Resource):
+    name = 'members'
+    label = '成员'
+    model = Member
+    sort_columns = {'id': Member.id, 'name': Member.name, 'email': Member.email,
+                    'position': Member.position, 'create_time': Member.create_time}
+    search_columns = (Member.name, Member.email, Member.position)
+
+    def fields(self):
+        return {
+            'id': lambda member: member.id,
+            'name': lambda member: member.name,
+            'email': lambda member: member.email,
+            'department_id': lambda member: member.department_id,
+            'department_name': lambda member: member.department.name if member.department else None,
+            'position': lambda member: member.position,
+            'create_time': lambda member: member.create_time
+        }
+
+    def prefetch(self, creates, updates, deletes):
+        emails = {data.get('email') for data in creates + updates if isinstance(data.get('email'), str)}
+        department_ids = {data.get('department_id') for data in creates + updates
+                          if isinstance(data.get('department_id'), int)}
+        return {
+            'emails': {email.lower(): member_id for email, member_id in db.session.execute(
+                select(Member.email, Member.id).where(Member.email.in_(emails))
+            )} if emails else {},
+            'departments': {department.id: department for department in
+                            Department.query.filter(Department.id.in_(department_ids))} if department_ids else {}
+        }
+
+    def validate(self, data, obj, context):
+        values = {}
+        if obj is None or 'name' in data:
+            values['name'] = _text(data, 'name', required=True)
+        if obj is None or 'email' in data:
+            values['email'] = _text(data, 'email', required=True)
+            _check_unique(context, 'emails', values['email'].lower(), obj, f"邮箱 {values['email']} 已被使用")
+        if obj is None or 'department_id' in data:
+            values['department_id'] = _optional_id(data, 'department_id')
+            if values['department_id'] is None:
+                raise ItemError('department_id 不能为空')
+            if values['department_id'] not in context['departments']:
+                raise ItemError(f"部门 {values['department_id']} 不存在")
+        if 'position' in data:
+            values['position'] = _text(data, 'position', required=False)
+        return values
+
+    def describe(self, obj):
+        return obj.name
+
+
+class UserResource(Resource):
+    name = 'users'
+    label = '用户'
+    model = User
+    sort_columns = {'id': User.id, 'username': User.username, 'role': User.role, 'create_time': User.create_time}
+    search_columns = (User.username,)
+    roles = ('admin', 'user')
+
+    def fields(self):
+        return {
+            'id': lambda user: user.id,
+            'username': lambda user: user.username,
+            'role': lambda user: user.role,
+            'create_time': lambda user: user.create_time
+        }
+
+    def prefetch(self, creates, updates, deletes):
+        usernames = {data.get('username') for data in creates + updates if isinstance(data.get('username'), str)}
+        return {
+            'usernames': dict(db.session.execute(
+                select(User.username, User.id).where(User.username.in_(usernames))
+            ).all()) if usernames else {}
+        }
+
+    def validate(self, data, obj, context):
+        values = {}
+        if obj is None or 'username' in data:
+            values['username'] = _text(data, 'username', required=True)
+            _check_unique(context, 'usernames', values['username'], obj, f"用户名 {values['username']} 已存在")
+        if obj is None or 'role' in data:
+            values['role'] = data.get('role') or 'user'
+            if values['role'] not in self.roles:
+                raise ItemError(f"角色必须是 {'/'.join(self.roles)}")
+        if obj is None or 'password' in data:
+            password = _text(data, 'password', required=obj is None)
+            if password:
+                values['password'] = password
+        return values
+
+    def check_delete(self, obj, context):
+        if obj.id == current_user.id:
+            raise ItemError('不能删除当前登录用户')
+
+    def describe(self, obj):
+        return obj.username
+
+    def after_commit(self, updated, deleted):
+        for user_id in updated + deleted:
+            identity_cache.invalidate(user_id)
+
+
+class AnnouncementResource(Resource):
+    name = 'announcements'
+    label = '公告'
+    model = Announcement
+    sort_columns = {'id': Announcement.id, 'create_time': Announcement.create_time, 'title': Announcement.title}
+    search_columns = (Announcement.title, Announcement.content)
+    default_sort = 'create_time'
+
+    def fields(self):
+        return {
+            'id': lambda announcement: announcement.id,
+            'title': lambda announcement: announcement.title,
+            'content': lambda announcement: announcement.content,
+            'creator_id': lambda announcement: announcement.creator_id,
+            'creator_name': lambda announcement: announcement.creator.username if announcement.creator else None,
+            'create_time': lambda announcement: announcement.create_time
+        }
+
+    def validate(self, data, obj, context):
+        values = {}
+        if obj is None or 'title' in data:
+            values['title'] = _text(data, 'title', required=True)
+        if obj is None or 'content' in data:
+            values['content'] = _text(data, 'content', required=True)
+        if obj is None:
+            values['creator_id'] = current_user.id
+        return values
+
+    def describe(self, obj):
+        return obj.title
+
+
+RESOURCES = {resource.name: resource for resource in (
+    DepartmentResource(), MemberResource(), UserResource(), AnnouncementResource()
+)}
+
+# 列表响应缓存命名空间及其依赖的表
+CACHE_NAMESPACES = {
+    'api_departments': ['departments', 'users', 'members'],
+    'api_members': ['members', 'departments'],
+    'api_users': ['users'],
+    'api_announcements': ['announcements', 'users']
+}
+
+
+def _resource(name):
+    resource = RESOURCES.get(name)
+    if resource is None:
+        raise ApiError(404, f'资源 {name} 不存在')
+    return resource
+
+
+# ?fields=id,name 只返回指定字段
+def _selected_fields(resource):
+    fields = [field for field in request.args.get('fields', '').split(',') if field]
+    unknown = [field for field in fields if field not in resource.fields()]
+    if unknown:
+        raise ApiError(400, f"未知字段: {', '.join(unknown)}")
+    return fields or None
+
+
+def _apply_values(resource, obj, values):
+    password = values.pop('password', None)
+    for key, value in values.items():
+        setattr(obj, key, value)
+    if password:
+        obj.set_password(password)
+
+
+# 在一个事务中执行一批新增/修改/删除：任何一条校验失败则整批回滚并返回全部错误
+def _apply_batch(resource, creates, updates, deletes):
+    if len(creates) + len(updates) + len(deletes) > MAX_BATCH_SIZE:
+        raise ApiError(413, f'单次批量操作不能超过 {MAX_BATCH_SIZE} 条')
+    if not all(isinstance(data, dict) for data in creates + updates):
+        raise ApiError(400, '新增和修改的每一项都必须是对象')
+    if not all(isinstance(item_id, int) for item_id in deletes):
+        raise ApiError(400, '删除列表必须是 id 数组')
+
+    update_ids = [data.get('id') for data in updates]
+    targets = {obj.id: obj for obj in resource.query().filter(
+        resource.model.id.in_([item_id for item_id in update_ids + deletes if isinstance(item_id, int)])
+    )}
+    context = resource.prefetch(creates, updates, deletes)
+
+    errors = []
+    created = []
+    updated = []
+    deleted = []
+    for index, data in enumerate(creates):
+        try:
+            obj = resource.model()
+            _apply_values(resource, obj, resource.validate(data, None, context))
+            db.session.add(obj)
+            created.append(obj)
+        except ItemError as e:
+            errors.append({'op': 'create', 'index': index, 'error': str(e)})
+    for index, data in enumerate(updates):
+        obj = targets.get(data.get('id'))
+        try:
+            if obj is None:
+                raise ItemError(f"{resource.label} {data.get('id')} 不存在")
+            _apply_values(resource, obj, resource.validate(data, obj, context))
+            updated.append(obj)
+        except ItemError as e:
+            errors.append({'op': 'update', 'index': index, 'id': data.get('id'), 'error': str(e)})
+    for index, item_id in enumerate(deletes):
+        obj = targets.get(item_id)
+        try:
+            if obj is None:
+                raise ItemError(f'{resource.label} {item_id} 不存在')
+            resource.check_delete(obj, context)
+            deleted.append((obj.id, resource.describe(obj)))
+            db.session.delete(obj)
+        except ItemError as e:
+            errors.append({'op': 'delete', 'index': index, 'id': item_id, 'error': str(e)})
+
+    if errors:
+        db.session.rollback()
+        raise ApiError(422, '数据校验失败，未做任何修改', errors)
+
+    fields = _selected_fields(resource)
+    try:
+        db.session.flush()
+        result = {
+            'created': [resource.serialize(obj, fields) for obj in created],
+            'updated': [resource.serialize(obj, fields) for obj in updated],
+            'deleted': [item_id for item_id, _ in deleted]
+        }
+        summary = [resource.describe(obj) for obj in created + updated]
+        updated_ids = [obj.id for obj in updated]
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        raise ApiError(409, f'数据冲突，未做任何修改: {e.orig}')
+    except hierarchy.HierarchyError as e:
+        db.session.rollback()
+        raise ApiError(422, f'{e}，未做任何修改')
+    except CircularDependencyError:
+        # 同一批中的多个部门互为上级，逐条校验时发现不了
+        db.session.rollback()
+        raise ApiError(422, '部门的上级关系不能形成环，未做任何修改')
+
+    resource.after_commit(updated_ids, result['deleted'])
+    _log_batch(resource, len(created), len(updated), deleted, summary)
+    return result
+
+
+def _log_batch(resource, created, updated, deleted, summary):
+    if not created + updated + len(deleted):
+        return
+    if created + updated + len(deleted) == 1:
+        action = '添加' if created else '编辑' if updated else '删除'
+        name = summary[0] if summary else deleted[0][1]
+        content = f'{action}{resource.label}: {name}'
+    else:
+        content = f'批量操作{resource.label}: 新增 {created}，修改 {updated}，删除 {len(deleted)}'
+    audit_writer.record_operation(current_user.id, content, operation_type='api')
+
+
+def _payload():
+    data = request.get_json(silent=True)
+    if data is None:
+        raise ApiError(400, '请求体必须是 JSON')
+    return data
+
+
+# 接口登录：POST /api/v1/session {"username": ..., "password": ...}，之后用返回的会话 Cookie 访问
+@api_bp.route('/session', methods=['POST'])
+def create_session():
+    data = _payload()
+    user = User.query.filter_by(username=data.get('username')).first()
+    if user is None or not user.check_password(data.get('password') or ''):
+        raise ApiError(401, '用户名或密码错误')
+    login_user(user)
+    audit_writer.record_login(user.id, request.remote_addr)
+    return jsonify({'id': user.id, 'username': user.username, 'role': user.role})
+
+
+# 列表：?page=&per_page=&sort=&order=&q=&fields=；响应按完整 URL 缓存，带 ETag，If-None-Match 命中时返回 304
+@api_bp.route('/<resource_name>', methods=['GET'])
+def list_resources(resource_name):
+    resource = _resource(resource_name)
+    fields = _selected_fields(resource)
+
+    def render():
+        listing = paginate_listing(resource.query(), resource.sort_columns, resource.search_columns,
+                                   default_sort=resource.default_sort)
+        pagination = listing.pagination
+        body = json.dumps({
+            'items': [resource.serialize(obj, fields) for obj in listing.items],
+            'page': pagination.page,
+            'per_page': pagination.per_page,
+            'total': pagination.total,
+            'pages': pagination.pages
+        }, ensure_ascii=False, separators=(',', ':'))
+        return body, hashlib.md5(body.encode('utf-8')).hexdigest()
+
+    body, etag = fragment_cache.get_or_set(f'api_{resource.name}', request.full_path, render)
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+@api_bp.route('/<resource_name>/<int:item_id>', methods=['GET'])
+def get_resource(resource_name, item_id):
+    resource = _resource(resource_name)
+    fields = _selected_fields(resource)
+    obj = resource.query().filter(resource.model.id == item_id).first()
+    if obj is None:
+        raise ApiError(404, f'{resource.label} {item_id} 不存在')
+    response = jsonify(resource.serialize(obj, fields))
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+# 新增：请求体为对象时新增一条，为数组时整批在一个事务中新增
+@api_bp.route('/<resource_name>', methods=['POST'])
+def create_resources(resource_name):
+    resource = _resource(resource_name)
+    data = _payload()
+    if isinstance(data, list):
+        return jsonify(_apply_batch(resource, data, [], [])), 201
+    return jsonify(_apply_batch(resource, [data], [], [])['created'][0]), 201
+
+
+@api_bp.route('/<resource_name>/<int:item_id>', methods=['PATCH'])
+def update_resource(resource_name, item_id):
+    resource = _resource(resource_name)
+    data = _payload()
+    if not isinstance(data, dict):
+        raise ApiError(400, '请求体必须是对象')
+    return jsonify(_apply_batch(resource, [], [dict(data, id=item_id)], [])['updated'][0])
+
+
+@api_bp.route('/<resource_name>/<int:item_id>', methods=['DELETE'])
+def delete_resource(resource_name, item_id):
+    resource = _resource(resource_name)
+    _apply_batch(resource, [], [], [item_id])
+    return '', 204
+
+
+# 批量操作：{"create": [...], "update": [{"id": 1, ...}], "delete": [2, 3]}，全部成功或全部回滚
+@api_bp.route('/<resource_name>/batch', methods=['POST'])
+def batch_resources(resource_name):
+    resource = _resource(resource_name)
+    data = _payload()
+    if not isinstance(data, dict):
+        raise ApiError(400, '请求体必须是对象')
+    creates, updates, deletes = (data.get(key) or [] for key in ('create', 'update', 'delete'))
+    if not all(isinstance(items, list) for items in (creates, updates, deletes)):
+        raise ApiError(400, 'create、update、delete 必须是数组')
+    return jsonify(_apply_batch(resource, creates, updates, deletes))
+
+
+def _department(department_id):
+    department = db.session.get(Department, department_id)
+    if department is None:
+        raise ApiError(404, f'部门 {department_id} 不存在')
+    return department
+
+
+# 组织架构树：GET /api/v1/departments/tree 为整棵树，/departments/<id>/tree 为该部门的子树；?depth= 限制展开层数
+@api_bp.route('/departments/tree', methods=['GET'])
+@api_bp.route('/departments/<int:department_id>/tree', methods=['GET'])
+def department_tree(department_id=None):
+    root = _department(department_id) if department_id is not None else None
+    max_depth = request.args.get('depth', type=int)
+    response = jsonify({
+        'ancestors': [{'id': department.id, 'name': department.name}
+                      for department in hierarchy.ancestors(root)] if root is not None else [],
+        'items': hierarchy.tree(root, max_depth)
+    })
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+# 子树成员：该部门及全部下级部门的成员，参数与成员列表相同（分页、排序、搜索、fields）
+@api_bp.route('/departments/<int:department_id>/members', methods=['GET'])
+def department_members(department_id):
+    department = _department(department_id)
+    resource = RESOURCES['members']
+    fields = _selected_fields(resource)
+    listing = paginate_listing(hierarchy.subtree_members(department), resource.sort_columns,
+                               resource.search_columns, default_sort=resource.default_sort)
+    pagination = listing.pagination
+    return jsonify({
+        'items': [resource.serialize(obj, fields) for obj in listing.items],
+        'page': pagination.page,
+        'per_page': pagination.per_page,
+        'total': pagination.total,
+        'pages': pagination.pages
+    })
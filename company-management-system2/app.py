@@ -1,20 +1,21 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
-from flask.cli import load_dotenv
-from flask_login import LoginManager, login_required, current_user, login_user, logout_user
-from datetime import datetime
-import psutil
-import platform
-import subprocess
-import importlib.util
+from flask import Flask, current_app, jsonify, render_template, request, redirect, url_for, flash
+from flask_login import LoginManager, login_required, login_user, logout_user
 import os
-import socket
 from config import config
 from extensions import db
-from routes import main_bp, department_bp, member_bp, comment_bp, user_bp, operation_bp, log_bp, system_bp
+from monitor import metrics_sampler
+from instrumentation import instrumentation
+from audit import audit_writer
+from errorlog import error_recorder
+import counters
+from cache import fragment_cache
+from identity import identity_cache
+from routes import register_blueprints
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField
 from wtforms.validators import DataRequired
-from models import User, OperationLog, LoginLog
+from models import User
+from werkzeug.exceptions import HTTPException
 
 
 # 定义登录表单类
@@ -23,155 +24,18 @@ class LoginForm(FlaskForm):
     password = PasswordField('Password', validators=[DataRequired()])
 
 
-# 加载环境变量
-load_dotenv()
-
-# 配置 Flask 应用
-app = Flask(__name__)
-env = os.getenv('FLASK_ENV', 'development')
-app.config.from_object(config[env])
-
-# 尝试从 config.py 加载配置，如果文件存在
-config_path = 'config.py'
-if os.path.exists(config_path):
-    app.config.from_pyfile(config_path)
-else:
-    print(f"警告: 配置文件 {config_path} 不存在")
-
-# 初始化数据库
-db.init_app(app)
-
 # 初始化 Flask-Login
 login_manager = LoginManager()
-login_manager.init_app(app)
 login_manager.login_view = 'login'
 
-# 注册蓝图
-app.register_blueprint(user_bp, url_prefix='/users')
-app.register_blueprint(main_bp, url_prefix='/')
-app.register_blueprint(department_bp, url_prefix='/departments')
-app.register_blueprint(member_bp, url_prefix='/members')
-app.register_blueprint(comment_bp, url_prefix='/comments')
-app.register_blueprint(operation_bp, url_prefix='/operations')
-app.register_blueprint(log_bp, url_prefix='/logs')
-app.register_blueprint(system_bp, url_prefix='/system')
-
 
 # 定义用户加载回调函数
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
-
-
-# 记录操作日志函数
-def log_operation(content):
-    if current_user.is_authenticated:
-        user_id = current_user.id
-    else:
-        user_id = None  # 对于未认证用户
-
-    operation_log = OperationLog(
-        user_id=user_id,
-        operation_type='system',
-        operation_content=content,
-        operation_time=datetime.utcnow()
-    )
-    db.session.add(operation_log)
-    try:
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        print(f"操作日志记录失败: {str(e)}")
-
-
-# 获取系统信息函数
-def get_system_info():
-    system = {
-        'system_name': '公司部门管理系统',
-        'version': '1.0.0',
-        'os': platform.system(),
-        'system_platform': platform.platform(),
-        'hostname': platform.node(),
-        'ip_address': '127.0.0.1',
-        'current_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'python_version': platform.python_version()
-    }
-
-    # 获取CPU信息
-    try:
-        cpu = {
-            'cpu_count': psutil.cpu_count(logical=False),
-            'cpu_count_logical': psutil.cpu_count(logical=True),
-            'cpu_percent': psutil.cpu_percent()
-        }
-        if hasattr(psutil, 'cpu_freq') and psutil.cpu_freq():
-            cpu['cpu_freq'] = psutil.cpu_freq().current
-    except Exception as e:
-        print(f"获取CPU信息失败: {e}")
-        cpu = {}
-
-    # 获取内存信息
-    try:
-        mem = psutil.virtual_memory()
-        memory = {
-            'total_memory': round(mem.total / (1024 ** 3), 2),
-            'available_memory': round(mem.available / (1024 ** 3), 2),
-            'memory_percent': mem.percent
-        }
-    except Exception as e:
-        print(f"获取内存信息失败: {e}")
-        memory = {}
-
-    # 获取磁盘信息
-    try:
-        disk = psutil.disk_usage('/')
-        disk_info = {
-            'total_disk': round(disk.total / (1024 ** 3), 2),
-            'used_disk': round(disk.used / (1024 ** 3), 2),
-            'free_disk': round(disk.free / (1024 ** 3), 2),
-            'disk_percent': disk.percent
-        }
-    except Exception as e:
-        print(f"获取磁盘信息失败: {e}")
-        disk_info = {}
-
-    # 获取软件版本
-    software_versions = {}
-    try:
-        mysql_version = subprocess.check_output(['mysql', '--version']).decode('utf-8').strip()
-        software_versions['mysql_version'] = mysql_version
-    except Exception:
-        software_versions['mysql_version'] = '未安装'
-
-    try:
-        nginx_version = subprocess.check_output(['nginx', '-v'], stderr=subprocess.STDOUT).decode('utf-8').strip()
-        software_versions['nginx_version'] = nginx_version
-    except Exception:
-        software_versions['nginx_version'] = '未安装'
-
-    try:
-        import flask
-        software_versions['flask_version'] = flask.__version__
-    except ImportError:
-        software_versions['flask_version'] = '未安装'
-
-    try:
-        import sqlalchemy
-        software_versions['sqlalchemy_version'] = sqlalchemy.__version__
-    except ImportError:
-        software_versions['sqlalchemy_version'] = '未安装'
-
-    return {
-        'system': system,
-        'cpu': cpu,
-        'memory': memory,
-        'disk': disk_info,
-        'software': software_versions
-    }
+    return identity_cache.load(user_id)
 
 
 # 登录路由
-@app.route('/login', methods=['GET', 'POST'])
 def login():
     form = LoginForm()
     if form.validate_on_submit():
@@ -182,17 +46,7 @@ def login():
         if user and user.check_password(password):
             login_user(user)
             # 记录登录日志
-            try:
-                login_log = LoginLog(
-                    user_id=user.id,
-                    ip_address=request.remote_addr,
-                    login_time=datetime.utcnow()
-                )
-                db.session.add(login_log)
-                db.session.commit()
-            except Exception as e:
-                print(f"登录日志记录失败: {str(e)}")
-                db.session.rollback()
+            audit_writer.record_login(user.id, request.remote_addr)
 
             return redirect(url_for('main.index'))
         else:
@@ -201,14 +55,135 @@ def login():
 
 
 # 注销路由
-@app.route('/logout')
 @login_required
 def logout():
     logout_user()
     return redirect(url_for('login'))
 
 
+# 全局异常处理：未捕获的异常记入错误日志（按指纹合并、限流、异步写入），回滚会话后返回 500
+# 调试和测试模式下记录后继续抛出，保留调试器和测试中的原始异常
+def handle_exception(e):
+    if isinstance(e, HTTPException):
+        return e
+    db.session.rollback()
+    error_id = error_recorder.capture(e)[:12]
+    if current_app.debug or current_app.testing:
+        raise e
+    if request.blueprint == 'api_v1':
+        return jsonify({'error': '服务器内部错误', 'error_id': error_id}), 500
+    try:
+        return render_template('500.html', error_id=error_id), 500
+    except Exception:
+        return f'服务器内部错误（错误编号 {error_id}）', 500
+
+
+# 数据库迁移命令：flask db-upgrade / flask db-status
+# 迁移、归档等模块只有命令行用到，在命令内导入，不拖慢 worker 启动
+def db_upgrade_command():
+    import migrations
+    applied = migrations.upgrade()
+    if not applied:
+        print('数据库已是最新版本')
+
+
+# 日志归档命令：flask archive-logs，把超过保留期的日志移入压缩归档文件
+def archive_logs_command():
+    import retention
+    for table_name, count in retention.archive_all().items():
+        print(f"{table_name}: 归档 {count} 条")
+
+
+# 统计计数校准命令：flask reconcile-counters（同时按上级部门关系重算部门路径和子树人数）
+def reconcile_counters_command():
+    import hierarchy
+    for name, value in counters.reconcile().items():
+        print(f"{name}: {value}")
+    result = hierarchy.rebuild()
+    print(f"部门层级: 共 {result['departments']} 个部门，校正 {result['updated']} 个")
+    db.session.commit()
+
+
+def db_status_command():
+    import migrations
+    for version, description, applied in migrations.status():
+        print(f"{'[x]' if applied else '[ ]'} {version}: {description}")
+
+
+# 全文检索索引重建命令：flask rebuild-search-index
+def rebuild_search_index_command():
+    import search
+    for doc_type, count in search.rebuild().items():
+        print(f"{doc_type}: 索引 {count} 篇")
+    db.session.commit()
+
+
+# 创建管理员账号命令：flask create-admin
+def create_admin_command():
+    from create_admin import create_admin
+    create_admin()
+
+
+# 应用工厂：config_name 为 config 字典中的键，未指定时读取 FLASK_CONFIG / FLASK_ENV 环境变量
+# 生产环境由 WSGI 服务器通过 wsgi.py 调用，每个 worker 进程各创建一个应用实例
+def create_app(config_name=None):
+    config_name = config_name or os.getenv('FLASK_CONFIG') or os.getenv('FLASK_ENV', 'development')
+
+    # 配置 Flask 应用（config 模块只在导入时执行一次）
+    app = Flask(__name__)
+    app.config.from_object(config[config_name])
+
+    # 初始化数据库
+    db.init_app(app)
+
+    # 初始化请求性能埋点
+    instrumentation.init_app(app)
+
+    # 启动系统信息采样器
+    metrics_sampler.init_app(app)
+
+    # 初始化审计日志写入器
+    audit_writer.init_app(app)
+
+    # 初始化错误日志记录器，注册全局异常处理
+    error_recorder.init_app(app)
+    app.register_error_handler(Exception, handle_exception)
+
+    # 初始化视图片段缓存
+    fragment_cache.init_app(app)
+
+    # 启动统计计数定期校准
+    counters.counter_reconciler.init_app(app)
+
+    # 初始化登录身份缓存
+    identity_cache.init_app(app)
+
+    # 初始化 Flask-Login
+    login_manager.init_app(app)
+
+    # 注册蓝图
+    register_blueprints(app)
+
+    # 登录与注销
+    app.add_url_rule('/login', 'login', login, methods=['GET', 'POST'])
+    app.add_url_rule('/logout', 'logout', logout)
+
+    # 命令行命令
+    app.cli.command('db-upgrade')(db_upgrade_command)
+    app.cli.command('archive-logs')(archive_logs_command)
+    app.cli.command('reconcile-counters')(reconcile_counters_command)
+    app.cli.command('db-status')(db_status_command)
+    app.cli.command('create-admin')(create_admin_command)
+    app.cli.command('rebuild-search-index')(rebuild_search_index_command)
+
+    return app
+
+
 if __name__ == '__main__':
+    import socket
+    import migrations
+    from create_admin import create_admin
+
     # 获取本机IP地址
     try:
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -219,35 +194,25 @@ if __name__ == '__main__':
         print(f"获取IP地址失败: {e}")
         local_ip = '127.0.0.1'
 
+    app = create_app()
+
     print(f"服务器将运行在: http://{local_ip}:5000")
     print("请确保防火墙已开放5000端口")
 
     # 在应用上下文中执行数据库操作
     with app.app_context():
         try:
-            # 创建所有表
-            db.create_all()
-            print("数据库表创建成功")
+            # 执行未应用的数据库迁移
+            migrations.upgrade()
+            print("数据库迁移完成")
 
             # 尝试创建管理员账号（如果不存在）
-            admin_user = User.query.filter_by(username='admin').first()
-            if not admin_user:
-                admin_user = User(
-                    username='admin',
-                    role='admin',
-                    email='admin@example.com'  # 添加必需的字段
-                )
-                admin_user.set_password('admin123')
-                db.session.add(admin_user)
-                db.session.commit()
-                print('管理员账号创建成功')
-            else:
-                print('管理员账号已存在')
+            create_admin()
 
         except Exception as e:
             print(f"数据库初始化失败: {str(e)}")
             # 打印数据库URI用于调试（注意：生产环境不要这样做）
             print(f"数据库URI: {app.config.get('SQLALCHEMY_DATABASE_URI')}")
 
-    # 启动应用
-    app.run(host='0.0.0.0', port=5000, debug=app.config.get('DEBUG', True))
\ No newline at end of file
+    # 启动开发服务器（单进程，仅用于开发调试；生产环境请使用 gunicorn -c gunicorn.conf.py wsgi:app）
+    app.run(host='0.0.0.0', port=5000, debug=app.config['DEBUG'], threaded=True)
\ No newline at end of file
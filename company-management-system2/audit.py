@@ -0,0 +1,230 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from errorlog import error_recorder
+from extensions import db
+from models import LoginLog, OperationLog
+
+
+# 审计日志写入器：请求线程只把记录放入有界队列，后台线程按批量大小或时间间隔批量落库
+class AuditLogWriter:
+    def __init__(self, app=None, batch_size=200, flush_interval=1.0, queue_size=10000, enqueue_timeout=0.05):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.enqueue_timeout = enqueue_timeout
+        self.synchronous = False
+        self.app = None
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'enqueued': 0,
+            'written': 0,
+            'failed': 0,
+            'batches': 0,
+            'inline_flushes': 0,
+            'max_queue_depth': 0
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config.get('AUDIT_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('AUDIT_FLUSH_INTERVAL', self.flush_interval)
+        self.queue_size = app.config.get('AUDIT_QUEUE_SIZE', self.queue_size)
+        self.enqueue_timeout = app.config.get('AUDIT_ENQUEUE_TIMEOUT', self.enqueue_timeout)
+        self.synchronous = app.config.get('AUDIT_SYNCHRONOUS', False)
+        app.extensions['audit_writer'] = self
+        atexit.register(self.shutdown)
+
+    # 记录操作日志
+    def record_operation(self, user_id, content, operation_type='system'):
+        self._enqueue(OperationLog, {
+            'user_id': user_id,
+            'operation_type': operation_type,
+            'operation_content': content,
+            'operation_time': datetime.utcnow()
+        })
+
+    # 记录登录日志
+    def record_login(self, user_id, ip_address):
+        self._enqueue(LoginLog, {
+            'user_id': user_id,
+            'ip_address': ip_address or '',
+            'login_time': datetime.utcnow()
+        })
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize() if self._queue is not None else 0
+        stats['queue_size'] = self.queue_size
+        return stats
+
+    # 追加到 /system/metrics 的写入器状态（Prometheus 文本格式），用于观察背压：
+    # 队列深度接近容量、inline_flushes 增长说明后台线程写不过来，请求线程正在同步写库
+    def render_prometheus(self):
+        stats = self.stats()
+        lines = ['# HELP audit_log_records_total 审计日志记录数（enqueued 入队、written 写入、failed 写入失败）',
+                 '# TYPE audit_log_records_total counter']
+        for key in ('enqueued', 'written', 'failed'):
+            lines.append(f'audit_log_records_total{{result="{key}"}} {stats[key]}')
+        lines += ['# HELP audit_log_batches_total 审计日志批量写入次数',
+                  '# TYPE audit_log_batches_total counter',
+                  f'audit_log_batches_total {stats["batches"]}',
+                  '# HELP audit_log_inline_flushes_total 队列已满、由请求线程直接写出的次数',
+                  '# TYPE audit_log_inline_flushes_total counter',
+                  f'audit_log_inline_flushes_total {stats["inline_flushes"]}',
+                  '# HELP audit_log_queue_depth 审计日志队列当前长度',
+                  '# TYPE audit_log_queue_depth gauge',
+                  f'audit_log_queue_depth {stats["queue_depth"]}',
+                  '# HELP audit_log_queue_max_depth 审计日志队列出现过的最大长度',
+                  '# TYPE audit_log_queue_max_depth gauge',
+                  f'audit_log_queue_max_depth {stats["max_queue_depth"]}',
+                  '# HELP audit_log_queue_size 审计日志队列容量',
+                  '# TYPE audit_log_queue_size gauge',
+                  f'audit_log_queue_size {stats["queue_size"]}']
+        return '\n'.join(lines) + '\n'
+
+    def _count(self, key, value=1):
+        with self._stats_lock:
+            self._stats[key] += value
+
+    def _enqueue(self, model, values):
+        if self.synchronous:
+            self._write([(model, values)])
+            return
+
+        self._ensure_worker()
+        item = (model, values)
+        try:
+            self._queue.put(item, timeout=self.enqueue_timeout)
+        except queue.Full:
+            # 背压：队列已满时由调用线程直接写出一批，避免丢失审计记录
+            self._count('inline_flushes')
+            drained = self._drain(self.batch_size - 1)
+            self._write([entry for entry in drained if not isinstance(entry, threading.Event)] + [item])
+            for entry in drained:
+                if isinstance(entry, threading.Event):
+                    entry.set()
+            return
+
+        self._count('enqueued')
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            if depth > self._stats['max_queue_depth']:
+                self._stats['max_queue_depth'] = depth
+
+    # 后台线程按进程懒启动：多进程服务器 fork 之后各 worker 拥有自己的队列和线程
+    def _ensure_worker(self):
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.queue_size)
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+
+    def _drain(self, limit):
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = []
+            marker = None
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if isinstance(item, threading.Event):
+                    marker = item
+                    break
+                batch.append(item)
+            if batch:
+                self._write(batch)
+            if marker is not None:
+                marker.set()
+
+    def _write(self, items):
+        if not items:
+            return
+        rows_by_model = {}
+        for model, values in items:
+            rows_by_model.setdefault(model, []).append(values)
+
+        with self._write_lock, self.app.app_context():
+            try:
+                for model, rows in rows_by_model.items():
+                    db.session.execute(insert(model), rows)
+                db.session.commit()
+                self._count('written', len(items))
+                self._count('batches')
+            except Exception as e:
+                db.session.rollback()
+                self._count('failed', len(items))
+                error_recorder.capture(e)
+                print(f"审计日志批量写入失败: {str(e)}")
+
+    # 立即写出已入队的全部记录：向队列放入标记，等待后台线程处理到该标记
+    def flush(self, timeout=5.0):
+        if self._queue is None or self._pid != os.getpid():
+            return
+        if self._thread is not None and self._thread.is_alive():
+            marker = threading.Event()
+            try:
+                self._queue.put(marker, timeout=timeout)
+            except queue.Full:
+                pass
+            else:
+                marker.wait(timeout)
+        # 一直取到队列为空：某一批可能只有其他线程放入的标记，后面仍有记录
+        while True:
+            drained = self._drain(self.batch_size)
+            if not drained:
+                break
+            self._write([item for item in drained if not isinstance(item, threading.Event)])
+            for item in drained:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    # 停止后台线程并写出队列中剩余的记录（进程退出时自动调用）
+    def shutdown(self, timeout=5.0):
+        self.flush(timeout)
+        self._stopping.set()
+        if self._thread is not None and self._queue is not None:
+            try:
+                self._queue.put_nowait(threading.Event())
+            except queue.Full:
+                pass
+            self._thread.join(timeout=timeout)
+        self.flush(timeout)
+
+
+audit_writer = AuditLogWriter()
@@ -0,0 +1,325 @@
+"""接口基准测试：在合成数据库上逐个请求常用页面和接口，统计延迟分位数、吞吐量和每个请求的 SQL 条数，
+结果按提交保存为 JSON，可与历史结果对比发现性能回退。
+
+用法（在 company-management-system2 目录下，先用 benchmarks.seed 生成数据）:
+    python -m benchmarks.seed --scale medium --reset
+    python -m benchmarks.bench_endpoints run --requests 200
+    python -m benchmarks.bench_endpoints run --mode http --workers 2 --concurrency 16
+    python -m benchmarks.bench_endpoints compare                     # 对比最近两次结果
+    python -m benchmarks.bench_endpoints compare results/a.json results/b.json --threshold 0.15
+
+两种模式:
+    client  进程内用 Flask 测试客户端顺序请求，不含网络开销，逐请求统计 SQL 条数（结果稳定，适合对比提交）
+    http    启动 gunicorn 并发压测（复用 load_test 的服务器和客户端），反映并发下的延迟和吞吐；SQL 条数取自 client 模式
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+from sqlalchemy import create_engine, func, select
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import load_test  # noqa: E402
+from models import Department, Member, OperationLog  # noqa: E402
+from querycount import count_queries  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+PERCENTILES = [50, 90, 95, 99]
+# 影响结果可比性的运行参数，对比时不一致会给出提示
+COMPARED_OPTIONS = ['url', 'no_cache', 'workers', 'threads', 'concurrency']
+
+# 压测的页面和接口：名称 -> 路径模板，{department_id}、{member_name} 按库中数据替换
+ENDPOINTS = {
+    'index': '/',
+    'members_page': '/members/',
+    'departments_page': '/departments/',
+    'announcements_page': '/operations/announcements',
+    'operation_logs_page': '/logs/operation_logs',
+    'login_logs_page': '/logs/login_logs',
+    'error_logs_page': '/logs/list_error_logs',
+    'api_members': '/api/v1/members?page=1&per_page=20&sort=id&order=desc',
+    'api_members_deep_page': '/api/v1/members?page=200&per_page=20&sort=create_time&order=desc',
+    'api_members_filter': '/api/v1/members?q={member_name}',
+    'api_departments': '/api/v1/departments?page=1&per_page=20',
+    'api_department_tree': '/api/v1/departments/{department_id}/tree?depth=2',
+    'api_department_members': '/api/v1/departments/{department_id}/members?per_page=20',
+    'search': '/search/?q={member_name}',
+    # 输入联想：最后一个词按前缀匹配，且同一词项同时命中两个词项组（用 --no-cache 测未命中缓存的检索）
+    'search_prefix': '/search/?q=member10',
+    'search_multi_term': '/search/?q=release%20rel',
+}
+
+
+# 用库中真实数据替换路径中的占位符：子树人数最多的根部门、编号居中的成员
+def resolve_paths(url, names=None):
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        department_id = connection.execute(
+            select(Department.id).where(Department.parent_id.is_(None))
+            .order_by(Department.subtree_headcount.desc()).limit(1)
+        ).scalar()
+        member_count = connection.execute(select(func.count()).select_from(Member)).scalar()
+        member_name = connection.execute(
+            select(Member.name).order_by(Member.id).offset(member_count // 2).limit(1)
+        ).scalar()
+    engine.dispose()
+    if department_id is None or member_name is None:
+        raise SystemExit('库中没有部门或成员数据，请先运行 python -m benchmarks.seed')
+    values = {'department_id': department_id, 'member_name': quote(member_name)}
+    return {name: path.format(**values) for name, path in ENDPOINTS.items() if not names or name in names}
+
+
+# 最近秩法求分位数（samples 已排序）
+def percentile(samples, p):
+    if not samples:
+        return None
+    rank = max(1, -(-len(samples) * p // 100))
+    return samples[int(rank) - 1]
+
+
+def summarize(latencies, elapsed, errors, sql_counts=None):
+    samples = sorted(latencies)
+    summary = {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput': round(len(samples) / elapsed, 2) if elapsed else None,
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 3) if samples else None,
+        'max_ms': round(samples[-1] * 1000, 3) if samples else None
+    }
+    for p in PERCENTILES:
+        value = percentile(samples, p)
+        summary[f'p{p}_ms'] = round(value * 1000, 3) if value is not None else None
+    if sql_counts:
+        summary['sql_per_request'] = round(sum(sql_counts) / len(sql_counts), 2)
+        summary['sql_max'] = max(sql_counts)
+    return summary
+
+
+# 进程内基准：每个路径先预热，再顺序请求 requests 次，逐请求计时并统计 SQL 条数
+def run_client(url, paths, requests, warmup, username, password, use_cache=True):
+    os.environ['SQLALCHEMY_DATABASE_URI'] = url
+    os.environ.setdefault('CACHE_BACKEND', 'lru')  # 进程内单实例基准，不依赖 Redis
+    from app import create_app
+    from cache import fragment_cache
+
+    app = create_app('production')
+    app.config['WTF_CSRF_ENABLED'] = False
+    fragment_cache.enabled = use_cache
+    client = app.test_client()
+    response = client.post('/login', data={'username': username, 'password': password})
+    if response.status_code != 302:
+        raise SystemExit(f'登录失败（状态码 {response.status_code}），请确认压测账号已由 benchmarks.seed 创建')
+
+    results = {}
+    for name, path in paths.items():
+        for _ in range(warmup):
+            client.get(path)
+        latencies, sql_counts, errors = [], [], 0
+        for _ in range(requests):
+            with count_queries() as counter:
+                started = time.perf_counter()
+                response = client.get(path)
+                elapsed = time.perf_counter() - started
+            if response.status_code == 200:
+                latencies.append(elapsed)
+                sql_counts.append(counter.count)
+            else:
+                errors += 1
+        results[name] = summarize(latencies, sum(latencies), errors, sql_counts)
+        results[name]['path'] = path
+        print_row(name, results[name])
+    return results
+
+
+# 并发基准：启动 gunicorn，所有客户端轮流请求全部路径；每个路径的吞吐量是它在总吞吐中分到的部分
+def run_http(url, paths, workers, threads, concurrency, duration, port, username, password, external=False):
+    path_names = {path: name for name, path in paths.items()}
+    process = None if external else load_test.start_server(workers, threads, port, url)
+    try:
+        load_test.run_clients(port, list(paths.values()), min(concurrency, 4), 2, username, password)
+        clients, elapsed = load_test.run_clients(port, list(paths.values()), concurrency, duration,
+                                                 username, password)
+    finally:
+        if process is not None:
+            load_test.stop_server(process)
+
+    results = {}
+    for path, name in path_names.items():
+        latencies = [value for client in clients for value in client.latencies[path]]
+        errors = sum(client.failures[path] for client in clients)
+        results[name] = summarize(latencies, elapsed, errors)
+        results[name]['path'] = path
+        print_row(name, results[name])
+    completed = sum(client.completed for client in clients)
+    print(f'总计 {completed / elapsed:.1f} req/s（并发 {concurrency}，{elapsed:.1f} s）')
+    return results
+
+
+def print_row(name, summary):
+    sql = f"  sql {summary['sql_per_request']:>6}" if 'sql_per_request' in summary else ''
+    if not summary['requests']:
+        print(f"{name:<24} 全部失败（{summary['errors']} 次）")
+        return
+    print(f"{name:<24} p50 {summary['p50_ms']:>9.2f} ms  p95 {summary['p95_ms']:>9.2f} ms  "
+          f"p99 {summary['p99_ms']:>9.2f} ms  {summary['throughput']:>9.1f} req/s{sql}"
+          + (f"  失败 {summary['errors']}" if summary['errors'] else ''))
+
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(url):
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        rows = {model.__tablename__: connection.execute(select(func.count()).select_from(model)).scalar()
+                for model in (Department, Member, OperationLog)}
+    dialect = engine.dialect.name
+    engine.dispose()
+    return {
+        'commit': _git('rev-parse', 'HEAD'),
+        'subject': _git('log', '-1', '--format=%s'),
+        'dirty': bool(_git('status', '--porcelain', '--', '.')),
+        'python': platform.python_version(),
+        'machine': f'{platform.system()} {platform.machine()}, {os.cpu_count()} CPU',
+        'database': dialect,
+        'rows': rows
+    }
+
+
+# 结果文件名包含时间和提交号，按文件名排序即按运行时间排序
+def save_results(result, directory=RESULTS_DIR):
+    os.makedirs(directory, exist_ok=True)
+    commit = (result['environment']['commit'] or 'nogit')[:10]
+    suffix = '-dirty' if result['environment']['dirty'] else ''
+    filename = os.path.join(directory, f"{datetime.now():%Y%m%d-%H%M%S}-{commit}{suffix}.json")
+    with open(filename, 'w', encoding='utf-8') as file:
+        json.dump(result, file, ensure_ascii=False, indent=2)
+    return filename
+
+
+def _change(old, new):
+    if old in (None, 0) or new is None:
+        return None
+    return (new - old) / old
+
+
+# 对比两次结果：p95 延迟上升或吞吐量下降超过阈值、每请求 SQL 条数增加都记为回退；返回回退列表
+def compare(base, head, threshold):
+    regressions = []
+    print(f"基准: {base['environment']['commit'] or '-'} {base['environment']['subject'] or ''}")
+    print(f"对比: {head['environment']['commit'] or '-'} {head['environment']['subject'] or ''}")
+    if base['environment']['rows'] != head['environment']['rows']:
+        print(f"注意: 两次数据规模不同 {base['environment']['rows']} -> {head['environment']['rows']}")
+    for key in COMPARED_OPTIONS:
+        if base['options'].get(key) != head['options'].get(key):
+            print(f"注意: 两次运行参数 {key} 不同 {base['options'].get(key)} -> {head['options'].get(key)}")
+    for mode, endpoints in head['modes'].items():
+        base_endpoints = base['modes'].get(mode, {})
+        print(f'\n===== {mode} =====')
+        for name, summary in endpoints.items():
+            old = base_endpoints.get(name)
+            if old is None or not old['requests'] or not summary['requests']:
+                continue
+            p95 = _change(old['p95_ms'], summary['p95_ms'])
+            throughput = _change(old['throughput'], summary['throughput'])
+            flags = []
+            if p95 is not None and p95 > threshold:
+                flags.append(f'p95 +{p95:.0%}')
+            if throughput is not None and -throughput > threshold:
+                flags.append(f'吞吐 {throughput:.0%}')
+            if summary.get('sql_per_request', 0) > old.get('sql_per_request', 0):
+                flags.append(f"SQL {old['sql_per_request']} -> {summary['sql_per_request']}")
+            if flags:
+                regressions.append((mode, name, flags))
+            print(f"{name:<24} p95 {old['p95_ms']:>9.2f} -> {summary['p95_ms']:>9.2f} ms "
+                  f"({p95 if p95 is not None else 0:+.0%})  吞吐 {old['throughput']:>9.1f} -> "
+                  f"{summary['throughput']:>9.1f} req/s" + ('  <- 回退: ' + '，'.join(flags) if flags else ''))
+    return regressions
+
+
+def load_result(filename):
+    with open(filename, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def run_command(args):
+    names = [name for name in args.endpoints.split(',') if name] if args.endpoints else None
+    paths = resolve_paths(args.url, names)
+    result = {'time': datetime.now().isoformat(timespec='seconds'), 'environment': environment(args.url),
+              'options': {key: value for key, value in vars(args).items() if key != 'func'}, 'modes': {}}
+    if args.mode in ('client', 'both'):
+        print(f'===== client（每个路径 {args.requests} 次，缓存{"开启" if not args.no_cache else "关闭"}）=====')
+        result['modes']['client'] = run_client(args.url, paths, args.requests, args.warmup,
+                                               args.username, args.password, use_cache=not args.no_cache)
+    if args.mode in ('http', 'both'):
+        print(f'\n===== http（{args.workers} workers × {args.threads} threads，并发 {args.concurrency}）=====')
+        result['modes']['http'] = run_http(args.url, paths, args.workers, args.threads, args.concurrency,
+                                           args.duration, args.port, args.username, args.password,
+                                           external=args.external)
+    if not args.no_save:
+        print(f'\n结果已保存到 {save_results(result, args.results_dir)}')
+
+
+def compare_command(args):
+    files = args.files
+    if not files:
+        files = sorted(glob.glob(os.path.join(args.results_dir, '*.json')))[-2:]
+        if len(files) < 2:
+            raise SystemExit(f'{args.results_dir} 中的结果不足两份')
+    elif len(files) != 2:
+        raise SystemExit('需要指定两个结果文件：基准和对比')
+    regressions = compare(load_result(files[0]), load_result(files[1]), args.threshold)
+    if regressions:
+        print(f'\n发现 {len(regressions)} 处性能回退（阈值 {args.threshold:.0%}）')
+        sys.exit(1)
+    print('\n未发现性能回退')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='接口延迟、吞吐量和 SQL 条数基准测试')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help='运行基准测试并保存结果')
+    run.add_argument('--url', default='sqlite:///' + os.path.join(ROOT, 'bench.db'), help='数据库连接 URL')
+    run.add_argument('--mode', choices=['client', 'http', 'both'], default='client')
+    run.add_argument('--endpoints', help=f'逗号分隔的端点名称，默认全部: {",".join(ENDPOINTS)}')
+    run.add_argument('--requests', type=int, default=100, help='client 模式每个路径的请求次数')
+    run.add_argument('--warmup', type=int, default=3, help='client 模式每个路径的预热次数')
+    run.add_argument('--no-cache', action='store_true', help='client 模式关闭视图片段缓存，测量未命中缓存的路径')
+    run.add_argument('--workers', type=int, default=2, help='http 模式 gunicorn worker 数')
+    run.add_argument('--threads', type=int, default=4, help='http 模式每个 worker 的线程数')
+    run.add_argument('--concurrency', type=int, default=16, help='http 模式并发客户端数')
+    run.add_argument('--duration', type=float, default=15, help='http 模式压测秒数')
+    run.add_argument('--port', type=int, default=5056)
+    run.add_argument('--external', action='store_true', help='http 模式压测已在 --port 上运行的服务器，不启动 gunicorn')
+    run.add_argument('--username', default='loadtest')
+    run.add_argument('--password', default='loadtest123')
+    run.add_argument('--results-dir', default=RESULTS_DIR)
+    run.add_argument('--no-save', action='store_true', help='只打印结果，不保存')
+    run.set_defaults(func=run_command)
+
+    diff = subparsers.add_parser('compare', help='对比两次结果（默认为最近两次）')
+    diff.add_argument('files', nargs='*', help='基准结果文件和对比结果文件')
+    diff.add_argument('--threshold', type=float, default=0.1, help='判定回退的相对变化阈值')
+    diff.add_argument('--results-dir', default=RESULTS_DIR)
+    diff.set_defaults(func=compare_command)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""启动耗时基准：在全新的 Python 进程中测量从冷导入到处理完第一个请求的时间，跟踪滚动发布时 worker 的启动耗时。
+
+用法（在 company-management-system2 目录下）:
+    python -m benchmarks.bench_startup --runs 10
+    python -m benchmarks.bench_startup --runs 5 --importtime    # 额外列出导入最慢的模块
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在子进程中执行：分阶段计时，以 JSON 输出结果
+PROBE = r'''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app(sys.argv[1])
+created = time.perf_counter()
+with app.app_context():
+    from extensions import db
+    db.create_all()
+response = app.test_client().get(sys.argv[2])
+served = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'create_app': created - imported,
+    'first_request': served - created,
+    'total': served - started,
+    'status': response.status_code
+}))
+'''
+
+PHASES = ['import', 'create_app', 'first_request', 'total']
+
+
+def run_probe(config_name, path, database_url, importtime=False):
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=database_url)
+    env.setdefault('CACHE_BACKEND', 'lru')  # 单进程启动测量，不依赖 Redis
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', PROBE, config_name, path]
+    result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return timings, result.stderr
+
+
+# 解析 -X importtime 输出，返回累计耗时最长的顶层模块及其直接依赖（每级缩进两个空格）
+def slowest_imports(stderr, limit):
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            modules.append((int(cumulative), name.rstrip()))
+    return sorted(modules, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测量冷启动到处理完第一个请求的耗时')
+    parser.add_argument('--runs', type=int, default=10, help='重复启动次数')
+    parser.add_argument('--config', default='production', help='create_app 使用的配置名')
+    parser.add_argument('--path', default='/login', help='第一个请求的路径')
+    parser.add_argument('--importtime', action='store_true', help='列出导入最慢的模块')
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = 'sqlite:///' + os.path.join(directory, 'startup.db')
+        # 先运行一次生成字节码缓存，之后的计时不包含编译
+        run_probe(args.config, args.path, database_url)
+
+        samples = {phase: [] for phase in PHASES}
+        for _ in range(args.runs):
+            timings, _ = run_probe(args.config, args.path, database_url)
+            if timings['status'] >= 500:
+                raise RuntimeError(f'第一个请求失败，状态码 {timings["status"]}')
+            for phase in PHASES:
+                samples[phase].append(timings[phase] * 1000)
+
+        print(f'{args.runs} 次冷启动（配置 {args.config}，首个请求 {args.path}）:')
+        for phase in PHASES:
+            values = samples[phase]
+            print(f'  {phase:<14} 中位数 {statistics.median(values):8.1f} ms   '
+                  f'最小 {min(values):8.1f} ms   最大 {max(values):8.1f} ms')
+
+        if args.importtime:
+            _, stderr = run_probe(args.config, args.path, database_url, importtime=True)
+            print(f'\n导入最慢的 {args.top} 个模块（累计耗时，缩进表示被上一级导入）:')
+            for cumulative, name in slowest_imports(stderr, args.top):
+                print(f'  {cumulative / 1000:8.1f} ms  {name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+import csv
+import io
+from collections import Counter
+
+from flask import Response, stream_with_context
+from sqlalchemy import insert, select
+
+from models import db, Department, Member, User
+import counters
+import hierarchy
+import search
+
+IMPORT_CHUNK_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+
+# 导入文件表头（中英文均可）到字段名的映射
+MEMBER_HEADERS = {
+    'name': 'name', '姓名': 'name',
+    'email': 'email', '邮箱': 'email',
+    'department': 'department', 'department_id': 'department', '所属部门': 'department', '部门': 'department',
+    'position': 'position', '职位': 'position'
+}
+DEPARTMENT_HEADERS = {
+    'name': 'name', '部门名称': 'name',
+    'manager': 'manager', 'manager_username': 'manager', '部门经理': 'manager'
+}
+
+
+class BulkImportError(Exception):
+    pass
+
+
+# 导入结果：总行数、成功行数、逐行错误（行号, 原因）
+class ImportReport:
+    def __init__(self, kind):
+        self.kind = kind
+        self.total = 0
+        self.inserted = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.errors.append((line, message))
+
+
+def _normalize(value):
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def _iter_csv(stream):
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    for row in reader:
+        yield row
+
+
+def _iter_xlsx(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise BulkImportError('服务器未安装 openpyxl，无法读取 Excel 文件，请上传 CSV')
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+# 逐行读取上传文件（CSV 或 XLSX），产出 (行号, {字段: 值})
+def iter_upload(file_storage, header_map):
+    filename = (file_storage.filename or '').lower()
+    if filename.endswith('.xlsx'):
+        rows = _iter_xlsx(file_storage.stream)
+    elif filename.endswith('.csv'):
+        rows = _iter_csv(file_storage.stream)
+    else:
+        raise BulkImportError('仅支持 .csv 或 .xlsx 文件')
+
+    header = next(rows, None)
+    if header is None:
+        raise BulkImportError('文件为空')
+    fields = [header_map.get(_normalize(name).lower(), header_map.get(_normalize(name))) for name in header]
+    if 'name' not in fields:
+        raise BulkImportError('缺少必需的表头: name/姓名')
+
+    for line, row in enumerate(rows, start=2):
+        values = {}
+        for field, value in zip(fields, row):
+            if field:
+                values[field] = _normalize(value)
+        if any(values.values()):
+            yield line, values
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# 批量导入成员：每批用一条 IN 查询校验邮箱唯一性，合法行以 executemany 批量插入
+def import_members(file_storage, chunk_size=IMPORT_CHUNK_SIZE):
+    report = ImportReport('成员')
+    departments_by_name = {}
+    department_ids = set()
+    for department_id, name in db.session.execute(select(Department.id, Department.name)):
+        departments_by_name[name] = department_id
+        department_ids.add(department_id)
+
+    seen_emails = set()
+    for chunk in _chunks(iter_upload(file_storage, MEMBER_HEADERS), chunk_size):
+        report.total += len(chunk)
+        emails = {values.get('email') for _, values in chunk if values.get('email')}
+        existing = set()
+        if emails:
+            existing = {email.lower() for email in db.session.execute(
+                select(Member.email).where(Member.email.in_(emails))
+            ).scalars()}
+
+        rows = []
+        for line, values in chunk:
+            name = values.get('name', '')
+            email = values.get('email', '')
+            department = values.get('department', '')
+            if not name or not email or not department:
+                report.error(line, '姓名、邮箱和部门不能为空')
+                continue
+            key = email.lower()
+            if key in existing:
+                report.error(line, f'邮箱 {email} 已被使用')
+                continue
+            if key in seen_emails:
+                report.error(line, f'邮箱 {email} 在文件中重复')
+                continue
+            if department in departments_by_name:
+                department_id = departments_by_name[department]
+            elif department.isdigit() and int(department) in department_ids:
+                department_id = int(department)
+            else:
+                report.error(line, f'部门 {department} 不存在')
+                continue
+            seen_emails.add(key)
+            rows.append({
+                'name': name,
+                'email': email,
+                'department_id': department_id,
+                'position': values.get('position') or None
+            })
+
+        if rows:
+            db.session.execute(insert(Member), rows)
+            counters.adjust('members', len(rows))
+            hierarchy.adjust_headcounts(Counter(row['department_id'] for row in rows))
+            search.index_documents('member', Member.email.in_([row['email'] for row in rows]))
+            report.inserted += len(rows)
+    return report
+
+
+# 批量导入部门：部门名称唯一性和经理用户名同样按批集合查询
+def import_departments(file_storage, chunk_size=IMPORT_CHUNK_SIZE):
+    report = ImportReport('部门')
+    seen_names = set()
+    for chunk in _chunks(iter_upload(file_storage, DEPARTMENT_HEADERS), chunk_size):
+        report.total += len(chunk)
+        names = {values.get('name') for _, values in chunk if values.get('name')}
+        managers = {values.get('manager') for _, values in chunk if values.get('manager')}
+        existing = set()
+        if names:
+            existing = set(db.session.execute(
+                select(Department.name).where(Department.name.in_(names))
+            ).scalars())
+        users_by_name = {}
+        if managers:
+            users_by_name = dict(db.session.execute(
+                select(User.username, User.id).where(User.username.in_(managers))
+            ).all())
+
+        rows = []
+        for line, values in chunk:
+            name = values.get('name', '')
+            manager = values.get('manager', '')
+            if not name:
+                report.error(line, '部门名称不能为空')
+                continue
+            if name in existing or name in seen_names:
+                report.error(line, f'部门 {name} 已存在')
+                continue
+            if manager and manager not in users_by_name:
+                report.error(line, f'部门经理 {manager} 不存在')
+                continue
+            seen_names.add(name)
+            rows.append({'name': name, 'manager_id': users_by_name.get(manager)})
+
+        if rows:
+            db.session.execute(insert(Department), rows)
+            counters.adjust('departments', len(rows))
+            hierarchy.assign_root_paths(Department.name.in_([row['name'] for row in rows]))
+            report.inserted += len(rows)
+    return report
+
+
+class _LineBuffer:
+    def __init__(self):
+        self.buffer = io.StringIO()
+
+    def write(self, value):
+        self.buffer.write(value)
+
+    def take(self):
+        value = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate(0)
+        return value
+
+
+# 流式导出 CSV：按批从游标读取，边读边输出，不在内存中构造整张表
+def stream_csv(statement, header, filename):
+    def generate():
+        buffer = _LineBuffer()
+        writer = csv.writer(buffer)
+        yield '\ufeff'
+        writer.writerow(header)
+        yield buffer.take()
+        result = db.session.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for partition in result.partitions():
+            for row in partition:
+                writer.writerow(['' if value is None else value for value in row])
+            yield buffer.take()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
+def export_members():
+    statement = (
+        select(Member.id, Member.name, Member.email, Department.name, Member.position, Member.create_time)
+        .outerjoin(Department, Member.department_id == Department.id)
+        .order_by(Member.id)
+    )
+    return stream_csv(statement, ['ID', '姓名', '邮箱', '所属部门', '职位', '创建时间'], 'members.csv')
+
+
+def export_departments():
+    statement = (
+        select(Department.id, Department.name, User.username, Department.create_time)
+        .outerjoin(User, Department.manager_id == User.id)
+        .order_by(Department.id)
+    )
+    return stream_csv(statement, ['ID', '部门名称', '部门经理', '创建时间'], 'departments.csv')
@@ -0,0 +1,198 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+DEFAULT_TTL = 60
+DEFAULT_MAXSIZE = 1024
+
+
+# 进程内 LRU 缓存：容量满时淘汰最久未使用的条目，读取时检查 TTL
+class LRUCache:
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    # 命名空间代数单独保存，不参与 LRU 淘汰
+    def generation(self, namespace):
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def bump_generation(self, namespace):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+
+# 共享缓存：多进程部署时各 worker 共用同一份缓存和失效代数（client 可传入已创建的 Redis 客户端）
+class RedisCache:
+    def __init__(self, url=None, prefix='cms:', client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl or None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+    def generation(self, namespace):
+        value = self.client.get(f'{self.prefix}gen:{namespace}')
+        return int(value) if value is not None else 0
+
+    def bump_generation(self, namespace):
+        self.client.incr(f'{self.prefix}gen:{namespace}')
+
+
+# 按配置创建缓存后端。CACHE_BACKEND=redis 时各 worker 进程共用 Redis，写入后的失效对所有进程生效；
+# lru 为进程内缓存，失效只作用于处理写请求的那个进程，只适用于单进程部署（开发服务器或单 worker）
+def create_backend(app, maxsize=DEFAULT_MAXSIZE):
+    if app.config.get('CACHE_BACKEND', 'lru') == 'redis':
+        return RedisCache(app.config['CACHE_REDIS_URL'], app.config.get('CACHE_KEY_PREFIX', 'cms:'))
+    return LRUCache(maxsize)
+
+
+# 视图片段/查询结果缓存：按命名空间组织，键中带命名空间代数，写入提交后整体失效
+class FragmentCache:
+    def __init__(self, app=None):
+        self.backend = LRUCache()
+        self.default_ttl = DEFAULT_TTL
+        self.enabled = True
+        self._dependencies = {}
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('CACHE_ENABLED', True)
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', DEFAULT_TTL)
+        self.backend = create_backend(app, app.config.get('CACHE_MAXSIZE', DEFAULT_MAXSIZE))
+        app.extensions['fragment_cache'] = self
+
+    # 登记命名空间依赖的数据表，这些表的写入提交后该命名空间失效
+    def register(self, namespace, tables):
+        self._dependencies[namespace] = set(tables)
+        self._stat(namespace)
+
+    def _stat(self, namespace):
+        with self._stats_lock:
+            return self._stats.setdefault(namespace, {'hits': 0, 'misses': 0, 'invalidations': 0})
+
+    def _count(self, namespace, key):
+        with self._stats_lock:
+            self._stats.setdefault(namespace, {'hits': 0, 'misses': 0, 'invalidations': 0})[key] += 1
+
+    def get_or_set(self, namespace, key, factory, ttl=None):
+        if not self.enabled:
+            return factory()
+        full_key = f'{namespace}:{self.backend.generation(namespace)}:{key}'
+        value = self.backend.get(full_key)
+        if value is not None:
+            self._count(namespace, 'hits')
+            return value
+        self._count(namespace, 'misses')
+        value = factory()
+        self.backend.set(full_key, value, ttl or self.default_ttl)
+        return value
+
+    def invalidate(self, namespace):
+        self.backend.bump_generation(namespace)
+        self._count(namespace, 'invalidations')
+
+    def invalidate_tables(self, tables):
+        for namespace, dependencies in self._dependencies.items():
+            if dependencies & tables:
+                self.invalidate(namespace)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = {namespace: dict(values) for namespace, values in self._stats.items()}
+        for values in stats.values():
+            total = values['hits'] + values['misses']
+            values['hit_rate'] = round(values['hits'] / total, 4) if total else None
+        return stats
+
+
+fragment_cache = FragmentCache()
+
+
+# 会话事件：记录本事务写入过的表（ORM flush 以及 session.execute 执行的 INSERT/UPDATE/DELETE），
+# 提交成功后再失效相关命名空间，回滚则丢弃
+def _written_tables(session):
+    return session.info.setdefault('cache_written_tables', set())
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_flush(session, flush_context):
+    tables = _written_tables(session)
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(instance, '__tablename__', None)
+        if table:
+            tables.add(table)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None:
+            _written_tables(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    tables = session.info.pop('cache_written_tables', None)
+    if tables:
+        fragment_cache.invalidate_tables(tables)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_on_rollback(session, previous_transaction):
+    session.info.pop('cache_written_tables', None)
@@ -0,0 +1,68 @@
+# config.py
+import os
+
+from flask.cli import load_dotenv
+
+# 加载 .env 中的环境变量（需在下面各配置类读取环境变量之前执行）
+load_dotenv()
+
+
+# 解析布尔型环境变量：'0'、'false'、'no'、'off' 和空串都视为关闭
+def env_flag(name, default=False):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ('', '0', 'false', 'no', 'off')
+
+
+class Config:
+    SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
+    SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI', 'sqlite:///company_management.db')  # 默认使用 SQLite（仅用于开发）
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    DEBUG = env_flag('DEBUG', False)
+    LOGIN_VIEW = 'login'
+    # 性能埋点：慢查询阈值（毫秒）、启动时是否开启采样分析器；METRICS_TOKEN 供 Prometheus 以 Bearer 令牌抓取 /system/metrics
+    SLOW_QUERY_THRESHOLD_MS = int(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200))
+    PROFILER_ENABLED = env_flag('PROFILER_ENABLED', False)
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    # 片段/列表缓存和登录身份缓存的后端：lru 为进程内缓存，失效只作用于当前进程，只能用于单进程部署；
+    # 多 worker 部署必须使用 redis，否则其他 worker 会继续返回旧的页面片段、304 响应和登录身份直到条目过期
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'lru')
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    # 实时监控 SSE 连接在 SYSTEM_METRICS_STREAM_DURATION 秒内一直占用一个 worker 线程（gunicorn.conf.py 的 threads，
+    # 同样读取 GUNICORN_THREADS）：每个进程最多 threads - 2 条，至少留 2 个线程处理普通请求，超出时返回 503
+    SYSTEM_METRICS_MAX_STREAMS = int(os.getenv('SYSTEM_METRICS_MAX_STREAMS',
+                                               max(int(os.getenv('GUNICORN_THREADS', 4)) - 2, 0)))
+
+class DevelopmentConfig(Config):
+    DEBUG = env_flag('DEBUG', True)
+
+class ProductionConfig(Config):
+    DEBUG = False
+    # 生产环境由 gunicorn 多 worker 运行，缓存默认放在 Redis 中供各 worker 共用
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'redis')
+    # 连接池：每个 worker 进程一个池，总连接数约为 worker 数 ×（pool_size + max_overflow），需小于 MySQL max_connections
+    # pool_pre_ping 在取出连接时检测失效连接；pool_recycle 小于 MySQL wait_timeout，避免复用被服务端断开的连接
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True
+    }
+
+# 测试：内存数据库，关闭 CSRF 和后台线程，审计日志同步写入，便于在测试中直接断言
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    WTF_CSRF_ENABLED = False
+    CACHE_BACKEND = 'lru'
+    AUDIT_SYNCHRONOUS = True
+    SYSTEM_METRICS_ENABLED = False
+    COUNTER_RECONCILE_INTERVAL = 0
+
+config = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig
+}
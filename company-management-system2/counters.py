@@ -0,0 +1,135 @@
+import threading
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.orm import Session, object_session
+
+from errorlog import error_recorder
+from models import db, Department, Member, User, Announcement, Comment, StatCounter
+
+# 计数器名称 -> 被统计的模型
+COUNTED_MODELS = {
+    'departments': Department,
+    'members': Member,
+    'users': User,
+    'announcements': Announcement,
+    'comments': Comment
+}
+
+
+def _increment(connection, name, delta):
+    connection.execute(
+        update(StatCounter)
+        .where(StatCounter.name == name)
+        .values(value=StatCounter.value + delta, update_time=datetime.utcnow())
+    )
+
+
+def _pending_deltas(target):
+    return object_session(target).info.setdefault('counter_deltas', Counter())
+
+
+# ORM 增删事件：逐行累加到会话中，flush 结束时每个计数器只执行一条 UPDATE，与业务数据一起提交或回滚
+def _register_events(name, model):
+    @event.listens_for(model, 'after_insert')
+    def after_insert(mapper, connection, target):
+        _pending_deltas(target)[name] += 1
+
+    @event.listens_for(model, 'after_delete')
+    def after_delete(mapper, connection, target):
+        _pending_deltas(target)[name] -= 1
+
+
+for _name, _model in COUNTED_MODELS.items():
+    _register_events(_name, _model)
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_pending_deltas(session, flush_context):
+    deltas = session.info.pop('counter_deltas', None)
+    if deltas:
+        connection = session.connection()
+        for name, delta in deltas.items():
+            if delta:
+                _increment(connection, name, delta)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_pending_deltas(session, previous_transaction):
+    session.info.pop('counter_deltas', None)
+
+
+# 绕过 ORM 的批量写入（如批量导入）需显式调整计数
+def adjust(name, delta):
+    _increment(db.session.connection(), name, delta)
+
+
+# 一次查询读取全部计数；缺失的计数器回退为实时 COUNT
+def get_counts():
+    counts = dict(db.session.execute(select(StatCounter.name, StatCounter.value)).all())
+    for name, model in COUNTED_MODELS.items():
+        if name not in counts:
+            counts[name] = db.session.execute(select(func.count()).select_from(model)).scalar()
+    return counts
+
+
+# 用 COUNT(*) 重新校准全部计数器（可传入连接以便在迁移中使用）
+def reconcile(connection=None):
+    connection = connection or db.session.connection()
+    existing = set(connection.execute(select(StatCounter.name)).scalars())
+    result = {}
+    for name, model in COUNTED_MODELS.items():
+        value = connection.execute(select(func.count()).select_from(model)).scalar()
+        if name in existing:
+            connection.execute(
+                update(StatCounter)
+                .where(StatCounter.name == name)
+                .values(value=value, update_time=datetime.utcnow())
+            )
+        else:
+            connection.execute(insert(StatCounter).values(name=name, value=value, update_time=datetime.utcnow()))
+        result[name] = value
+    return result
+
+
+# 定期校准计数器的后台线程，间隔由 COUNTER_RECONCILE_INTERVAL 配置（秒，0 表示不启动）
+class CounterReconciler:
+    def __init__(self, app=None, interval=3600):
+        self.interval = interval
+        self.app = None
+        self._thread = None
+        self._stop = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('COUNTER_RECONCILE_INTERVAL', self.interval)
+        app.extensions['counter_reconciler'] = self
+        if self.interval:
+            self.start()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='counter-reconciler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self.app.app_context():
+                try:
+                    reconcile()
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    error_recorder.capture(e)
+                    print(f"统计计数校准失败: {str(e)}")
+
+
+counter_reconciler = CounterReconciler()
@@ -1,21 +1,35 @@
-from app import app, db
-from models import User
+from models import db, User
+
+
+# 创建管理员账号（已存在则跳过），需在应用上下文中调用
+def create_admin(username='admin', password='admin123'):
+    if User.query.filter_by(username=username).first():
+        print('管理员账号已存在')
+        return False
 
-# 初始化 Flask 应用上下文
-with app.app_context():
     # 创建一个新的管理员用户
     admin_user = User(
-        username='admin',
+        username=username,
         role='admin'
     )
     # 设置密码
-    admin_user.set_password('admin123')
+    admin_user.set_password(password)
     # 将用户添加到数据库会话
     db.session.add(admin_user)
     # 提交会话以保存更改
     try:
         db.session.commit()
         print('管理员账号创建成功')
+        return True
     except Exception as e:
         db.session.rollback()
         print(f'管理员账号创建失败: {str(e)}')
+        return False
+
+
+if __name__ == '__main__':
+    from app import create_app
+
+    # 初始化 Flask 应用上下文
+    with create_app().app_context():
+        create_admin()
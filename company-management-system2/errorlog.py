@@ -0,0 +1,221 @@
+import atexit
+import hashlib
+import os
+import threading
+import time
+import traceback
+from datetime import datetime
+
+from flask import has_request_context, request
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import ErrorLog
+
+RATE_LIMITED_FINGERPRINT = 'rate-limited'
+
+
+# 令牌桶：每秒补充 rate 个令牌，最多积累 capacity 个；取不到令牌即被限流
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+# 异常指纹：异常类型 + 调用栈上每一帧的文件名和函数名（不含行号和异常信息，信息里的 id 等变量不影响归并）
+def fingerprint(exc):
+    parts = [f'{type(exc).__module__}.{type(exc).__qualname__}']
+    tb = exc.__traceback__
+    while tb is not None:
+        code = tb.tb_frame.f_code
+        parts.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+        tb = tb.tb_next
+    if len(parts) == 1:
+        parts.append(str(exc))
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+# 错误记录器：相同指纹的异常在内存中合并计数，后台线程定时把每个指纹写成一次 UPDATE（或首次 INSERT）
+# 新指纹要先从令牌桶取得令牌，错误风暴时只累计被限流的次数，写库次数有上限，不会反过来压垮数据库
+class ErrorRecorder:
+    def __init__(self, app=None, flush_interval=5.0, rate=1.0, burst=20):
+        self.flush_interval = flush_interval
+        self.bucket = TokenBucket(rate, burst)
+        self.app = None
+        self._pending = {}
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._stats = {'captured': 0, 'merged': 0, 'dropped': 0, 'written': 0, 'failed': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.flush_interval = app.config.get('ERROR_LOG_FLUSH_INTERVAL', self.flush_interval)
+        self.bucket = TokenBucket(app.config.get('ERROR_LOG_RATE', self.bucket.rate),
+                                  app.config.get('ERROR_LOG_BURST', self.bucket.capacity))
+        app.extensions['error_recorder'] = self
+        atexit.register(self.flush)
+
+    # 记录一个异常（可在 except 块中调用）；返回指纹，便于在错误页上展示给用户
+    def capture(self, exc):
+        key = fingerprint(exc)
+        now = datetime.utcnow()
+        with self._lock:
+            self._stats['captured'] += 1
+            entry = self._pending.get(key)
+            if entry is not None:
+                entry['count'] += 1
+                entry['last_seen'] = now
+                self._stats['merged'] += 1
+                return key
+        if not self.bucket.take():
+            with self._lock:
+                self._dropped += 1
+                self._stats['dropped'] += 1
+            return key
+
+        entry = {
+            'count': 1,
+            'first_seen': now,
+            'last_seen': now,
+            'error_type': type(exc).__name__[:100],
+            'error_message': str(exc) or type(exc).__name__,
+            'stack_trace': ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__)),
+            'endpoint': _request_endpoint()
+        }
+        with self._lock:
+            existing = self._pending.get(key)
+            if existing is not None:
+                existing['count'] += 1
+                existing['last_seen'] = now
+            else:
+                self._pending[key] = entry
+        self._ensure_worker()
+        return key
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending)
+        return stats
+
+    # 追加到 /system/metrics 的计数（Prometheus 文本格式）
+    def render_prometheus(self):
+        stats = self.stats()
+        lines = ['# HELP error_log_events_total 错误记录器处理的异常（captured 捕获、merged 合并、dropped 被限流、'
+                 'written 写入、failed 写入失败）',
+                 '# TYPE error_log_events_total counter']
+        for key in ('captured', 'merged', 'dropped', 'written', 'failed'):
+            lines.append(f'error_log_events_total{{result="{key}"}} {stats[key]}')
+        return '\n'.join(lines) + '\n'
+
+    # 后台线程按进程懒启动（多进程服务器 fork 之后各 worker 拥有自己的线程）
+    def _ensure_worker(self):
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='error-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    # 写出合并后的错误：每个指纹一条 UPDATE 累加次数并刷新最近出现时间，库中还没有的再批量 INSERT
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            now = datetime.utcnow()
+            pending[RATE_LIMITED_FINGERPRINT] = {
+                'count': dropped,
+                'first_seen': now,
+                'last_seen': now,
+                'error_type': 'ErrorLogRateLimited',
+                'error_message': '超出错误记录速率限制而未单独记录的异常（出现次数为累计被限流的次数）',
+                'stack_trace': None,
+                'endpoint': None
+            }
+        if not pending or self.app is None:
+            return
+
+        error = None
+        with self._write_lock, self.app.app_context():
+            for _ in range(2):
+                try:
+                    self._write(pending)
+                    db.session.commit()
+                    with self._lock:
+                        self._stats['written'] += len(pending)
+                    return
+                except IntegrityError as e:
+                    # 其他 worker 同时插入了相同指纹：回滚后重试，这次会走 UPDATE
+                    db.session.rollback()
+                    error = e
+                except Exception as e:
+                    db.session.rollback()
+                    error = e
+                    break
+        with self._lock:
+            self._stats['failed'] += len(pending)
+        print(f"错误日志写入失败，丢弃 {len(pending)} 条: {str(error)}")
+
+    def _write(self, pending):
+        new_rows = []
+        for key, entry in pending.items():
+            result = db.session.execute(
+                update(ErrorLog)
+                .where(ErrorLog.fingerprint == key)
+                .values(occurrence_count=ErrorLog.occurrence_count + entry['count'],
+                        timestamp=entry['last_seen'],
+                        error_message=entry['error_message'],
+                        endpoint=entry['endpoint'])
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
+                new_rows.append({
+                    'fingerprint': key,
+                    'error_type': entry['error_type'],
+                    'error_message': entry['error_message'],
+                    'stack_trace': entry['stack_trace'],
+                    'endpoint': entry['endpoint'],
+                    'occurrence_count': entry['count'],
+                    'first_seen': entry['first_seen'],
+                    'timestamp': entry['last_seen']
+                })
+        if new_rows:
+            db.session.execute(insert(ErrorLog), new_rows)
+
+
+def _request_endpoint():
+    if not has_request_context():
+        return None
+    return f'{request.method} {request.path}'[:200]
+
+
+error_recorder = ErrorRecorder()
@@ -0,0 +1,37 @@
+# gunicorn 配置：gunicorn -c gunicorn.conf.py wsgi:app
+# 各项均可通过环境变量覆盖，便于在不同机器上调整并发
+import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import config  # noqa: E402
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+# 多进程 + 每进程多线程：请求大部分时间在等待数据库，gthread 让一个进程同时处理多个请求
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+# 实时监控 SSE 连接各占一个线程，每个进程的连接数上限按线程数计算（见 config.py 的 SYSTEM_METRICS_MAX_STREAMS）
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# 进程内 LRU 缓存的失效只作用于处理写请求的 worker，多 worker 时必须使用共享的 Redis 缓存
+# 缓存后端取自 wsgi.py 将要使用的配置类（FLASK_CONFIG，默认 production），与应用实际使用的一致
+cache_backend = config[os.getenv('FLASK_CONFIG', 'production')].CACHE_BACKEND
+if workers > 1 and cache_backend == 'lru':
+    raise SystemExit('CACHE_BACKEND=lru 只适用于单 worker，多 worker 部署请使用 CACHE_BACKEND=redis 或设置 WEB_CONCURRENCY=1')
+
+# 不预加载应用：采样器、计数校准等后台线程在 fork 后不会保留，需在每个 worker 中各自创建应用
+preload_app = False
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+# 定期重启 worker，防止长期运行的内存增长；抖动避免所有 worker 同时重启
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = 200
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
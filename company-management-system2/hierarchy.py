@@ -0,0 +1,282 @@
+from collections import Counter, defaultdict
+
+from sqlalchemy import String, bindparam, cast, event, func, inspect, literal, select, update
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from models import db, Department, Member
+
+PATH_MAX_LENGTH = 255
+
+departments = Department.__table__
+
+
+# 组织架构操作不合法（上级部门不存在、移动到自身下级、层级过深）
+class HierarchyError(ValueError):
+    pass
+
+
+def path_ids(path):
+    return [int(part) for part in path.strip('/').split('/') if part]
+
+
+# 子树条件：路径以该部门路径开头（前缀 LIKE 可以使用 path 索引），包含该部门本身
+def subtree_condition(path):
+    return Department.path.like(path + '%')
+
+
+def _node(connection, department_id):
+    return connection.execute(
+        select(departments.c.path, departments.c.depth, departments.c.subtree_headcount)
+        .where(departments.c.id == department_id)
+    ).first()
+
+
+def _add_headcount(connection, department_ids, delta):
+    if department_ids and delta:
+        connection.execute(
+            update(departments)
+            .where(departments.c.id.in_(department_ids))
+            .values(subtree_headcount=departments.c.subtree_headcount + delta)
+        )
+
+
+# 按部门累加的人数变化量换算到各级上级部门：每个不同的变化量只执行一条 UPDATE
+def adjust_headcounts(deltas, connection=None):
+    deltas = {int(department_id): delta for department_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    connection = connection or db.session.connection()
+    totals = Counter()
+    for department_id, path in connection.execute(
+            select(departments.c.id, departments.c.path).where(departments.c.id.in_(deltas))):
+        for ancestor_id in path_ids(path):
+            totals[ancestor_id] += deltas[department_id]
+    by_delta = defaultdict(list)
+    for department_id, delta in totals.items():
+        by_delta[delta].append(department_id)
+    for delta, department_ids in by_delta.items():
+        _add_headcount(connection, department_ids, delta)
+
+
+# 校验把部门挂到 parent 之下是否合法；department 为 None 表示新建部门
+def check_parent(department, parent):
+    if parent is None:
+        return
+    if department is not None and department.path and parent.path.startswith(department.path):
+        raise HierarchyError('不能把部门移动到自身或其下级部门之下')
+
+
+# 把整个分支移动到新的上级部门下：一条 UPDATE 改写子树所有部门的路径和层级，人数只调整新旧祖先的差集
+def _move(connection, department_id, parent_id):
+    node = _node(connection, department_id)
+    if parent_id is None:
+        prefix, depth = '/', 0
+    else:
+        parent = _node(connection, parent_id)
+        if parent is None:
+            raise HierarchyError(f'上级部门 {parent_id} 不存在')
+        if parent.path.startswith(node.path):
+            raise HierarchyError('不能把部门移动到自身或其下级部门之下')
+        prefix, depth = parent.path, parent.depth + 1
+    path = f'{prefix}{department_id}/'
+    if path == node.path:
+        return path, depth
+
+    longest = connection.execute(
+        select(func.max(func.length(departments.c.path))).where(departments.c.path.like(node.path + '%'))
+    ).scalar()
+    if longest - len(node.path) + len(path) > PATH_MAX_LENGTH:
+        raise HierarchyError('部门层级过深')
+    connection.execute(
+        update(departments)
+        .where(departments.c.path.like(node.path + '%'))
+        .values(path=literal(path) + func.substr(departments.c.path, len(node.path) + 1),
+                depth=departments.c.depth + (depth - node.depth))
+    )
+
+    old_ancestors = set(path_ids(node.path)) - {department_id}
+    new_ancestors = set(path_ids(prefix))
+    _add_headcount(connection, old_ancestors - new_ancestors, -node.subtree_headcount)
+    _add_headcount(connection, new_ancestors - old_ancestors, node.subtree_headcount)
+    return path, depth
+
+
+# 部门增改事件：新部门在插入后按上级路径补上自己的路径；修改上级部门即移动整个分支，与业务数据同一事务
+@event.listens_for(Department, 'after_insert')
+def _department_inserted(mapper, connection, target):
+    if target.parent_id is None:
+        prefix, depth = '/', 0
+    else:
+        parent = _node(connection, target.parent_id)
+        if parent is None:
+            raise HierarchyError(f'上级部门 {target.parent_id} 不存在')
+        prefix, depth = parent.path, parent.depth + 1
+    path = f'{prefix}{target.id}/'
+    if len(path) > PATH_MAX_LENGTH:
+        raise HierarchyError('部门层级过深')
+    connection.execute(update(departments).where(departments.c.id == target.id).values(path=path, depth=depth))
+    set_committed_value(target, 'path', path)
+    set_committed_value(target, 'depth', depth)
+
+
+@event.listens_for(Department, 'after_update')
+def _department_updated(mapper, connection, target):
+    if inspect(target).attrs.parent_id.history.has_changes():
+        path, depth = _move(connection, target.id, target.parent_id)
+        set_committed_value(target, 'path', path)
+        set_committed_value(target, 'depth', depth)
+
+
+# 成员增删改事件：逐行累加各部门的人数变化，flush 结束时一次性换算到各级上级部门
+def _pending_deltas(target):
+    return object_session(target).info.setdefault('headcount_deltas', Counter())
+
+
+@event.listens_for(Member, 'after_insert')
+def _member_inserted(mapper, connection, target):
+    _pending_deltas(target)[int(target.department_id)] += 1
+
+
+@event.listens_for(Member, 'after_delete')
+def _member_deleted(mapper, connection, target):
+    _pending_deltas(target)[int(target.department_id)] -= 1
+
+
+@event.listens_for(Member, 'after_update')
+def _member_updated(mapper, connection, target):
+    history = inspect(target).attrs.department_id.history
+    if history.deleted and history.added and int(history.deleted[0]) != int(history.added[0]):
+        deltas = _pending_deltas(target)
+        deltas[int(history.deleted[0])] -= 1
+        deltas[int(history.added[0])] += 1
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_pending_deltas(session, flush_context):
+    deltas = session.info.pop('headcount_deltas', None)
+    if deltas:
+        adjust_headcounts(deltas, session.connection())
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_pending_deltas(session, previous_transaction):
+    session.info.pop('headcount_deltas', None)
+
+
+# 绕过 ORM 批量插入的部门（如批量导入）需显式补上路径；这些部门都没有上级
+def assign_root_paths(condition, connection=None):
+    connection = connection or db.session.connection()
+    connection.execute(
+        update(departments)
+        .where(condition, departments.c.path == '')
+        .values(path=literal('/') + cast(departments.c.id, String) + '/', depth=0)
+    )
+
+
+# 上级部门链（从根部门到直接上级）
+def ancestors(department):
+    ids = path_ids(department.path)[:-1]
+    if not ids:
+        return []
+    return Department.query.filter(Department.id.in_(ids)).order_by(Department.depth).all()
+
+
+def subtree_ids(department):
+    return list(db.session.execute(select(Department.id).where(subtree_condition(department.path))).scalars())
+
+
+# 子树下的全部成员（"某位副总裁下的所有人"）：一次 JOIN，不逐级递归
+def subtree_members(department):
+    return Member.query.join(Department, Member.department_id == Department.id).filter(
+        subtree_condition(department.path)
+    )
+
+
+# 组织架构树：按路径一次查出整棵（子）树，在内存中组装为嵌套结构；max_depth 限制向下展开的层数
+def tree(root=None, max_depth=None):
+    query = select(Department.id, Department.name, Department.parent_id, Department.depth,
+                   Department.subtree_headcount)
+    if root is not None:
+        query = query.where(subtree_condition(root.path))
+    if max_depth is not None:
+        query = query.where(Department.depth <= (root.depth if root is not None else 0) + max_depth)
+
+    nodes = {}
+    roots = []
+    for department_id, name, parent_id, depth, headcount in db.session.execute(
+            query.order_by(Department.depth, Department.name)):
+        node = {'id': department_id, 'name': name, 'depth': depth, 'subtree_headcount': headcount, 'children': []}
+        nodes[department_id] = node
+        parent = nodes.get(parent_id)
+        if parent is not None and (root is None or department_id != root.id):
+            parent['children'].append(node)
+        else:
+            roots.append(node)
+    return roots
+
+
+# 按 parent_id 重新计算全部路径、层级和子树人数（可传入连接以便在迁移中使用），只更新有变化的行
+# 找不到上级或处于环中的部门会被提升为根部门
+def rebuild(connection=None):
+    connection = connection or db.session.connection()
+    rows = connection.execute(select(
+        departments.c.id, departments.c.parent_id, departments.c.path,
+        departments.c.depth, departments.c.subtree_headcount
+    )).all()
+    direct = dict(connection.execute(
+        select(Member.__table__.c.department_id, func.count()).group_by(Member.__table__.c.department_id)
+    ).all())
+
+    children = defaultdict(list)
+    ids = {row.id for row in rows}
+    for row in rows:
+        if row.parent_id in ids and row.parent_id != row.id:
+            children[row.parent_id].append(row.id)
+
+    computed = {}
+    order = []
+
+    def visit(root_id):
+        stack = [(root_id, '/', -1)]
+        while stack:
+            department_id, prefix, parent_depth = stack.pop()
+            if department_id in computed:
+                continue
+            path = f'{prefix}{department_id}/'
+            computed[department_id] = [path, parent_depth + 1, direct.get(department_id, 0)]
+            order.append(department_id)
+            stack.extend((child_id, path, parent_depth + 1) for child_id in children[department_id])
+
+    for row in rows:
+        if row.parent_id not in ids or row.parent_id == row.id:
+            visit(row.id)
+    orphans = []
+    for row in rows:
+        if row.id not in computed:
+            orphans.append(row.id)
+            connection.execute(update(departments).where(departments.c.id == row.id).values(parent_id=None))
+            visit(row.id)
+    if orphans:
+        print(f"部门层级存在环，已将部门 {orphans} 提升为根部门")
+
+    for department_id in reversed(order):
+        parent_ids = path_ids(computed[department_id][0])
+        if len(parent_ids) > 1:
+            computed[parent_ids[-2]][2] += computed[department_id][2]
+
+    changed = [
+        {'b_id': row.id, 'b_path': computed[row.id][0], 'b_depth': computed[row.id][1],
+         'b_headcount': computed[row.id][2]}
+        for row in rows
+        if (row.path, row.depth, row.subtree_headcount) != tuple(computed[row.id])
+    ]
+    if changed:
+        connection.execute(
+            update(departments)
+            .where(departments.c.id == bindparam('b_id'))
+            .values(path=bindparam('b_path'), depth=bindparam('b_depth'),
+                    subtree_headcount=bindparam('b_headcount')),
+            changed
+        )
+    return {'departments': len(rows), 'updated': len(changed)}
@@ -0,0 +1,67 @@
+from flask_login import UserMixin
+
+from cache import LRUCache, create_backend
+from models import db, User
+
+DEFAULT_TTL = 30
+DEFAULT_MAXSIZE = 10000
+
+
+# 轻量的登录身份记录：只含 id、用户名和角色，不绑定数据库会话
+class CachedUser(UserMixin):
+    __slots__ = ('id', 'username', 'role')
+
+    def __init__(self, id, username, role):
+        self.id = id
+        self.username = username
+        self.role = role
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+
+    def __repr__(self):
+        return f'<CachedUser {self.id} {self.username}>'
+
+
+# Flask-Login 用户加载缓存：短 TTL，用户被编辑或删除时主动失效。
+# 缓存放在与片段缓存相同的后端中（CACHE_BACKEND），多 worker 部署时为共享的 Redis，
+# 某个 worker 处理删除用户、降级或改密码后的失效对所有 worker 立即生效
+class IdentityCache:
+    def __init__(self, app=None, ttl=DEFAULT_TTL, maxsize=DEFAULT_MAXSIZE, backend=None):
+        self.ttl = ttl
+        self.backend = backend if backend is not None else LRUCache(maxsize)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('IDENTITY_CACHE_TTL', self.ttl)
+        self.backend = create_backend(app, app.config.get('IDENTITY_CACHE_MAXSIZE', DEFAULT_MAXSIZE))
+        app.extensions['identity_cache'] = self
+
+    # 键中带代数，clear() 只需递增代数，不影响同一后端中的其他缓存
+    def _key(self, user_id):
+        return f'identity:{self.backend.generation("identity")}:{int(user_id)}'
+
+    def load(self, user_id):
+        key = self._key(user_id)
+        if self.ttl:
+            cached = self.backend.get(key)
+            if cached is not None:
+                return cached
+        row = db.session.query(User.id, User.username, User.role).filter(User.id == int(user_id)).first()
+        if row is None:
+            return None
+        user = CachedUser(*row)
+        if self.ttl:
+            self.backend.set(key, user, self.ttl)
+        return user
+
+    def invalidate(self, user_id):
+        self.backend.delete(self._key(user_id))
+
+    def clear(self):
+        self.backend.bump_generation('identity')
+
+
+identity_cache = IdentityCache()
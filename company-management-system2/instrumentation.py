@@ -0,0 +1,324 @@
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from datetime import datetime
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 请求耗时直方图的桶上界（秒）
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 单条 SQL 耗时直方图的桶上界（秒）
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# 每个请求 SQL 条数直方图的桶上界
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+MAX_PROFILE_STACKS = 2000
+MAX_STACK_DEPTH = 40
+
+
+# 累计直方图：各桶计数（不累计）、总和、总数；读取时换算成 Prometheus 的累计桶
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    # 按桶线性插值估算分位数（与 Prometheus histogram_quantile 相同的近似）
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        lower = 0.0
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            if seen + count >= rank:
+                return lower + (bound - lower) * ((rank - seen) / count if count else 0)
+            seen += count
+            lower = bound
+        return self.buckets[-1]
+
+
+# 单个端点的聚合：请求耗时、SQL 条数、SQL 总耗时、状态码
+class EndpointStats:
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.query_time = 0.0
+        self.statuses = Counter()
+
+
+# 当前线程正在处理的请求（SQL 事件里据此归属到请求）
+class _RequestState:
+    __slots__ = ('started', 'query_count', 'query_time')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.query_time = 0.0
+
+
+# 请求级性能埋点：请求耗时、SQL 条数/耗时（SQLAlchemy 事件）、慢查询记录、可选的采样分析器
+# 指标按 (端点, 方法) 聚合为直方图，由 /system/metrics 以 Prometheus 文本格式输出；各进程分别统计
+class Instrumentation:
+    def __init__(self, app=None):
+        self.slow_query_threshold = 0.2
+        self.profiler_interval = 0.01
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._endpoints = {}
+        self._query_duration = Histogram(QUERY_BUCKETS)
+        self._slow_queries = deque(maxlen=100)
+        self._active = {}
+        self._profiles = {}
+        self._profile_samples = 0
+        self._profiler = None
+        self._profiler_stop = threading.Event()
+        self._started = time.time()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.slow_query_threshold = app.config.get('SLOW_QUERY_THRESHOLD_MS', 200) / 1000
+        self.profiler_interval = app.config.get('PROFILER_INTERVAL_MS', 10) / 1000
+        self._slow_queries = deque(self._slow_queries, maxlen=app.config.get('SLOW_QUERY_LOG_SIZE', 100))
+        app.extensions['instrumentation'] = self
+        if not app.config.get('INSTRUMENTATION_ENABLED', True):
+            return
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        app.after_request(self._after_request)
+        if not event.contains(Engine, 'before_cursor_execute', self._before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        if app.config.get('PROFILER_ENABLED', False):
+            self.start_profiler()
+
+    # 请求开始：记录起始时间，登记当前线程供 SQL 事件和采样分析器归属
+    def _before_request(self):
+        state = _RequestState()
+        self._local.request = state
+        g._instrumentation_state = state
+        self._active[threading.get_ident()] = request.endpoint or 'unmatched'
+
+    def _after_request(self, response):
+        g._instrumentation_status = response.status_code
+        return response
+
+    # 请求结束（含异常）：把耗时和 SQL 统计计入端点直方图
+    def _teardown_request(self, exc):
+        state = g.pop('_instrumentation_state', None)
+        self._local.request = None
+        self._active.pop(threading.get_ident(), None)
+        if state is None:
+            return
+        duration = time.perf_counter() - state.started
+        status = 500 if exc is not None else g.pop('_instrumentation_status', 200)
+        key = (request.endpoint or 'unmatched', request.method)
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = EndpointStats()
+            stats.duration.observe(duration)
+            stats.queries.observe(state.query_count)
+            stats.query_time += state.query_time
+            stats.statuses[status] += 1
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_instrumentation_started', []).append(time.perf_counter())
+
+    # SQL 执行结束：计入全局 SQL 耗时直方图和当前请求；超过阈值的记入慢查询日志
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('_instrumentation_started')
+        if not started:
+            return
+        duration = time.perf_counter() - started.pop()
+        state = getattr(self._local, 'request', None)
+        if state is not None:
+            state.query_count += 1
+            state.query_time += duration
+        with self._lock:
+            self._query_duration.observe(duration)
+        if duration >= self.slow_query_threshold:
+            endpoint = self._active.get(threading.get_ident(), '后台任务')
+            self._slow_queries.appendleft({
+                'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'duration_ms': round(duration * 1000, 1),
+                'endpoint': endpoint,
+                'statement': ' '.join(statement.split())[:2000],
+                'executemany': executemany
+            })
+            print(f"慢查询 {duration * 1000:.1f} ms [{endpoint}]: {' '.join(statement.split())[:200]}")
+
+    # 采样分析器：后台线程每隔 profiler_interval 抓取正在处理请求的线程调用栈，按端点累计折叠栈
+    def start_profiler(self):
+        if self.profiler_running:
+            return
+        if self._profiler is not None:
+            self._profiler.join(timeout=self.profiler_interval + 1)
+        self._profiler_stop.clear()
+        self._profiler = threading.Thread(target=self._run_profiler, name='request-profiler', daemon=True)
+        self._profiler.start()
+
+    def stop_profiler(self):
+        self._profiler_stop.set()
+
+    @property
+    def profiler_running(self):
+        return self._profiler is not None and self._profiler.is_alive() and not self._profiler_stop.is_set()
+
+    def _run_profiler(self):
+        while not self._profiler_stop.wait(self.profiler_interval):
+            active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            with self._lock:
+                self._profile_samples += 1
+                for thread_id, endpoint in active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        self._record_stack(endpoint, frame)
+
+    def _record_stack(self, endpoint, frame):
+        names = []
+        while frame is not None and len(names) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            names.append(f'{code.co_name} ({code.co_filename.rsplit("/", 1)[-1]}:{frame.f_lineno})')
+            frame = frame.f_back
+        stack = ';'.join(reversed(names))
+        stacks = self._profiles.setdefault(endpoint, Counter())
+        if stack in stacks or len(stacks) < MAX_PROFILE_STACKS:
+            stacks[stack] += 1
+        else:
+            stacks['[其他]'] += 1
+
+    # 折叠栈格式（每行“栈;帧 次数”），可直接交给 flamegraph.pl / speedscope 生成火焰图
+    def collapsed_stacks(self, endpoint=None):
+        with self._lock:
+            lines = [
+                f'{name};{stack} {count}'
+                for name, stacks in self._profiles.items() if endpoint in (None, name)
+                for stack, count in stacks.items()
+            ]
+        return '\n'.join(lines) + '\n'
+
+    # 各端点采样次数最多的叶子帧（自身耗时热点）
+    def profile_hotspots(self, limit=10):
+        result = {}
+        with self._lock:
+            for endpoint, stacks in self._profiles.items():
+                leaves = Counter()
+                for stack, count in stacks.items():
+                    leaves[stack.rsplit(';', 1)[-1]] += count
+                result[endpoint] = (sum(stacks.values()), leaves.most_common(limit))
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._query_duration = Histogram(QUERY_BUCKETS)
+            self._slow_queries.clear()
+            self._profiles.clear()
+            self._profile_samples = 0
+            self._started = time.time()
+
+    # 管理页用的端点汇总，按总耗时降序
+    def endpoint_summary(self):
+        with self._lock:
+            items = list(self._endpoints.items())
+            rows = []
+            for (endpoint, method), stats in items:
+                count = stats.duration.count
+                rows.append({
+                    'endpoint': endpoint,
+                    'method': method,
+                    'count': count,
+                    'total_ms': stats.duration.sum * 1000,
+                    'avg_ms': stats.duration.sum * 1000 / count,
+                    'p50_ms': stats.duration.quantile(0.5) * 1000,
+                    'p95_ms': stats.duration.quantile(0.95) * 1000,
+                    'p99_ms': stats.duration.quantile(0.99) * 1000,
+                    'avg_queries': stats.queries.sum / count,
+                    'avg_query_ms': stats.query_time * 1000 / count,
+                    'errors': sum(n for status, n in stats.statuses.items() if status >= 500)
+                })
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def slow_queries(self):
+        return list(self._slow_queries)
+
+    # Prometheus 文本格式（exposition format 0.0.4）
+    def render_prometheus(self):
+        lines = []
+
+        def histogram(name, help_text, labelled):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for labels, hist in labelled:
+                prefix = ','.join(f'{key}="{_escape(value)}"' for key, value in labels)
+                separator = ',' if prefix else ''
+                for bound, total in hist.cumulative():
+                    le = '+Inf' if bound == float('inf') else repr(float(bound))
+                    lines.append(f'{name}_bucket{{{prefix}{separator}le="{le}"}} {total}')
+                braces = f'{{{prefix}}}' if prefix else ''
+                lines.append(f'{name}_sum{braces} {hist.sum}')
+                lines.append(f'{name}_count{braces} {hist.count}')
+
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            histogram('http_request_duration_seconds', '请求处理耗时',
+                      [((('endpoint', endpoint), ('method', method)), stats.duration)
+                       for (endpoint, method), stats in endpoints])
+            histogram('http_request_sql_queries', '每个请求执行的 SQL 条数',
+                      [((('endpoint', endpoint), ('method', method)), stats.queries)
+                       for (endpoint, method), stats in endpoints])
+
+            lines.append('# HELP http_request_sql_duration_seconds_total 请求内 SQL 执行总耗时')
+            lines.append('# TYPE http_request_sql_duration_seconds_total counter')
+            for (endpoint, method), stats in endpoints:
+                lines.append(f'http_request_sql_duration_seconds_total{{endpoint="{_escape(endpoint)}",'
+                             f'method="{method}"}} {stats.query_time}')
+
+            lines.append('# HELP http_requests_total 请求数（按状态码）')
+            lines.append('# TYPE http_requests_total counter')
+            for (endpoint, method), stats in endpoints:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(f'http_requests_total{{endpoint="{_escape(endpoint)}",method="{method}",'
+                                 f'status="{status}"}} {count}')
+
+            histogram('db_query_duration_seconds', '单条 SQL 执行耗时（含后台线程）', [((), self._query_duration)])
+
+        lines.append('# HELP db_slow_queries_recent 慢查询日志中保留的条数')
+        lines.append('# TYPE db_slow_queries_recent gauge')
+        lines.append(f'db_slow_queries_recent {len(self._slow_queries)}')
+        lines.append('# HELP instrumentation_start_time_seconds 统计起始时间（进程启动或上次清零）')
+        lines.append('# TYPE instrumentation_start_time_seconds gauge')
+        lines.append(f'instrumentation_start_time_seconds {self._started}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+instrumentation = Instrumentation()
@@ -0,0 +1,111 @@
+from flask import current_app, request, url_for
+from sqlalchemy import or_
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+
+# 转义 LIKE 通配符，避免搜索词中的 % 和 _ 被当作模式
+def _like_pattern(term):
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _per_page():
+    default = current_app.config.get('LIST_PER_PAGE', DEFAULT_PER_PAGE)
+    per_page = request.args.get('per_page', default, type=int)
+    return max(1, min(per_page, current_app.config.get('LIST_MAX_PER_PAGE', MAX_PER_PAGE)))
+
+
+def apply_search(query, search_columns, term):
+    if not term or not search_columns:
+        return query
+    pattern = _like_pattern(term)
+    return query.filter(or_(*[column.ilike(pattern, escape='\\') for column in search_columns]))
+
+
+# 列表页状态：当前页数据 + 排序/搜索参数，供模板生成链接
+class Listing:
+    def __init__(self, items, sort=None, order=None, q='', per_page=DEFAULT_PER_PAGE, pagination=None,
+                 next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.sort = sort
+        self.order = order
+        self.q = q
+        self.per_page = per_page
+        self.pagination = pagination
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    @property
+    def is_keyset(self):
+        return self.pagination is None
+
+    # 基于当前请求参数生成链接，overrides 中值为 None 的参数会被移除
+    def url(self, **overrides):
+        args = request.args.to_dict()
+        args.update(overrides)
+        args = {key: value for key, value in args.items() if value not in (None, '')}
+        return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+    def page_url(self, page):
+        return self.url(page=page)
+
+    def sort_url(self, column):
+        order = 'asc' if self.sort == column and self.order == 'desc' else 'desc'
+        return self.url(sort=column, order=order, page=None)
+
+    def older_url(self):
+        return self.url(before=self.next_cursor, after=None)
+
+    def newer_url(self):
+        return self.url(after=self.prev_cursor, before=None)
+
+
+# 偏移分页：page/per_page + 排序列白名单 + SQL 端模糊搜索
+def paginate_listing(query, sort_columns, search_columns=(), default_sort='id', default_order='desc'):
+    q = request.args.get('q', '').strip()
+    sort = request.args.get('sort', default_sort)
+    if sort not in sort_columns:
+        sort = default_sort
+    order = request.args.get('order', default_order)
+    if order not in ('asc', 'desc'):
+        order = default_order
+    per_page = _per_page()
+    page = max(1, request.args.get('page', 1, type=int))
+
+    query = apply_search(query, search_columns, q)
+    column = sort_columns[sort]
+    query = query.order_by(column.desc() if order == 'desc' else column.asc())
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    return Listing(pagination.items, sort=sort, order=order, q=q, per_page=per_page, pagination=pagination)
+
+
+# 游标分页：用于只追加的日志表，按主键倒序，深翻页同样走索引
+def keyset_listing(query, key_column, search_columns=()):
+    q = request.args.get('q', '').strip()
+    per_page = _per_page()
+    before = request.args.get('before', type=int)
+    after = request.args.get('after', type=int)
+
+    query = apply_search(query, search_columns, q)
+    if after is not None:
+        rows = query.filter(key_column > after).order_by(key_column.asc()).limit(per_page + 1).all()
+        has_newer = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_older = True
+    else:
+        if before is not None:
+            query = query.filter(key_column < before)
+        rows = query.order_by(key_column.desc()).limit(per_page + 1).all()
+        has_older = len(rows) > per_page
+        items = rows[:per_page]
+        has_newer = before is not None
+
+    key = key_column.key
+    next_cursor = getattr(items[-1], key) if items and has_older else None
+    prev_cursor = getattr(items[0], key) if items and has_newer else None
+    return Listing(items, q=q, per_page=per_page, next_cursor=next_cursor, prev_cursor=prev_cursor)
@@ -0,0 +1,149 @@
+from datetime import datetime
+
+from sqlalchemy import MetaData, Table, insert, inspect, select, update
+from sqlalchemy.schema import AddConstraint, CreateColumn
+
+import counters
+import hierarchy
+import search
+from extensions import db
+from models import SchemaMigration, StatCounter, SearchPosting, ErrorLog
+
+# 按版本号顺序登记的迁移：(版本号, 描述, 升级函数)
+# 全新数据库由版本 1 直接建出当前完整表结构，因此之后的每个迁移都必须可重复执行（先检查再变更）
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def decorator(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return func
+    return decorator
+
+
+# 按名称补建缺失的索引。每个迁移写死自己负责的索引名，之后在模型里新增的索引不会被旧迁移提前创建
+# （旧迁移执行时新索引依赖的列可能还不存在）；表或列不存在的索引跳过，由添加它们的迁移负责
+def create_missing_indexes(connection, index_names):
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    indexes = {index.name: index for table in db.metadata.tables.values() for index in table.indexes}
+    for name in index_names:
+        index = indexes[name]
+        table_name = index.table.name
+        if table_name not in existing_tables:
+            continue
+        if name in {existing['name'] for existing in inspector.get_indexes(table_name)}:
+            continue
+        columns = {column['name'] for column in inspector.get_columns(table_name)}
+        if not all(column.name in columns for column in index.columns):
+            continue
+        index.create(connection)
+
+
+# 按名称删除已存在的索引（从数据库反射索引定义，不影响模型中的元数据）
+def drop_indexes(connection, table_name, index_names):
+    if not inspect(connection).has_table(table_name):
+        return
+    table = Table(table_name, MetaData(), autoload_with=connection)
+    for index in table.indexes:
+        if index.name in index_names:
+            index.drop(connection)
+
+
+# 为已存在的表补建缺失的列（列需有服务端默认值或允许为空）；SQLite 不支持追加外键约束，只建列
+def create_missing_columns(connection, table_name, column_names):
+    existing = {column['name'] for column in inspect(connection).get_columns(table_name)}
+    table = db.metadata.tables[table_name]
+    for name in column_names:
+        if name in existing:
+            continue
+        column = table.c[name]
+        connection.exec_driver_sql(
+            f'ALTER TABLE {table_name} ADD COLUMN {CreateColumn(column).compile(dialect=connection.dialect)}'
+        )
+        if connection.dialect.name != 'sqlite':
+            for foreign_key in column.foreign_keys:
+                connection.execute(AddConstraint(foreign_key.constraint))
+
+
+@migration(1, '初始表结构')
+def create_initial_schema(connection):
+    db.metadata.create_all(connection)
+
+
+@migration(2, '为公告时间、成员部门和日志表的用户/时间列添加索引')
+def add_lookup_indexes(connection):
+    create_missing_indexes(connection, [
+        'ix_announcements_create_time', 'ix_members_department_id',
+        'ix_login_logs_user_id_login_time', 'ix_login_logs_login_time',
+        'ix_operation_logs_user_id_operation_time', 'ix_operation_logs_operation_time',
+        'ix_error_logs_timestamp'
+    ])
+
+
+@migration(3, '添加总览页统计计数表')
+def add_stat_counters(connection):
+    StatCounter.__table__.create(connection, checkfirst=True)
+    counters.reconcile(connection)
+
+
+@migration(4, '添加成员/公告/评论全文检索倒排索引表')
+def add_search_postings(connection):
+    SearchPosting.__table__.create(connection, checkfirst=True)
+    search.rebuild(connection)
+
+
+@migration(5, '部门组织架构：上级部门、物化路径和子树人数')
+def add_department_hierarchy(connection):
+    create_missing_columns(connection, 'departments', ['parent_id', 'path', 'depth', 'subtree_headcount'])
+    create_missing_indexes(connection, ['ix_departments_parent_id', 'ix_departments_path'])
+    hierarchy.rebuild(connection)
+
+
+@migration(6, '错误日志按指纹合并：指纹、出现次数、首次出现时间和请求地址')
+def add_error_log_fingerprints(connection):
+    create_missing_columns(connection, 'error_logs', ['fingerprint', 'occurrence_count', 'first_seen', 'endpoint'])
+    create_missing_indexes(connection, ['ix_error_logs_fingerprint'])
+    connection.execute(
+        update(ErrorLog).where(ErrorLog.first_seen.is_(None)).values(first_seen=ErrorLog.timestamp)
+    )
+
+
+@migration(7, '全文检索倒排表的按文档索引改为 doc_id 在前，避免检索时误用该索引')
+def reorder_search_posting_index(connection):
+    drop_indexes(connection, 'search_postings', ['ix_search_postings_doc'])
+    create_missing_indexes(connection, ['ix_search_postings_doc_id'])
+
+
+# 执行所有未应用的迁移，返回本次应用的版本号列表（需在应用上下文中调用）
+def upgrade(engine=None):
+    engine = engine or db.engine
+    SchemaMigration.__table__.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        applied = set(connection.execute(select(SchemaMigration.version)).scalars())
+
+    newly_applied = []
+    for version, description, func in MIGRATIONS:
+        if version in applied:
+            continue
+        with engine.begin() as connection:
+            func(connection)
+            connection.execute(insert(SchemaMigration).values(
+                version=version,
+                description=description,
+                applied_time=datetime.utcnow()
+            ))
+        newly_applied.append(version)
+        print(f"已应用迁移 {version}: {description}")
+    return newly_applied
+
+
+# 当前数据库的迁移状态：[(版本号, 描述, 是否已应用)]
+def status(engine=None):
+    engine = engine or db.engine
+    applied = set()
+    if inspect(engine).has_table(SchemaMigration.__tablename__):
+        with engine.connect() as connection:
+            applied = set(connection.execute(select(SchemaMigration.version)).scalars())
+    return [(version, description, version in applied) for version, description, _ in MIGRATIONS]
@@ -5,23 +5,40 @@ from datetime import datetime
 # 部门模型
 class Department(db.Model):
     __tablename__ = 'departments'
+    __table_args__ = (
+        db.Index('ix_departments_parent_id', 'parent_id'),
+        db.Index('ix_departments_path', 'path'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
     manager_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    parent_id = db.Column(db.Integer, db.ForeignKey('departments.id'), nullable=True)
+    # 组织架构物化路径：从根部门到本部门的 id 序列，如 /1/5/12/；子树查询即 path LIKE '/1/5/%'，由 hierarchy 模块维护
+    path = db.Column(db.String(255), nullable=False, default='', server_default='')
+    depth = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # 本部门及全部下级部门的成员总数，成员增删和调动时增量更新
+    subtree_headcount = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     create_time = db.Column(db.DateTime, default=datetime.utcnow)
 
-    # 关系定义
-    manager = db.relationship('User', backref='managed_departments', foreign_keys=[manager_id])
-    members = db.relationship('Member', backref='department', lazy=True)
+    # 关系定义（列表页会逐行显示经理和所属部门，多对一关系统一用 JOIN 预加载）
+    manager = db.relationship('User', backref='managed_departments', foreign_keys=[manager_id], lazy='joined')
+    parent = db.relationship('Department', remote_side=[id], backref='children')
+    members = db.relationship('Member', backref=db.backref('department', lazy='joined'), lazy=True)
 
 
 # 成员模型
 class Member(db.Model):
     __tablename__ = 'members'
+    __table_args__ = (
+        db.Index('ix_members_department_id', 'department_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), nullable=False, unique=True)
-    department_id = db.Column(db.Integer, db.ForeignKey('departments.id'), nullable=False)
+    # 调动部门时需要旧值来增量维护各级部门人数，因此修改前总是加载旧值
+    department_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey('departments.id'), nullable=False), active_history=True
+    )
     position = db.Column(db.String(100))
     create_time = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -35,7 +52,7 @@ class Comment(db.Model):
     create_time = db.Column(db.DateTime, default=datetime.utcnow)
 
     # 关系定义
-    user = db.relationship('User', backref='comments')
+    user = db.relationship('User', backref='comments', lazy='joined')
 
 
 # 用户模型
@@ -48,8 +65,8 @@ class User(db.Model):
     create_time = db.Column(db.DateTime, default=datetime.utcnow)
 
     # 关系定义
-    login_logs = db.relationship('LoginLog', backref='user', lazy=True)
-    operation_logs = db.relationship('OperationLog', backref='user', lazy=True)
+    login_logs = db.relationship('LoginLog', backref=db.backref('user', lazy='joined'), lazy=True)
+    operation_logs = db.relationship('OperationLog', backref=db.backref('user', lazy='joined'), lazy=True)
 
     def set_password(self, password):
         from werkzeug.security import generate_password_hash
@@ -79,6 +96,9 @@ class User(db.Model):
 # 通知公告模型
 class Announcement(db.Model):
     __tablename__ = 'announcements'
+    __table_args__ = (
+        db.Index('ix_announcements_create_time', 'create_time'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
@@ -86,7 +106,7 @@ class Announcement(db.Model):
     create_time = db.Column(db.DateTime, default=datetime.utcnow)
 
     # 关系定义
-    creator = db.relationship('User', backref='announcements')
+    creator = db.relationship('User', backref='announcements', lazy='joined')
 
 # 广告管理模型
 class Ad(db.Model):
@@ -106,6 +126,10 @@ class Ad(db.Model):
 # 登录日志模型
 class LoginLog(db.Model):
     __tablename__ = 'login_logs'
+    __table_args__ = (
+        db.Index('ix_login_logs_user_id_login_time', 'user_id', 'login_time'),
+        db.Index('ix_login_logs_login_time', 'login_time'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     ip_address = db.Column(db.String(50), nullable=False)
@@ -115,6 +139,10 @@ class LoginLog(db.Model):
 # 操作日志模型
 class OperationLog(db.Model):
     __tablename__ = 'operation_logs'
+    __table_args__ = (
+        db.Index('ix_operation_logs_user_id_operation_time', 'user_id', 'operation_time'),
+        db.Index('ix_operation_logs_operation_time', 'operation_time'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     operation_type = db.Column(db.String(100), nullable=False)
@@ -125,10 +153,19 @@ class OperationLog(db.Model):
 # 错误日志模型
 class ErrorLog(db.Model):
     __tablename__ = 'error_logs'
+    __table_args__ = (
+        db.Index('ix_error_logs_timestamp', 'timestamp'),
+        db.Index('ix_error_logs_fingerprint', 'fingerprint', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     error_type = db.Column(db.String(100), nullable=False)
     error_message = db.Column(db.Text, nullable=False)
     stack_trace = db.Column(db.Text)
+    # 相同指纹的异常合并为一行：出现次数累加，timestamp 为最近一次出现时间（日志保留期也按它计算）
+    fingerprint = db.Column(db.String(40))
+    occurrence_count = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    first_seen = db.Column(db.DateTime)
+    endpoint = db.Column(db.String(200))
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
 
@@ -139,3 +176,33 @@ class SystemInfo(db.Model):
     name = db.Column(db.String(100), nullable=False)
     value = db.Column(db.String(255))
     update_time = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# 统计计数器（总览页计数，由增删事件增量维护并定期校准）
+class StatCounter(db.Model):
+    __tablename__ = 'stat_counters'
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    update_time = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# 全文检索倒排索引：每行是一个词项在一篇文档中的加权词频
+class SearchPosting(db.Model):
+    __tablename__ = 'search_postings'
+    # 按文档删除词项用的索引以 doc_id 开头：若以 doc_type 开头，检索时查询规划器（SQLite 无统计信息时）会为了 GROUP BY
+    # 的顺序改走这个索引、扫描该类型的全部词项，而不是按词项走主键
+    __table_args__ = (
+        db.Index('ix_search_postings_doc_id', 'doc_id', 'doc_type'),
+    )
+    term = db.Column(db.String(64), primary_key=True)
+    doc_type = db.Column(db.String(20), primary_key=True)
+    doc_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    weight = db.Column(db.Integer, nullable=False, default=1)
+
+
+# 数据库迁移版本记录
+class SchemaMigration(db.Model):
+    __tablename__ = 'schema_migrations'
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    description = db.Column(db.String(200), nullable=False)
+    applied_time = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,264 @@
+import queue
+import threading
+import time
+from datetime import datetime
+
+# psutil、platform、subprocess 等只在采样线程中用到，延迟到首次采集时再导入，缩短 worker 启动时间
+
+
+# 系统信息采样器：静态信息启动时采集一次，CPU/内存/磁盘和请求速率由后台线程定时刷新
+# 每次采样后推送给所有实时订阅者（仪表盘的 SSE 连接），无论多少人在看，每个周期都只采集一次
+class SystemMetricsSampler:
+    def __init__(self, app=None, interval=5.0, stream_buffer=10, max_streams=2):
+        self.interval = interval
+        self.stream_buffer = stream_buffer
+        self.max_streams = max_streams
+        self._lock = threading.Lock()
+        self._static = None
+        self._dynamic = {'cpu': {}, 'memory': {}, 'disk': {}, 'requests': {}}
+        self._sampled_at = None
+        self._request_total = 0
+        self._rate_mark = (0, time.monotonic())
+        self._subscribers = set()
+        self._thread = None
+        self._stop = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.interval = app.config.get('SYSTEM_METRICS_INTERVAL', self.interval)
+        self.stream_buffer = app.config.get('SYSTEM_METRICS_STREAM_BUFFER', self.stream_buffer)
+        self.max_streams = app.config.get('SYSTEM_METRICS_MAX_STREAMS', self.max_streams)
+        app.extensions['metrics_sampler'] = self
+        app.before_request(self.count_request)
+        if app.config.get('SYSTEM_METRICS_ENABLED', True):
+            self.start()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='system-metrics-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+
+    def _run(self):
+        self._ensure_static()
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def _ensure_static(self):
+        if self._static is None:
+            static = collect_static_info()
+            with self._lock:
+                self._static = static
+        return self._static
+
+    # 请求计数（本进程；多 worker 部署时各 worker 分别统计）
+    def count_request(self):
+        with self._lock:
+            self._request_total += 1
+
+    # 本次采样与上次采样之间的平均请求速率
+    def _request_rate(self):
+        now = time.monotonic()
+        with self._lock:
+            total = self._request_total
+            last_total, last_time = self._rate_mark
+            self._rate_mark = (total, now)
+        elapsed = now - last_time
+        return {'total': total, 'per_second': round((total - last_total) / elapsed, 2) if elapsed > 0 else 0.0}
+
+    # 采集一次动态指标并替换快照，然后推送给订阅者
+    def sample(self):
+        dynamic = collect_dynamic_info()
+        dynamic['requests'] = self._request_rate()
+        with self._lock:
+            self._dynamic = dynamic
+            self._sampled_at = datetime.now()
+            subscribers = list(self._subscribers)
+        metrics = self.live_snapshot()
+        for subscriber in subscribers:
+            _offer(subscriber, metrics)
+        return dynamic
+
+    # 订阅实时指标：返回有界队列，订阅数已达上限时返回 None
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self.stream_buffer)
+        with self._lock:
+            if len(self._subscribers) >= self.max_streams:
+                return None
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    # 逐条取出订阅到的指标，空闲超过 heartbeat 秒时产出 None（用于保活），duration 秒后结束
+    def listen(self, subscriber, duration, heartbeat=15.0):
+        deadline = time.monotonic() + duration
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                yield subscriber.get(timeout=min(heartbeat, remaining))
+            except queue.Empty:
+                yield None
+
+    # 实时推送用的精简快照：只含动态指标
+    def live_snapshot(self):
+        with self._lock:
+            dynamic = self._dynamic
+            sampled_at = self._sampled_at
+        metrics = {key: dict(value) for key, value in dynamic.items()}
+        metrics['sampled_at'] = sampled_at.strftime('%Y-%m-%d %H:%M:%S') if sampled_at else None
+        return metrics
+
+    # 读取快照（请求路径上只读内存，不产生子进程）
+    def snapshot(self):
+        with self._lock:
+            static = self._static
+            dynamic = self._dynamic
+            sampled_at = self._sampled_at
+        if static is None:
+            static = {'system': {}, 'cpu': {}, 'memory': {}, 'software': {}}
+
+        system = dict(static['system'])
+        system['current_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        system['sampled_at'] = sampled_at.strftime('%Y-%m-%d %H:%M:%S') if sampled_at else None
+        memory = dict(static['memory'])
+        memory.update(dynamic['memory'])
+        cpu = dict(static['cpu'])
+        cpu.update(dynamic['cpu'])
+        return {
+            'system': system,
+            'cpu': cpu,
+            'memory': memory,
+            'disk': dict(dynamic['disk']),
+            'requests': dict(dynamic['requests']),
+            'software': dict(static['software'])
+        }
+
+
+# 向订阅者的有界队列放入一条指标；队列满（客户端读得慢）时丢弃最旧的一条，不阻塞采样线程
+def _offer(subscriber, metrics):
+    try:
+        subscriber.put_nowait(metrics)
+    except queue.Full:
+        try:
+            subscriber.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            subscriber.put_nowait(metrics)
+        except queue.Full:
+            pass
+
+
+def _command_version(args):
+    import subprocess
+    try:
+        return subprocess.check_output(args, stderr=subprocess.STDOUT, timeout=5).decode('utf-8').strip()
+    except Exception:
+        return '未安装'
+
+
+def _package_version(name):
+    from importlib import metadata
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return '未安装'
+
+
+# 静态信息：操作系统、核数、总内存、软件版本（只采集一次）
+def collect_static_info():
+    import platform
+    import psutil
+
+    system = {
+        'system_name': '公司部门管理系统',
+        'version': '1.0.0',
+        'os': platform.system(),
+        'system_platform': platform.platform(),
+        'hostname': platform.node(),
+        'ip_address': '127.0.0.1',
+        'python_version': platform.python_version()
+    }
+
+    try:
+        cpu = {
+            'cpu_count': psutil.cpu_count(logical=False),
+            'cpu_count_logical': psutil.cpu_count(logical=True)
+        }
+    except Exception as e:
+        print(f"获取CPU信息失败: {e}")
+        cpu = {}
+
+    try:
+        memory = {'total_memory': round(psutil.virtual_memory().total / (1024 ** 3), 2)}
+    except Exception as e:
+        print(f"获取内存信息失败: {e}")
+        memory = {}
+
+    software = {
+        'mysql_version': _command_version(['mysql', '--version']),
+        'nginx_version': _command_version(['nginx', '-v']),
+        'flask_version': _package_version('flask'),
+        'sqlalchemy_version': _package_version('sqlalchemy')
+    }
+
+    return {'system': system, 'cpu': cpu, 'memory': memory, 'software': software}
+
+
+# 动态信息：CPU 使用率/频率、可用内存、磁盘占用
+def collect_dynamic_info():
+    import psutil
+
+    try:
+        cpu = {'cpu_percent': psutil.cpu_percent()}
+        freq = psutil.cpu_freq() if hasattr(psutil, 'cpu_freq') else None
+        if freq:
+            cpu['cpu_freq'] = freq.current
+    except Exception as e:
+        print(f"获取CPU信息失败: {e}")
+        cpu = {}
+
+    try:
+        mem = psutil.virtual_memory()
+        memory = {
+            'available_memory': round(mem.available / (1024 ** 3), 2),
+            'memory_percent': mem.percent
+        }
+    except Exception as e:
+        print(f"获取内存信息失败: {e}")
+        memory = {}
+
+    try:
+        disk = psutil.disk_usage('/')
+        disk_info = {
+            'total_disk': round(disk.total / (1024 ** 3), 2),
+            'used_disk': round(disk.used / (1024 ** 3), 2),
+            'free_disk': round(disk.free / (1024 ** 3), 2),
+            'disk_percent': disk.percent
+        }
+    except Exception as e:
+        print(f"获取磁盘信息失败: {e}")
+        disk_info = {}
+
+    return {'cpu': cpu, 'memory': memory, 'disk': disk_info}
+
+
+metrics_sampler = SystemMetricsSampler()
+
+
+# 获取系统信息函数（读取采样器快照）
+def get_system_info():
+    return metrics_sampler.snapshot()
@@ -0,0 +1,50 @@
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# SQL 语句计数器：只统计当前线程执行的语句，避免后台线程（采样器等）干扰结果
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+        self._thread_id = threading.get_ident()
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self._thread_id:
+            self.statements.append(statement)
+
+
+@contextmanager
+def count_queries():
+    counter = QueryCounter()
+    event.listen(Engine, 'before_cursor_execute', counter._before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(Engine, 'before_cursor_execute', counter._before_cursor_execute)
+
+
+# 断言代码块执行的 SQL 条数恰好为 expected，用于固定每个列表页的查询次数（与行数无关）
+@contextmanager
+def assert_num_queries(expected):
+    with count_queries() as counter:
+        yield counter
+    if counter.count != expected:
+        statements = '\n'.join(f'  {i + 1}. {sql}' for i, sql in enumerate(counter.statements))
+        raise AssertionError(f'预期执行 {expected} 条 SQL，实际执行 {counter.count} 条:\n{statements}')
+
+
+# 断言 SQL 条数不超过上限
+@contextmanager
+def assert_max_queries(limit):
+    with count_queries() as counter:
+        yield counter
+    if counter.count > limit:
+        statements = '\n'.join(f'  {i + 1}. {sql}' for i, sql in enumerate(counter.statements))
+        raise AssertionError(f'预期最多执行 {limit} 条 SQL，实际执行 {counter.count} 条:\n{statements}')
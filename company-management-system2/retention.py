@@ -0,0 +1,131 @@
+import gzip
+import json
+import os
+import re
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, select
+
+from models import db, LoginLog, OperationLog, ErrorLog
+
+# 各日志表默认保留天数，可通过 LOG_RETENTION_DAYS 配置覆盖
+DEFAULT_RETENTION_DAYS = {
+    'login_logs': 180,
+    'operation_logs': 365,
+    'error_logs': 90
+}
+DEFAULT_BATCH_SIZE = 5000
+
+# 表名 -> (模型, 时间列)
+RETAINED_LOGS = {
+    'login_logs': (LoginLog, LoginLog.login_time),
+    'operation_logs': (OperationLog, OperationLog.operation_time),
+    'error_logs': (ErrorLog, ErrorLog.timestamp)
+}
+
+MONTH_PATTERN = re.compile(r'^\d{4}-\d{2}$')
+
+
+def archive_dir():
+    return current_app.config.get('LOG_ARCHIVE_DIR') or os.path.join(current_app.root_path, 'archive')
+
+
+def retention_days(table_name):
+    configured = current_app.config.get('LOG_RETENTION_DAYS') or {}
+    return configured.get(table_name, DEFAULT_RETENTION_DAYS[table_name])
+
+
+def _archive_path(table_name, month):
+    return os.path.join(archive_dir(), table_name, f'{month}.jsonl.gz')
+
+
+def _serialize(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+# 把一批行按月份追加写入压缩归档文件（gzip 追加会生成多段成员，gzip.open 可连续读取）
+def _write_archive(table_name, time_key, rows):
+    by_month = {}
+    for row in rows:
+        timestamp = row[time_key]
+        month = timestamp.strftime('%Y-%m') if timestamp else 'unknown'
+        by_month.setdefault(month, []).append(row)
+
+    for month, month_rows in by_month.items():
+        path = _archive_path(table_name, month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(path, 'at', encoding='utf-8') as archive:
+            for row in month_rows:
+                archive.write(json.dumps({key: _serialize(value) for key, value in row.items()},
+                                         ensure_ascii=False))
+                archive.write('\n')
+
+
+# 归档并删除一张日志表中超过保留期的行：每批一个短事务，先写归档再按主键删除
+def archive_expired(table_name, now=None, batch_size=DEFAULT_BATCH_SIZE):
+    model, time_column = RETAINED_LOGS[table_name]
+    days = retention_days(table_name)
+    if days is None:
+        return 0
+    cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+    columns = list(model.__table__.columns)
+    id_column = model.__table__.c.id
+
+    archived = 0
+    while True:
+        rows = db.session.execute(
+            select(*columns)
+            .where(time_column < cutoff)
+            .order_by(time_column, id_column)
+            .limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            break
+
+        _write_archive(table_name, time_column.key, [dict(row) for row in rows])
+        db.session.execute(delete(model.__table__).where(id_column.in_([row['id'] for row in rows])))
+        db.session.commit()
+        archived += len(rows)
+        if len(rows) < batch_size:
+            break
+    return archived
+
+
+def archive_all(now=None, batch_size=DEFAULT_BATCH_SIZE):
+    return {table_name: archive_expired(table_name, now, batch_size) for table_name in RETAINED_LOGS}
+
+
+# 某张表已有的归档月份（倒序）
+def list_archive_months(table_name):
+    directory = os.path.join(archive_dir(), table_name)
+    if not os.path.isdir(directory):
+        return []
+    months = [name[:-len('.jsonl.gz')] for name in os.listdir(directory) if name.endswith('.jsonl.gz')]
+    return sorted(months, reverse=True)
+
+
+# 顺序扫描某月归档文件，按关键字过滤并分页；返回 (当前页记录, 是否还有下一页)
+def read_archive(table_name, month, q='', page=1, per_page=50):
+    if not MONTH_PATTERN.match(month or ''):
+        return [], False
+    path = _archive_path(table_name, month)
+    if not os.path.exists(path):
+        return [], False
+
+    q = (q or '').lower()
+    skip = (page - 1) * per_page
+    items = []
+    with gzip.open(path, 'rt', encoding='utf-8') as archive:
+        for line in archive:
+            if q and q not in line.lower():
+                continue
+            if skip:
+                skip -= 1
+                continue
+            if len(items) == per_page:
+                return items, True
+            items.append(json.loads(line))
+    return items, False
@@ -1,14 +1,23 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
+from flask import Blueprint, Response, current_app, render_template, request, jsonify, redirect, url_for, flash, abort
 from flask_login import login_required, current_user
 from werkzeug.security import generate_password_hash
 from datetime import datetime
-import psutil
-import socket
-import platform
-import subprocess
-import importlib.util
-import os
-from models import Department
+import json
+import time
+from monitor import get_system_info, metrics_sampler
+from instrumentation import instrumentation
+from errorlog import error_recorder
+from listing import paginate_listing, keyset_listing
+from audit import audit_writer
+import bulkio
+import retention
+import counters
+import hierarchy
+import search
+from cache import fragment_cache
+from identity import identity_cache
+import api
+from markupsafe import Markup
 # 导入模型
 from models import (
     db, Department, Member, Comment, User, Announcement, Ad,
@@ -24,81 +33,32 @@ user_bp = Blueprint('user', __name__, url_prefix='/users')
 operation_bp = Blueprint('operation', __name__, url_prefix='/operations')
 log_bp = Blueprint('log', __name__, url_prefix='/logs')
 system_bp = Blueprint('system', __name__, url_prefix='/system')
+search_bp = Blueprint('search', __name__, url_prefix='/search')
 
+# 缓存命名空间及其依赖的表（表写入提交后自动失效）
+CACHE_NAMESPACES = {
+    'announcements': ['announcements', 'users'],
+    'department_options': ['departments'],
+    'user_options': ['users'],
+    'search': ['members', 'announcements', 'comments']
+}
 
-# 获取系统信息函数
-def get_system_info():
-    system = {
-        'system_name': '公司部门管理系统',
-        'version': '1.0.0',
-        'os': platform.system(),
-        'system_platform': platform.platform(),
-        'hostname': platform.node(),
-        'ip_address': '127.0.0.1',  # 可根据实际情况获取
-        'current_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'python_version': platform.python_version()
-    }
-    cpu = {
-        'cpu_count': psutil.cpu_count(logical=False),
-        'cpu_count_logical': psutil.cpu_count(logical=True),
-        'cpu_freq': psutil.cpu_freq().current,
-        'cpu_percent': psutil.cpu_percent()
-    }
-    memory = {
-        'total_memory': round(psutil.virtual_memory().total / (1024 ** 3), 2),
-        'available_memory': round(psutil.virtual_memory().available / (1024 ** 3), 2),
-        'memory_percent': psutil.virtual_memory().percent
-    }
-    disk = {
-        'total_disk': round(psutil.disk_usage('/').total / (1024 ** 3), 2),
-        'used_disk': round(psutil.disk_usage('/').used / (1024 ** 3), 2),
-        'free_disk': round(psutil.disk_usage('/').free / (1024 ** 3), 2),
-        'disk_percent': psutil.disk_usage('/').percent
-    }
-    try:
-        mysql_version = subprocess.check_output(['mysql', '--version']).decode('utf-8').strip()
-    except Exception:
-        mysql_version = '未安装'
-    try:
-        nginx_version = subprocess.check_output(['nginx', '-v'], stderr=subprocess.STDOUT).decode('utf-8').strip()
-    except Exception:
-        nginx_version = '未安装'
-    flask_version = importlib.util.find_spec('flask').loader.load_module().__version__
-    sqlalchemy_version = importlib.util.find_spec('sqlalchemy').loader.load_module().__version__
-
-    return {
-        'system': system,
-        'cpu': cpu,
-        'memory': memory,
-        'disk': disk,
-        'mysql_version': mysql_version,
-        'nginx_version': nginx_version,
-        'flask_version': flask_version,
-        'sqlalchemy_version': sqlalchemy_version
-    }
-
-
-# 记录操作日志函数
+
+# 记录操作日志函数（交给审计写入器异步批量落库，不占用请求的事务）
 def log_operation(content):
-    operation_log = OperationLog(
-        user_id=current_user.id,
-        operation_type='system',
-        operation_content=content,
-        operation_time=datetime.utcnow()
-    )
-    db.session.add(operation_log)
-    db.session.commit()
+    audit_writer.record_operation(current_user.id, content)
 
 
 # 主路由 - 总览页面
 @main_bp.route('/')
 @login_required
 def index():
-    # 统计信息
-    department_count = Department.query.count()
-    member_count = Member.query.count()
-    user_count = User.query.count()
-    announcement_count = Announcement.query.count()
+    # 统计信息（读取增量维护的计数表，一次查询）
+    counts = counters.get_counts()
+    department_count = counts['departments']
+    member_count = counts['members']
+    user_count = counts['users']
+    announcement_count = counts['announcements']
 
     # 最新公告
     latest_announcements = Announcement.query.order_by(Announcement.create_time.desc()).limit(5).all()
@@ -119,20 +79,29 @@ def index():
 @department_bp.route('/')
 @login_required
 def list_departments():
-    departments = Department.query.all()
-    return render_template('departments.html', departments=departments)
+    # 表格行由页面脚本通过 /api/v1/departments 加载，这里只渲染页面框架和经理、上级部门下拉选项
+    users = fragment_cache.get_or_set('user_options', 'all', lambda: [
+        {'id': user_id, 'username': username}
+        for user_id, username in db.session.query(User.id, User.username).order_by(User.username)
+    ])
+    return render_template('departments.html', users=users, departments=department_options())
 
 @department_bp.route('/add', methods=['POST'])
 @login_required
 def add_department():
     name = request.form.get('name')
     manager_id = request.form.get('manager_id') or None
+    parent_id = request.form.get('parent_id') or None
 
     if not name:
         flash('部门名称不能为空', 'error')
         return redirect(url_for('department.list_departments'))
 
-    department = Department(name=name, manager_id=manager_id)
+    if parent_id and db.session.get(Department, parent_id) is None:
+        flash('上级部门不存在', 'error')
+        return redirect(url_for('department.list_departments'))
+
+    department = Department(name=name, manager_id=manager_id, parent_id=parent_id)
     db.session.add(department)
     try:
         db.session.commit()
@@ -141,6 +110,7 @@ def add_department():
         flash('部门创建成功', 'success')
     except Exception as e:
         db.session.rollback()
+        error_recorder.capture(e)
         flash(f'部门创建失败: {str(e)}', 'error')
 
     return redirect(url_for('department.list_departments'))
@@ -150,11 +120,15 @@ def add_department():
 def delete_department(id):
     department = Department.query.get_or_404(id)
 
-    # 检查是否有成员
-    if department.members:
+    # 检查是否有成员（只探测是否存在，不加载整个成员集合）
+    if db.session.query(Member.query.filter_by(department_id=id).exists()).scalar():
         flash('该部门下有成员，无法删除', 'error')
         return redirect(url_for('department.list_departments'))
 
+    if db.session.query(Department.query.filter_by(parent_id=id).exists()).scalar():
+        flash('该部门下有下级部门，无法删除', 'error')
+        return redirect(url_for('department.list_departments'))
+
     try:
         db.session.delete(department)
         db.session.commit()
@@ -163,10 +137,44 @@ def delete_department(id):
         flash('部门删除成功', 'success')
     except Exception as e:
         db.session.rollback()
+        error_recorder.capture(e)
         flash(f'部门删除失败: {str(e)}', 'error')
 
     return redirect(url_for('department.list_departments'))
 
+# 批量导入部门
+@department_bp.route('/import', methods=['POST'])
+@login_required
+def import_departments():
+    file = request.files.get('file')
+    if not file or not file.filename:
+        flash('请选择要导入的文件', 'error')
+        return redirect(url_for('department.list_departments'))
+
+    try:
+        report = bulkio.import_departments(file)
+        db.session.commit()
+    except bulkio.BulkImportError as e:
+        db.session.rollback()
+        flash(str(e), 'error')
+        return redirect(url_for('department.list_departments'))
+    except Exception as e:
+        db.session.rollback()
+        error_recorder.capture(e)
+        flash(f'部门导入失败: {str(e)}', 'error')
+        return redirect(url_for('department.list_departments'))
+
+    log_operation(f"批量导入部门: 成功 {report.inserted} 条，失败 {len(report.errors)} 条")
+    return render_template('import_report.html', report=report,
+                           back_url=url_for('department.list_departments'))
+
+
+# 流式导出部门
+@department_bp.route('/export')
+@login_required
+def export_departments():
+    return bulkio.export_departments()
+
 # 添加编辑部门路由
 @department_bp.route('/edit/<int:id>', methods=['POST'])
 @login_required
@@ -174,13 +182,25 @@ def edit_department(id):
     department = Department.query.get_or_404(id)
     name = request.form.get('name')
     manager_id = request.form.get('manager_id') or None
+    parent_id = request.form.get('parent_id') or None
 
     if not name:
         flash('部门名称不能为空', 'error')
         return redirect(url_for('department.list_departments'))
 
+    # 修改上级部门会把整个分支（含下级部门和人数）一起移动
+    parent = db.session.get(Department, parent_id) if parent_id else None
+    try:
+        if parent_id and parent is None:
+            raise hierarchy.HierarchyError('上级部门不存在')
+        hierarchy.check_parent(department, parent)
+    except hierarchy.HierarchyError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('department.list_departments'))
+
     department.name = name
     department.manager_id = manager_id
+    department.parent_id = parent.id if parent else None
 
     try:
         db.session.commit()
@@ -189,18 +209,27 @@ def edit_department(id):
         flash('部门编辑成功', 'success')
     except Exception as e:
         db.session.rollback()
+        error_recorder.capture(e)
         flash(f'部门编辑失败: {str(e)}', 'error')
 
     return redirect(url_for('department.list_departments'))
 
 
+# 部门下拉选项（按组织架构顺序排列，name 带层级缩进）
+def department_options():
+    return fragment_cache.get_or_set('department_options', 'all', lambda: [
+        {'id': department_id, 'name': '\u3000' * depth + name}
+        for department_id, name, depth in db.session.query(
+            Department.id, Department.name, Department.depth).order_by(Department.path)
+    ])
+
+
 # 成员管理路由
 @member_bp.route('/')
 @login_required
 def list_members():
-    members = Member.query.all()
-    departments = Department.query.all()
-    return render_template('members.html', members=members, departments=departments)
+    # 表格行由页面脚本通过 /api/v1/members 加载，这里只渲染页面框架和部门下拉选项
+    return render_template('members.html', departments=department_options())
 
 @member_bp.route('/add', methods=['POST'])
 @login_required
@@ -233,6 +262,7 @@ def add_member():
         flash('成员添加成功', 'success')
     except Exception as e:
         db.session.rollback()
+        error_recorder.capture(e)
         flash(f'成员添加失败: {str(e)}', 'error')
 
     return redirect(url_for('member.list_members'))
@@ -248,10 +278,44 @@ def delete_member(id):
         flash('成员删除成功', 'success')
     except Exception as e:
         db.session.rollback()
+        error_recorder.capture(e)
         flash(f'成员删除失败: {str(e)}', 'error')
 
     return redirect(url_for('member.list_members'))
 
+# 批量导入成员
+@member_bp.route('/import', methods=['POST'])
+@login_required
+def import_members():
+    file = request.files.get('file')
+    if not file or not file.filename:
+        flash('请选择要导入的文件', 'error')
+        return redirect(url_for('member.list_members'))
+
+    try:
+        report = bulkio.import_members(file)
+        db.session.commit()
+    except bulkio.BulkImportError as e:
+        db.session.rollback()
+        flash(str(e), 'error')
+        return redirect(url_for('member.list_members'))
+    except Exception as e:
+        db.session.rollback()
+        error_recorder.capture(e)
+        flash(f'成员导入失败: {str(e)}', 'error')
+        return redirect(url_for('member.list_members'))
+
+    log_operation(f"批量导入成员: 成功 {report.inserted} 条，失败 {len(report.errors)} 条")
+    return render_template('import_report.html', report=report,
+                           back_url=url_for('member.list_members'))
+
+
+# 流式导出成员
+@member_bp.route('/export')
+@login_required
+def export_members():
+    return bulkio.export_members()
+
 # 添加编辑成员路由
 @member_bp.route('/edit/<int:id>', methods=['POST'])
 @login_required
@@ -285,6 +349,7 @@ def edit_member(id):
         flash('成员信息更新成功', 'success')
     except Exception as e:
         db.session.rollback()
+        error_recorder.capture(e)
         flash(f'更新失败: {str(e)}', 'error')
 
     return redirect(url_for('member.list_members'))
@@ -294,7 +359,11 @@ def edit_member(id):
 @comment_bp.route('/')
 @login_required
 def list_comments():
-    comments = Comment.query.all()
+    comments = paginate_listing(
+        Comment.query,
+        sort_columns={'id': Comment.id, 'create_time': Comment.create_time},
+        search_columns=(Comment.content,)
+    )
     return render_template('comments.html', comments=comments)
 
 
@@ -310,6 +379,7 @@ def delete_comment(id):
         flash('评论删除成功', 'success')
     except Exception as e:
         db.session.rollback()
+        error_recorder.capture(e)
         flash(f'评论删除失败: {str(e)}', 'error')
 
     return redirect(url_for('comment.list_comments'))
@@ -319,7 +389,11 @@ def delete_comment(id):
 @user_bp.route('/')
 @login_required
 def list_users():
-    users = User.query.all()
+    users = paginate_listing(
+        User.query,
+        sort_columns={'id': User.id, 'username': User.username, 'role': User.role, 'create_time': User.create_time},
+        search_columns=(User.username,)
+    )
     return render_template('users.html', users=users)
 
 @user_bp.route('/add', methods=['POST'])
@@ -343,6 +417,7 @@ def add_user():
         flash('用户添加成功', 'success')
     except Exception as e:
         db.session.rollback()
+        error_recorder.capture(e)
         flash(f'用户添加失败: {str(e)}', 'error')
 
     return redirect(url_for('user.list_users'))
@@ -367,10 +442,12 @@ def edit_user(id):
 
     try:
         db.session.commit()
+        identity_cache.invalidate(id)
         log_operation(f"编辑用户: {username}")
         flash('用户信息更新成功', 'success')
     except Exception as e:
         db.session.rollback()
+        error_recorder.capture(e)
         flash(f'用户信息更新失败: {str(e)}', 'error')
 
     return redirect(url_for('user.list_users'))
@@ -387,10 +464,12 @@ def delete_user(id):
     try:
         db.session.delete(user)
         db.session.commit()
+        identity_cache.invalidate(id)
         log_operation(f"删除用户: {user.username}")
         flash('用户删除成功', 'success')
     except Exception as e:
         db.session.rollback()
+        error_recorder.capture(e)
         flash(f'用户删除失败: {str(e)}', 'error')
 
     return redirect(url_for('user.list_users'))
@@ -402,8 +481,17 @@ def delete_user(id):
 @operation_bp.route('/announcements')
 @login_required
 def list_announcements():
-    announcements = Announcement.query.order_by(Announcement.create_time.desc()).all()
-    return render_template('announcements.html', announcements=announcements)
+    def render_list():
+        announcements = paginate_listing(
+            Announcement.query,
+            sort_columns={'create_time': Announcement.create_time, 'title': Announcement.title},
+            search_columns=(Announcement.title, Announcement.content),
+            default_sort='create_time'
+        )
+        return render_template('_announcements_list.html', announcements=announcements)
+
+    list_html = fragment_cache.get_or_set('announcements', request.full_path, render_list)
+    return render_template('announcements.html', table_html=Markup(list_html))
 
 
 # 添加公告
@@ -431,6 +519,7 @@ def add_announcement():
         flash('公告添加成功', 'success')
     except Exception as e:
         db.session.rollback()
+        error_recorder.capture(e)
         flash(f'公告添加失败: {str(e)}', 'error')
 
     return redirect(url_for('operation.list_announcements'))
@@ -458,6 +547,7 @@ def edit_announcement(id):
         flash('公告编辑成功', 'success')
     except Exception as e:
         db.session.rollback()
+        error_recorder.capture(e)
         flash(f'公告编辑失败: {str(e)}', 'error')
 
     return redirect(url_for('operation.list_announcements'))
@@ -476,6 +566,7 @@ def delete_announcement(id):
         flash('公告删除成功', 'success')
     except Exception as e:
         db.session.rollback()
+        error_recorder.capture(e)
         flash(f'公告删除失败: {str(e)}', 'error')
 
     return redirect(url_for('operation.list_announcements'))
@@ -484,19 +575,189 @@ def delete_announcement(id):
 @log_bp.route('/login_logs')
 @login_required
 def list_login_logs():
-    login_logs = LoginLog.query.all()
-    return render_template('LoginLog.html', login_logs=login_logs)
+    login_logs = keyset_listing(LoginLog.query, LoginLog.id, search_columns=(LoginLog.ip_address,))
+    return render_template('loginlog.html', login_logs=login_logs)
 
 # 操作日志管理路由
 @log_bp.route('/operation_logs')
 @login_required
 def list_operation_logs():
-    operation_logs = OperationLog.query.all()
-    return render_template('OperationLog.html', operation_logs=operation_logs)
+    operation_logs = keyset_listing(
+        OperationLog.query, OperationLog.id,
+        search_columns=(OperationLog.operation_type, OperationLog.operation_content)
+    )
+    return render_template('operationlog.html', operation_logs=operation_logs)
 
 
 @log_bp.route('/list_error_logs')
 @login_required
 def list_error_logs():
-    error_logs = ErrorLog.query.all()
-    return render_template('ErrorLog.html', error_logs=error_logs)
\ No newline at end of file
+    error_logs = keyset_listing(
+        ErrorLog.query, ErrorLog.id,
+        search_columns=(ErrorLog.error_type, ErrorLog.error_message)
+    )
+    return render_template('errorlog.html', error_logs=error_logs)
+
+
+# 日志归档查询：已过保留期的日志不在在线表中，按月份从归档文件读取
+ARCHIVE_COLUMNS = {
+    'login_logs': ('登录日志', [('id', 'ID'), ('user', '用户名'), ('ip_address', 'IP 地址'), ('login_time', '登录时间')]),
+    'operation_logs': ('操作日志', [('id', 'ID'), ('user', '用户名'), ('operation_type', '操作类型'),
+                                   ('operation_content', '操作内容'), ('operation_time', '操作时间')]),
+    'error_logs': ('错误日志', [('id', 'ID'), ('error_type', '错误类型'), ('error_message', '错误信息'),
+                               ('occurrence_count', '出现次数'), ('first_seen', '首次出现'),
+                               ('timestamp', '最近出现')])
+}
+
+
+@log_bp.route('/archive/<table_name>')
+@login_required
+def list_archived_logs(table_name):
+    if table_name not in ARCHIVE_COLUMNS:
+        abort(404)
+    title, columns = ARCHIVE_COLUMNS[table_name]
+    months = retention.list_archive_months(table_name)
+    month = request.args.get('month') or (months[0] if months else '')
+    q = request.args.get('q', '').strip()
+    page = max(1, request.args.get('page', 1, type=int))
+
+    records, has_next = retention.read_archive(table_name, month, q=q, page=page)
+    user_ids = {record['user_id'] for record in records if record.get('user_id')}
+    usernames = {}
+    if user_ids:
+        usernames = dict(db.session.query(User.id, User.username).filter(User.id.in_(user_ids)).all())
+    for record in records:
+        record['user'] = usernames.get(record.get('user_id'), '未知用户')
+
+    return render_template('log_archive.html', table_name=table_name, title=title, columns=columns,
+                           months=months, month=month, q=q, page=page, has_next=has_next, records=records,
+                           retention_days=retention.retention_days(table_name))
+
+
+# 缓存命中统计
+@system_bp.route('/cache')
+@login_required
+def cache_stats():
+    return jsonify(fragment_cache.stats())
+
+
+# 实时系统指标（Server-Sent Events）：连接后立即推送当前快照，之后每个采样周期推送一次
+# 每条连接占用一个 worker 线程，因此按线程数限制连接数（SYSTEM_METRICS_MAX_STREAMS），超出返回 503；
+# 并在 SYSTEM_METRICS_STREAM_DURATION 秒后断开由浏览器自动重连
+@system_bp.route('/metrics/stream')
+@login_required
+def stream_metrics():
+    subscriber = metrics_sampler.subscribe()
+    if subscriber is None:
+        abort(503, description='实时监控连接数已达上限')
+    duration = current_app.config.get('SYSTEM_METRICS_STREAM_DURATION', 300)
+
+    def generate():
+        yield f'retry: 3000\nevent: metrics\ndata: {json.dumps(metrics_sampler.live_snapshot())}\n\n'
+        for metrics in metrics_sampler.listen(subscriber, duration):
+            if metrics is None:
+                yield ': keepalive\n\n'
+            else:
+                yield f'event: metrics\ndata: {json.dumps(metrics)}\n\n'
+
+    response = Response(generate(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(lambda: metrics_sampler.unsubscribe(subscriber))
+    return response
+
+
+def require_admin():
+    if current_user.role != 'admin':
+        abort(403)
+
+
+# Prometheus 指标：已登录用户可直接查看；抓取程序用 Authorization: Bearer <METRICS_TOKEN>
+@system_bp.route('/metrics')
+def prometheus_metrics():
+    token = current_app.config.get('METRICS_TOKEN')
+    authorized = current_user.is_authenticated or (
+        token and request.headers.get('Authorization') == f'Bearer {token}'
+    )
+    if not authorized:
+        abort(401)
+    return Response(instrumentation.render_prometheus() + error_recorder.render_prometheus()
+                    + audit_writer.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+# 性能分析管理页：各端点耗时分位数和 SQL 统计、慢查询日志、采样分析器热点
+@system_bp.route('/instrumentation')
+@login_required
+def instrumentation_dashboard():
+    require_admin()
+    return render_template('instrumentation.html',
+                           endpoints=instrumentation.endpoint_summary(),
+                           slow_queries=instrumentation.slow_queries(),
+                           slow_query_threshold_ms=instrumentation.slow_query_threshold * 1000,
+                           profiler_running=instrumentation.profiler_running,
+                           hotspots=instrumentation.profile_hotspots())
+
+
+@system_bp.route('/instrumentation/profiler', methods=['POST'])
+@login_required
+def toggle_profiler():
+    require_admin()
+    if request.form.get('action') == 'start':
+        instrumentation.start_profiler()
+        flash('采样分析器已开启', 'success')
+    else:
+        instrumentation.stop_profiler()
+        flash('采样分析器已关闭', 'success')
+    return redirect(url_for('system.instrumentation_dashboard'))
+
+
+@system_bp.route('/instrumentation/reset', methods=['POST'])
+@login_required
+def reset_instrumentation():
+    require_admin()
+    instrumentation.reset()
+    flash('性能统计已清零', 'success')
+    return redirect(url_for('system.instrumentation_dashboard'))
+
+
+# 下载折叠栈文件，用 flamegraph.pl 或 speedscope 生成火焰图
+@system_bp.route('/instrumentation/profile.txt')
+@login_required
+def download_profile():
+    require_admin()
+    return Response(instrumentation.collapsed_stacks(request.args.get('view')), mimetype='text/plain',
+                    headers={'Content-Disposition': 'attachment; filename=profile.txt'})
+
+
+# 全文检索接口：/search/?q=关键字&types=member,announcement,comment&limit=10
+@search_bp.route('/')
+@login_required
+def search_documents():
+    q = request.args.get('q', '')
+    types = [doc_type for doc_type in request.args.get('types', '').split(',') if doc_type] or None
+    limit = request.args.get('limit', search.DEFAULT_LIMIT, type=int)
+    started = time.perf_counter()
+    results = fragment_cache.get_or_set(
+        'search', f'{q}|{",".join(types or [])}|{limit}', lambda: search.search(q, types, limit)
+    ) if q.strip() else []
+    return jsonify({
+        'query': q,
+        'results': results,
+        'took_ms': round((time.perf_counter() - started) * 1000, 2)
+    })
+
+
+# 注册全部蓝图及其缓存命名空间（由应用工厂调用，导入本模块本身不产生副作用）
+def register_blueprints(app):
+    for namespace, tables in {**CACHE_NAMESPACES, **api.CACHE_NAMESPACES}.items():
+        fragment_cache.register(namespace, tables)
+
+    app.register_blueprint(user_bp, url_prefix='/users')
+    app.register_blueprint(main_bp, url_prefix='/')
+    app.register_blueprint(department_bp, url_prefix='/departments')
+    app.register_blueprint(member_bp, url_prefix='/members')
+    app.register_blueprint(comment_bp, url_prefix='/comments')
+    app.register_blueprint(operation_bp, url_prefix='/operations')
+    app.register_blueprint(log_bp, url_prefix='/logs')
+    app.register_blueprint(system_bp, url_prefix='/system')
+    app.register_blueprint(search_bp, url_prefix='/search')
+    app.register_blueprint(api.api_bp)
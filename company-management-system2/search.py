@@ -0,0 +1,281 @@
+import math
+import operator
+import re
+from collections import Counter
+from functools import reduce
+
+from sqlalchemy import and_, case, delete, event, func, insert, inspect, or_, select
+from sqlalchemy.orm import Session, object_session
+
+import counters
+from models import db, Member, Announcement, Comment, SearchPosting
+
+TERM_MAX_LENGTH = 64
+MAX_QUERY_TERMS = 8
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+REBUILD_BATCH_SIZE = 1000
+
+# 文档类型 -> (模型, 计数器名称, {被索引字段: 权重})
+INDEXED_MODELS = {
+    'member': (Member, 'members', {'name': 3, 'email': 2, 'position': 1}),
+    'announcement': (Announcement, 'announcements', {'title': 3, 'content': 1}),
+    'comment': (Comment, 'comments', {'content': 1})
+}
+
+# 中文按连续汉字切分为单字和相邻二字组（bigram），英文和数字按连续字母数字切词
+CJK_RANGES = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+TOKEN_PATTERN = re.compile(f'([{CJK_RANGES}]+)|([0-9a-z]+)')
+
+
+def _cjk_terms(run):
+    terms = list(run)
+    terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+# 文本切分为词项（含重复，用于统计词频）
+def tokenize(text):
+    terms = []
+    for cjk, word in TOKEN_PATTERN.findall((text or '').lower()):
+        if cjk:
+            terms.extend(_cjk_terms(cjk))
+        else:
+            terms.append(word[:TERM_MAX_LENGTH])
+    return terms
+
+
+# 查询切分为若干必须同时命中的词项组：(词项, 是否前缀匹配)
+# 汉字串只取二字组（单字查询取单字）；输入未以空格结尾时，最后一个英文/数字词按前缀匹配，便于输入联想
+def parse_query(q):
+    q = (q or '').lower()
+    matches = list(TOKEN_PATTERN.finditer(q))
+    groups = []
+    for index, match in enumerate(matches):
+        cjk, word = match.groups()
+        if cjk:
+            if len(cjk) == 1:
+                groups.append((cjk, False))
+            else:
+                groups.extend((cjk[i:i + 2], False) for i in range(len(cjk) - 1))
+        else:
+            is_last = index == len(matches) - 1 and match.end() == len(q)
+            groups.append((word[:TERM_MAX_LENGTH], is_last))
+    unique = list(dict.fromkeys(groups))
+    return unique[:MAX_QUERY_TERMS]
+
+
+def _document_terms(values, fields):
+    weights = Counter()
+    for field, weight in fields.items():
+        for term in tokenize(values.get(field)):
+            weights[term] += weight
+    return weights
+
+
+def _postings(doc_type, doc_id, values, fields):
+    return [
+        {'term': term, 'doc_type': doc_type, 'doc_id': doc_id, 'weight': weight}
+        for term, weight in _document_terms(values, fields).items()
+    ]
+
+
+def _unindex(connection, doc_type, doc_ids):
+    connection.execute(
+        delete(SearchPosting)
+        .where(SearchPosting.doc_type == doc_type, SearchPosting.doc_id.in_(doc_ids))
+    )
+
+
+# 批量（重新）索引一组文档：rows 为 [(文档 id, {字段: 值})]
+def index_rows(connection, doc_type, rows, replace=True):
+    _, _, fields = INDEXED_MODELS[doc_type]
+    if replace and rows:
+        _unindex(connection, doc_type, [doc_id for doc_id, _ in rows])
+    postings = []
+    for doc_id, values in rows:
+        postings.extend(_postings(doc_type, doc_id, values, fields))
+    if postings:
+        connection.execute(insert(SearchPosting), postings)
+
+
+def _pending(target):
+    return object_session(target).info.setdefault('search_pending', {'unindex': {}, 'postings': []})
+
+
+# ORM 增删改事件：逐行收集到会话中，flush 结束时按文档类型批量删除旧词项、批量插入新词项，与业务数据同一事务
+# 更新时只有被索引字段变化才重建该文档
+def _register_events(doc_type, model, fields):
+    def values_of(target):
+        return {field: getattr(target, field) for field in fields}
+
+    @event.listens_for(model, 'after_insert')
+    def after_insert(mapper, connection, target):
+        _pending(target)['postings'].extend(_postings(doc_type, target.id, values_of(target), fields))
+
+    @event.listens_for(model, 'after_update')
+    def after_update(mapper, connection, target):
+        state = inspect(target)
+        if any(state.attrs[field].history.has_changes() for field in fields):
+            pending = _pending(target)
+            pending['unindex'].setdefault(doc_type, set()).add(target.id)
+            pending['postings'].extend(_postings(doc_type, target.id, values_of(target), fields))
+
+    @event.listens_for(model, 'after_delete')
+    def after_delete(mapper, connection, target):
+        _pending(target)['unindex'].setdefault(doc_type, set()).add(target.id)
+
+
+for _doc_type, (_model, _, _fields) in INDEXED_MODELS.items():
+    _register_events(_doc_type, _model, _fields)
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_pending(session, flush_context):
+    pending = session.info.pop('search_pending', None)
+    if not pending:
+        return
+    connection = session.connection()
+    for doc_type, doc_ids in pending['unindex'].items():
+        _unindex(connection, doc_type, list(doc_ids))
+    if pending['postings']:
+        connection.execute(insert(SearchPosting), pending['postings'])
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_pending(session, previous_transaction):
+    session.info.pop('search_pending', None)
+
+
+# 绕过 ORM 的批量写入（如批量导入）需显式索引新行：按条件查出文档后批量写入倒排表
+def index_documents(doc_type, condition, connection=None):
+    connection = connection or db.session.connection()
+    model, _, fields = INDEXED_MODELS[doc_type]
+    columns = [model.__table__.c.id] + [model.__table__.c[field] for field in fields]
+    rows = connection.execute(select(*columns).where(condition)).mappings().all()
+    index_rows(connection, doc_type, [(row['id'], row) for row in rows])
+    return len(rows)
+
+
+# 清空并重建全部索引（可传入连接以便在迁移中使用）
+def rebuild(connection=None, batch_size=REBUILD_BATCH_SIZE):
+    connection = connection or db.session.connection()
+    connection.execute(delete(SearchPosting))
+    result = {}
+    for doc_type, (model, _, fields) in INDEXED_MODELS.items():
+        table = model.__table__
+        columns = [table.c.id] + [table.c[field] for field in fields]
+        indexed = 0
+        last_id = 0
+        while True:
+            rows = connection.execute(
+                select(*columns).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+            ).mappings().all()
+            if not rows:
+                break
+            index_rows(connection, doc_type, [(row['id'], row) for row in rows], replace=False)
+            indexed += len(rows)
+            last_id = rows[-1]['id']
+        result[doc_type] = indexed
+    return result
+
+
+# 前缀匹配写成范围条件 [term, term 末字符 + 1)，可直接走词项主键索引（LIKE 在 SQLite 中不区分大小写，无法使用索引）
+# 前缀只出现在英文/数字词上，末字符加一不会越出字符范围
+def _term_condition(term, prefix):
+    if prefix:
+        upper = term[:-1] + chr(ord(term[-1]) + 1)
+        return and_(SearchPosting.term >= term, SearchPosting.term < upper)
+    return SearchPosting.term == term
+
+
+def _snippet(text, groups, width=60):
+    text = text or ''
+    lowered = text.lower()
+    positions = [lowered.find(term) for term, _ in groups if term in lowered]
+    start = max(min(positions) - width // 4, 0) if positions else 0
+    snippet = text[start:start + width]
+    return ('…' if start else '') + snippet + ('…' if start + width < len(text) else '')
+
+
+def _hydrate(doc_type, ids, groups):
+    from flask import url_for
+
+    documents = {}
+    if doc_type == 'member':
+        for member_id, name, email, position in db.session.execute(
+                select(Member.id, Member.name, Member.email, Member.position).where(Member.id.in_(ids))):
+            documents[member_id] = {
+                'title': name,
+                'snippet': ' · '.join(value for value in (email, position) if value),
+                'url': url_for('member.list_members', q=email)
+            }
+    elif doc_type == 'announcement':
+        for announcement_id, title, content in db.session.execute(
+                select(Announcement.id, Announcement.title, Announcement.content).where(Announcement.id.in_(ids))):
+            documents[announcement_id] = {
+                'title': title,
+                'snippet': _snippet(content, groups),
+                'url': url_for('operation.list_announcements', q=title)
+            }
+    else:
+        for comment_id, content in db.session.execute(
+                select(Comment.id, Comment.content).where(Comment.id.in_(ids))):
+            documents[comment_id] = {
+                'title': _snippet(content, groups, width=30),
+                'snippet': _snippet(content, groups),
+                'url': url_for('comment.list_comments', q=content[:30])
+            }
+    return documents
+
+
+# 排序检索：所有词项组都命中的文档按 Σ 权重 × IDF 降序返回
+def search(q, types=None, limit=DEFAULT_LIMIT):
+    groups = parse_query(q)
+    doc_types = [doc_type for doc_type in (types or INDEXED_MODELS) if doc_type in INDEXED_MODELS]
+    if not groups or not doc_types:
+        return []
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    conditions = [_term_condition(term, prefix) for term, prefix in groups]
+    where = (or_(*conditions), SearchPosting.doc_type.in_(doc_types))
+    # 文档对每个词项组是否命中：同一个词项可以同时命中多组（如 "release rel"、"release release"），需逐组判断
+    hits = [func.max(case((condition, 1), else_=0)) for condition in conditions]
+
+    # 各词项组的文档频率（命中的不同文档数）；任何一组无命中即无结果
+    matched = (
+        select(*[hit.label(f'hit{index}') for index, hit in enumerate(hits)])
+        .where(*where)
+        .group_by(SearchPosting.doc_type, SearchPosting.doc_id)
+        .subquery()
+    )
+    frequencies = db.session.execute(select(*[func.sum(column) for column in matched.c])).one()
+    if not all(frequencies):
+        return []
+    counts = counters.get_counts()
+    total = max(sum(counts.get(INDEXED_MODELS[doc_type][1], 0) for doc_type in doc_types), 1)
+    idf = [math.log(1 + (total - frequency + 0.5) / (frequency + 0.5)) for frequency in frequencies]
+
+    relevance = reduce(operator.add, [case((condition, idf[index]), else_=0)
+                                      for index, condition in enumerate(conditions)])
+    score = func.sum(SearchPosting.weight * relevance).label('score')
+    ranked = db.session.execute(
+        select(SearchPosting.doc_type, SearchPosting.doc_id, score)
+        .where(*where)
+        .group_by(SearchPosting.doc_type, SearchPosting.doc_id)
+        .having(*[hit == 1 for hit in hits])
+        .order_by(score.desc(), SearchPosting.doc_id.desc())
+        .limit(limit)
+    ).all()
+
+    ids_by_type = {}
+    for doc_type, doc_id, _ in ranked:
+        ids_by_type.setdefault(doc_type, []).append(doc_id)
+    documents = {doc_type: _hydrate(doc_type, ids, groups) for doc_type, ids in ids_by_type.items()}
+
+    results = []
+    for doc_type, doc_id, doc_score in ranked:
+        document = documents[doc_type].get(doc_id)
+        if document is not None:
+            results.append(dict(document, type=doc_type, id=doc_id, score=round(float(doc_score), 4)))
+    return results
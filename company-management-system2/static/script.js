@@ -24,26 +24,6 @@ document.addEventListener('DOMContentLoaded', function() {
             });
         }
     });
-
-    // 为搜索框添加实时搜索功能
-    var searchInputs = document.querySelectorAll('input[type="search"]');
-    searchInputs.forEach(function(input) {
-        input.addEventListener('input', function() {
-            var searchTerm = this.value.toLowerCase();
-            var table = this.closest('div').nextElementSibling;
-            if (table && table.tagName === 'TABLE') {
-                var rows = table.querySelectorAll('tbody tr');
-                rows.forEach(function(row) {
-                    var rowText = row.textContent.toLowerCase();
-                    if (rowText.includes(searchTerm)) {
-                        row.style.display = '';
-                    } else {
-                        row.style.display = 'none';
-                    }
-                });
-            }
-        });
-    });
 });
 
 // 表单验证
@@ -0,0 +1,293 @@
+// 列表页通用脚本：表格行通过 JSON 接口加载，增删改后只更新受影响的行，新增和编辑共用一个模态框
+(function () {
+    var PAGE_WINDOW = 2;
+
+    function formatValue(column, item) {
+        var value = item[column.key];
+        if (value === null || value === undefined || value === '') {
+            return column.empty || '';
+        }
+        if (column.format === 'time') {
+            return String(value).replace('T', ' ').slice(0, 19);
+        }
+        return String(value);
+    }
+
+    function button(className, text) {
+        var element = document.createElement('button');
+        element.type = 'button';
+        element.className = 'btn btn-sm ' + className;
+        element.textContent = text;
+        return element;
+    }
+
+    function showAlert(element, message, level) {
+        element.className = 'alert alert-' + level;
+        element.textContent = message;
+        window.clearTimeout(element._timer);
+        if (level === 'success') {
+            element._timer = window.setTimeout(function () {
+                element.classList.add('d-none');
+            }, 3000);
+        }
+    }
+
+    // 接口错误信息：批量校验错误逐条列出
+    function errorMessage(body, status) {
+        if (!body || !body.error) {
+            return '请求失败（' + status + '）';
+        }
+        var details = (body.errors || []).map(function (item) { return item.error; });
+        return details.length ? details.join('；') : body.error;
+    }
+
+    function DataTable(root, options) {
+        this.root = root;
+        this.options = options;
+        this.endpoint = root.dataset.endpoint;
+        this.label = root.dataset.label;
+        this.rows = root.querySelector('[data-role="rows"]');
+        this.pager = root.querySelector('[data-role="pager"]');
+        this.message = root.querySelector('[data-role="message"]');
+        this.searchForm = root.querySelector('[data-role="search"]');
+        this.modalElement = document.querySelector(options.modal);
+        this.modal = bootstrap.Modal.getOrCreateInstance(this.modalElement);
+        this.form = this.modalElement.querySelector('form');
+        this.modalError = this.modalElement.querySelector('[data-role="error"]');
+        this.items = new Map();
+        this.total = 0;
+        this.editing = null;
+        this.params = new URLSearchParams(window.location.search);
+        if (!this.params.get('sort')) {
+            this.params.set('sort', root.dataset.defaultSort || 'id');
+            this.params.set('order', 'desc');
+        }
+        this.bind();
+        this.load();
+    }
+
+    DataTable.prototype.bind = function () {
+        var table = this;
+        this.searchForm.q.value = this.params.get('q') || '';
+        this.searchForm.addEventListener('submit', function (event) {
+            event.preventDefault();
+            table.params.set('q', table.searchForm.q.value.trim());
+            table.params.delete('page');
+            table.load();
+        });
+        this.root.querySelectorAll('th[data-sort]').forEach(function (header) {
+            header.dataset.label = header.textContent.trim();
+            header.style.cursor = 'pointer';
+            header.addEventListener('click', function () {
+                var column = header.dataset.sort;
+                var order = table.params.get('sort') === column && table.params.get('order') === 'desc' ? 'asc' : 'desc';
+                table.params.set('sort', column);
+                table.params.set('order', order);
+                table.params.delete('page');
+                table.load();
+            });
+        });
+        this.pager.addEventListener('click', function (event) {
+            var link = event.target.closest('[data-page]');
+            if (link) {
+                event.preventDefault();
+                table.params.set('page', link.dataset.page);
+                table.load();
+            }
+        });
+        document.querySelectorAll(this.options.createButton).forEach(function (element) {
+            element.addEventListener('click', function () { table.openModal(null); });
+        });
+        this.form.addEventListener('submit', function (event) {
+            event.preventDefault();
+            table.save();
+        });
+    };
+
+    DataTable.prototype.query = function (extra) {
+        var params = new URLSearchParams(extra || {});
+        params.set('fields', this.options.fields.join(','));
+        return params;
+    };
+
+    DataTable.prototype.request = function (method, url, data) {
+        var init = {method: method, credentials: 'same-origin', cache: 'no-cache', headers: {}};
+        if (data !== undefined) {
+            init.headers['Content-Type'] = 'application/json';
+            init.body = JSON.stringify(data);
+        }
+        return fetch(url, init).then(function (response) {
+            if (response.status === 204) {
+                return null;
+            }
+            return response.json().catch(function () { return null; }).then(function (body) {
+                if (!response.ok) {
+                    throw new Error(errorMessage(body, response.status));
+                }
+                return body;
+            });
+        });
+    };
+
+    // 加载当前页：浏览器带上 If-None-Match，数据未变时服务器返回 304，直接复用缓存
+    DataTable.prototype.load = function () {
+        var table = this;
+        var params = this.query(this.params);
+        window.history.replaceState(null, '', '?' + this.params.toString());
+        return this.request('GET', this.endpoint + '?' + params.toString()).then(function (page) {
+            table.items.clear();
+            table.rows.replaceChildren.apply(table.rows, page.items.map(function (item) {
+                return table.renderRow(item);
+            }));
+            table.total = page.total;
+            table.page = page;
+            table.renderPager();
+            table.renderSortHeaders();
+        }).catch(function (error) {
+            showAlert(table.message, error.message, 'danger');
+        });
+    };
+
+    DataTable.prototype.renderRow = function (item) {
+        var table = this;
+        var row = document.createElement('tr');
+        row.dataset.id = item.id;
+        this.items.set(item.id, item);
+        this.options.columns.forEach(function (column) {
+            var cell = document.createElement('td');
+            cell.textContent = formatValue(column, item);
+            row.appendChild(cell);
+        });
+        var actions = document.createElement('td');
+        var edit = button('btn-warning', '编辑');
+        var remove = button('btn-danger', '删除');
+        edit.addEventListener('click', function () { table.openModal(table.items.get(item.id)); });
+        remove.addEventListener('click', function () { table.remove(item.id); });
+        actions.append(edit, ' ', remove);
+        row.appendChild(actions);
+        return row;
+    };
+
+    DataTable.prototype.renderSortHeaders = function () {
+        var sort = this.params.get('sort');
+        var order = this.params.get('order');
+        this.root.querySelectorAll('th[data-sort]').forEach(function (header) {
+            var arrow = header.dataset.sort === sort ? (order === 'desc' ? ' ↓' : ' ↑') : '';
+            header.textContent = header.dataset.label + arrow;
+        });
+    };
+
+    DataTable.prototype.renderPager = function () {
+        var page = this.page;
+        var html = '';
+        if (page.pages > 1) {
+            var item = function (number, text, disabled, active) {
+                return '<li class="page-item' + (disabled ? ' disabled' : '') + (active ? ' active' : '') + '">' +
+                    '<a class="page-link" href="#"' + (disabled ? '' : ' data-page="' + number + '"') + '>' + text + '</a></li>';
+            };
+            html += '<ul class="pagination justify-content-center">';
+            html += item(page.page - 1, '上一页', page.page <= 1, false);
+            var last = 0;
+            for (var number = 1; number <= page.pages; number++) {
+                if (number === 1 || number === page.pages || Math.abs(number - page.page) <= PAGE_WINDOW) {
+                    if (last && number - last > 1) {
+                        html += '<li class="page-item disabled"><span class="page-link">…</span></li>';
+                    }
+                    html += item(number, number, false, number === page.page);
+                    last = number;
+                }
+            }
+            html += item(page.page + 1, '下一页', page.page >= page.pages, false);
+            html += '</ul>';
+        }
+        html += '<p class="text-center text-muted small">共 <span data-role="total">' + this.total + '</span> 条记录</p>';
+        this.pager.innerHTML = html;
+    };
+
+    DataTable.prototype.updateTotal = function (delta) {
+        this.total += delta;
+        var total = this.pager.querySelector('[data-role="total"]');
+        if (total) {
+            total.textContent = this.total;
+        }
+    };
+
+    DataTable.prototype.openModal = function (item) {
+        this.editing = item;
+        this.form.reset();
+        this.modalError.classList.add('d-none');
+        this.modalElement.querySelector('.modal-title').textContent = (item ? '编辑' : '添加') + this.label;
+        this.form.querySelector('[type="submit"]').textContent = item ? '保存' : '添加';
+        if (item) {
+            Array.prototype.forEach.call(this.form.elements, function (element) {
+                if (element.name && item[element.name] !== undefined) {
+                    element.value = item[element.name] === null ? '' : item[element.name];
+                }
+            });
+        }
+        this.modal.show();
+    };
+
+    // 表单转为 JSON：data-type="int" 的字段转成整数，空值转成 null
+    DataTable.prototype.formData = function () {
+        var data = {};
+        Array.prototype.forEach.call(this.form.elements, function (element) {
+            if (!element.name) {
+                return;
+            }
+            var value = element.value.trim();
+            if (element.dataset.type === 'int') {
+                data[element.name] = value ? parseInt(value, 10) : null;
+            } else {
+                data[element.name] = value || null;
+            }
+        });
+        return data;
+    };
+
+    DataTable.prototype.save = function () {
+        var table = this;
+        var editing = this.editing;
+        var params = this.query().toString();
+        var request = editing
+            ? this.request('PATCH', this.endpoint + '/' + editing.id + '?' + params, this.formData())
+            : this.request('POST', this.endpoint + '?' + params, this.formData());
+        request.then(function (item) {
+            var row = table.renderRow(item);
+            if (editing) {
+                table.rows.querySelector('tr[data-id="' + item.id + '"]').replaceWith(row);
+            } else {
+                table.rows.prepend(row);
+                table.updateTotal(1);
+            }
+            table.modal.hide();
+            showAlert(table.message, table.label + (editing ? '编辑成功' : '添加成功'), 'success');
+        }).catch(function (error) {
+            showAlert(table.modalError, error.message, 'danger');
+        });
+    };
+
+    DataTable.prototype.remove = function (id) {
+        var table = this;
+        if (!window.confirm('确定要删除这个' + this.label + '吗？')) {
+            return;
+        }
+        this.request('DELETE', this.endpoint + '/' + id).then(function () {
+            var row = table.rows.querySelector('tr[data-id="' + id + '"]');
+            if (row) {
+                row.remove();
+            }
+            table.items.delete(id);
+            table.updateTotal(-1);
+            showAlert(table.message, table.label + '删除成功', 'success');
+        }).catch(function (error) {
+            showAlert(table.message, error.message, 'danger');
+        });
+    };
+
+    window.DataTable = {
+        create: function (selector, options) {
+            return new DataTable(document.querySelector(selector), options);
+        }
+    };
+})();
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from models import db, User  # noqa: E402
+
+
+# 每个测试一个全新的内存数据库应用
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+# 已登录管理员的测试客户端
+@pytest.fixture
+def admin_client(app, client):
+    admin = User(username='admin', role='admin')
+    admin.set_password('admin123')
+    db.session.add(admin)
+    db.session.commit()
+    response = client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 302
+    return client
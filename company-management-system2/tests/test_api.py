@@ -0,0 +1,135 @@
+import pytest
+
+from models import db, Department, Member
+
+
+@pytest.fixture
+def department(admin_client):
+    department = Department(name='研发部')
+    db.session.add(department)
+    db.session.commit()
+    return department.id
+
+
+def member(index, department_id, **values):
+    return dict({'name': f'成员{index}', 'email': f'member{index}@example.com', 'department_id': department_id},
+                **values)
+
+
+def test_requires_login(client):
+    response = client.get('/api/v1/members')
+    assert response.status_code == 401
+    assert response.get_json() == {'error': '未登录'}
+
+
+def test_batch_create(admin_client, department):
+    response = admin_client.post('/api/v1/members', json=[member(i, department) for i in range(3)])
+    assert response.status_code == 201
+    assert [item['email'] for item in response.get_json()['created']] == [
+        'member0@example.com', 'member1@example.com', 'member2@example.com'
+    ]
+    assert Member.query.count() == 3
+
+
+# 最后一条不合法时整批回滚，逐条返回错误
+def test_batch_rolls_back_when_last_item_is_invalid(admin_client, department):
+    items = [member(0, department), member(1, department), member(2, department, email='')]
+    response = admin_client.post('/api/v1/members', json=items)
+    assert response.status_code == 422
+    assert response.get_json()['errors'] == [{'op': 'create', 'index': 2, 'error': 'email 不能为空'}]
+    assert Member.query.count() == 0
+
+
+def test_batch_reports_every_error(admin_client, department):
+    items = [member(0, department), member(1, department, email='member0@example.com'),
+             member(2, 999)]
+    response = admin_client.post('/api/v1/members', json=items)
+    assert response.status_code == 422
+    assert response.get_json()['errors'] == [
+        {'op': 'create', 'index': 1, 'error': '邮箱 member0@example.com 已被使用'},
+        {'op': 'create', 'index': 2, 'error': '部门 999 不存在'},
+    ]
+    assert Member.query.count() == 0
+
+
+def test_batch_update_and_delete(admin_client, department):
+    created = admin_client.post('/api/v1/members', json=[member(i, department) for i in range(3)]).get_json()
+    first, second, third = (item['id'] for item in created['created'])
+
+    response = admin_client.post('/api/v1/members/batch', json={
+        'create': [member(3, department)],
+        'update': [{'id': first, 'position': '经理'}],
+        'delete': [second]
+    })
+    assert response.status_code == 200
+    result = response.get_json()
+    assert [item['name'] for item in result['created']] == ['成员3']
+    assert result['updated'][0]['position'] == '经理'
+    assert result['deleted'] == [second]
+    assert sorted(member.id for member in Member.query) == sorted([first, third, result['created'][0]['id']])
+
+
+# 修改和删除混在一批中，其中一条删除的目标不存在：前面的新增和修改都不生效
+def test_batch_update_and_delete_roll_back_together(admin_client, department):
+    created = admin_client.post('/api/v1/members', json=[member(0, department)]).get_json()['created'][0]
+
+    response = admin_client.post('/api/v1/members/batch', json={
+        'create': [member(1, department)],
+        'update': [{'id': created['id'], 'name': '改名'}],
+        'delete': [created['id'] + 100]
+    })
+    assert response.status_code == 422
+    assert response.get_json()['errors'] == [
+        {'op': 'delete', 'index': 0, 'id': created['id'] + 100, 'error': f"成员 {created['id'] + 100} 不存在"}
+    ]
+    db.session.expire_all()
+    assert [(item.id, item.name) for item in Member.query] == [(created['id'], '成员0')]
+
+
+def test_batch_rejects_malformed_payload(admin_client):
+    assert admin_client.post('/api/v1/members/batch', json={'create': member(0, 1)}).status_code == 400
+    assert admin_client.post('/api/v1/members/batch', json={'delete': ['1']}).status_code == 400
+    assert admin_client.post('/api/v1/members', data='not json').status_code == 400
+
+
+def test_list_etag(admin_client, department):
+    admin_client.post('/api/v1/members', json=[member(0, department)])
+    response = admin_client.get('/api/v1/members')
+    etag = response.headers['ETag']
+    assert response.status_code == 200 and etag
+
+    assert admin_client.get('/api/v1/members', headers={'If-None-Match': etag}).status_code == 304
+
+    # 写入提交后列表缓存失效，旧 ETag 不再匹配
+    admin_client.post('/api/v1/members', json=[member(1, department)])
+    response = admin_client.get('/api/v1/members', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['total'] == 2
+
+
+def test_item_etag(admin_client, department):
+    created = admin_client.post('/api/v1/members', json=member(0, department)).get_json()
+    url = f"/api/v1/members/{created['id']}"
+    etag = admin_client.get(url).headers['ETag']
+    assert admin_client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    admin_client.patch(url, json={'position': '经理'})
+    assert admin_client.get(url, headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_field_selection(admin_client, department):
+    created = admin_client.post('/api/v1/members?fields=id,email', json=member(0, department)).get_json()
+    assert set(created) == {'id', 'email'}
+
+    items = admin_client.get('/api/v1/members?fields=id,name').get_json()['items']
+    assert items == [{'id': created['id'], 'name': '成员0'}]
+    assert admin_client.get(f"/api/v1/members/{created['id']}?fields=department_name").get_json() == {
+        'department_name': '研发部'
+    }
+
+
+def test_unknown_field(admin_client, department):
+    response = admin_client.get('/api/v1/members?fields=id,salary')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': '未知字段: salary'}
+    assert admin_client.get('/api/v1/departments/1?fields=bogus').status_code == 400
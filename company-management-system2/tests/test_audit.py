@@ -0,0 +1,34 @@
+import os
+import queue
+import threading
+
+from audit import AuditLogWriter, audit_writer
+from models import OperationLog
+
+
+# 队列中某一批只有标记（其他线程的 flush 请求）时，flush 仍要继续写出其后的记录
+def test_flush_drains_past_marker_only_batch(app):
+    writer = AuditLogWriter(batch_size=2)
+    writer.app = app
+    writer._queue = queue.Queue()
+    writer._pid = os.getpid()
+    markers = [threading.Event(), threading.Event()]
+    for marker in markers:
+        writer._queue.put(marker)
+    for index in range(3):
+        writer._queue.put((OperationLog, {'user_id': 1, 'operation_type': 'system',
+                                          'operation_content': f'操作{index}'}))
+
+    writer.flush()
+
+    assert writer._queue.empty()
+    assert OperationLog.query.count() == 3
+    assert all(marker.is_set() for marker in markers)
+    assert writer.stats()['written'] == 3
+
+
+def test_metrics_export_audit_stats(admin_client):
+    body = admin_client.get('/system/metrics').get_data(as_text=True)
+    assert 'audit_log_records_total{result="written"}' in body
+    assert 'audit_log_inline_flushes_total' in body
+    assert f'audit_log_queue_size {audit_writer.queue_size}' in body
@@ -0,0 +1,78 @@
+import fnmatch
+
+import pytest
+
+from cache import LRUCache, RedisCache, fragment_cache
+from models import db, Department
+
+
+# 最小的 Redis 替身：只实现 RedisCache 用到的命令，值按字节保存
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+    def scan_iter(self, pattern):
+        return [key for key in list(self.data) if fnmatch.fnmatch(key, pattern)]
+
+
+@pytest.fixture(params=['lru', 'redis'])
+def backend(request, app):
+    backend = LRUCache() if request.param == 'lru' else RedisCache(client=FakeRedis())
+    fragment_cache.backend = backend
+    return backend
+
+
+def department_names():
+    return fragment_cache.get_or_set('department_options', 'all', lambda: [
+        department.name for department in Department.query.order_by(Department.id)
+    ])
+
+
+def test_commit_invalidates_fragments(backend):
+    db.session.add(Department(name='研发部'))
+    db.session.commit()
+    assert department_names() == ['研发部']
+
+    db.session.add(Department(name='市场部'))
+    db.session.commit()
+    assert department_names() == ['研发部', '市场部']
+
+
+def test_rollback_keeps_fragments(backend):
+    db.session.add(Department(name='研发部'))
+    db.session.commit()
+    assert department_names() == ['研发部']
+    generation = backend.generation('department_options')
+
+    db.session.add(Department(name='市场部'))
+    db.session.flush()
+    db.session.rollback()
+    assert backend.generation('department_options') == generation
+    assert department_names() == ['研发部']
+
+
+# 多 worker 共用一个 Redis：一个进程提交写入后，其他进程的片段缓存也随之失效
+def test_invalidation_shared_between_workers(app):
+    client = FakeRedis()
+    fragment_cache.backend = RedisCache(client=client)
+    other_worker = RedisCache(client=client)
+    key = lambda: f'department_options:{other_worker.generation("department_options")}:all'  # noqa: E731
+
+    assert department_names() == []
+    assert other_worker.get(key()) == []
+    db.session.add(Department(name='研发部'))
+    db.session.commit()
+    assert other_worker.get(key()) is None
@@ -0,0 +1,108 @@
+import pytest
+
+import hierarchy
+from models import db, Department, Member
+
+
+# 组织架构：A ─┬─ B ── D ── E
+#             └─ C
+# 成员：D 2 人，E 1 人，C 1 人
+@pytest.fixture
+def tree(app):
+    departments = {}
+    for name, parent in [('A', None), ('B', 'A'), ('C', 'A'), ('D', 'B'), ('E', 'D')]:
+        department = Department(name=name, parent=departments.get(parent))
+        db.session.add(department)
+        db.session.flush()
+        departments[name] = department
+    for index, name in enumerate('DDEC'):
+        db.session.add(Member(name=f'成员{index}', email=f'member{index}@example.com',
+                              department_id=departments[name].id))
+    db.session.commit()
+    return {name: department.id for name, department in departments.items()}
+
+
+def snapshot(ids):
+    db.session.expire_all()
+    names = {department_id: name for name, department_id in ids.items()}
+    result = {}
+    for department in Department.query:
+        path = '/' + ''.join(names[department_id] + '/' for department_id in hierarchy.path_ids(department.path))
+        result[department.name] = (path, department.depth, department.subtree_headcount)
+    return result
+
+
+# 增量维护的结果必须与按 parent_id 全量重算的结果一致
+def assert_consistent():
+    assert hierarchy.rebuild()['updated'] == 0
+    db.session.rollback()
+
+
+def test_initial_tree(tree):
+    assert snapshot(tree) == {
+        'A': ('/A/', 0, 4), 'B': ('/A/B/', 1, 3), 'C': ('/A/C/', 1, 1),
+        'D': ('/A/B/D/', 2, 3), 'E': ('/A/B/D/E/', 3, 1)
+    }
+    assert_consistent()
+
+
+# 把 B 连同整个分支移到兄弟部门 C 之下：一条 UPDATE 改写子树路径和层级，人数只在新旧祖先的差集上调整
+def test_move_subtree_under_sibling(tree):
+    db.session.get(Department, tree['B']).parent_id = tree['C']
+    db.session.commit()
+    assert snapshot(tree) == {
+        'A': ('/A/', 0, 4), 'C': ('/A/C/', 1, 4), 'B': ('/A/C/B/', 2, 3),
+        'D': ('/A/C/B/D/', 3, 3), 'E': ('/A/C/B/D/E/', 4, 1)
+    }
+    assert_consistent()
+
+
+def test_move_subtree_to_root(tree):
+    db.session.get(Department, tree['D']).parent_id = None
+    db.session.commit()
+    state = snapshot(tree)
+    assert state['D'] == ('/D/', 0, 3)
+    assert state['E'] == ('/D/E/', 1, 1)
+    assert state['A'] == ('/A/', 0, 1)
+    assert state['B'] == ('/A/B/', 1, 0)
+    assert_consistent()
+
+
+def test_move_member_between_departments(tree):
+    member = Member.query.filter_by(email='member2@example.com').one()  # E 的成员
+    member.department_id = tree['C']
+    db.session.commit()
+    state = snapshot(tree)
+    assert [state[name][2] for name in 'ABCDE'] == [4, 2, 2, 2, 0]
+    assert_consistent()
+
+
+def test_add_and_delete_members(tree):
+    db.session.add(Member(name='新成员', email='new@example.com', department_id=tree['E']))
+    db.session.delete(Member.query.filter_by(email='member3@example.com').one())  # C 的成员
+    db.session.commit()
+    state = snapshot(tree)
+    assert [state[name][2] for name in 'ABCDE'] == [4, 4, 0, 4, 2]
+    assert_consistent()
+
+
+# 移动到自身或其下级之下会形成环：校验和 flush 时都拒绝，事务回滚后树保持不变
+@pytest.mark.parametrize('target', ['B', 'D', 'E'])
+def test_reject_move_under_own_descendant(tree, target):
+    before = snapshot(tree)
+    department = db.session.get(Department, tree['B'])
+    with pytest.raises(hierarchy.HierarchyError):
+        hierarchy.check_parent(department, db.session.get(Department, tree[target]))
+
+    department.parent_id = tree[target]
+    with pytest.raises(hierarchy.HierarchyError):
+        db.session.flush()
+    db.session.rollback()
+    assert snapshot(tree) == before
+
+
+def test_api_rejects_move_under_own_descendant(admin_client, tree):
+    response = admin_client.patch(f"/api/v1/departments/{tree['B']}", json={'parent_id': tree['E']})
+    assert response.status_code == 422
+    assert response.get_json()['errors'][0]['error'] == '不能把部门移动到自身或其下级部门之下'
+    assert db.session.get(Department, tree['B']).parent_id == tree['A']
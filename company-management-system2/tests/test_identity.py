@@ -0,0 +1,56 @@
+from flask import Flask
+
+from cache import LRUCache
+from identity import IdentityCache
+from models import db, User
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    return app
+
+
+def test_invalidation_reaches_every_worker():
+    app = make_app()
+    shared = LRUCache()  # 多 worker 部署时为 Redis：各进程的缓存实例共用同一个后端
+    worker_a = IdentityCache(ttl=60, backend=shared)
+    worker_b = IdentityCache(ttl=60, backend=shared)
+    with app.app_context():
+        db.create_all()
+        user = User(username='alice', role='admin', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+
+        assert worker_a.load(user.id).is_admin
+        assert worker_b.load(user.id).is_admin
+
+        # worker A 处理降级请求并失效缓存，worker B 的下一次加载必须读到新角色
+        user.role = 'user'
+        db.session.commit()
+        worker_a.invalidate(user.id)
+        assert not worker_b.load(user.id).is_admin
+
+        db.session.delete(user)
+        db.session.commit()
+        worker_a.invalidate(user.id)
+        assert worker_b.load(user.id) is None
+        assert worker_a.load(user.id) is None
+
+
+def test_clear_keeps_other_cache_entries():
+    app = make_app()
+    shared = LRUCache()
+    cache = IdentityCache(ttl=60, backend=shared)
+    shared.set('fragment', 'value')
+    with app.app_context():
+        db.create_all()
+        user = User(username='bob', role='user', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        first = cache.load(user.id)
+        assert cache.load(user.id) is first
+        cache.clear()
+        assert cache.load(user.id) is not first
+    assert shared.get('fragment') == 'value'
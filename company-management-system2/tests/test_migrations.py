@@ -0,0 +1,69 @@
+from sqlalchemy import create_engine, inspect, select
+
+import migrations
+from models import SchemaMigration
+
+# 最初版本（迁移机制引入之前）的表结构
+BASELINE_SCHEMA = [
+    '''CREATE TABLE users (
+        id INTEGER NOT NULL, username VARCHAR(100) NOT NULL, password_hash VARCHAR(255) NOT NULL,
+        role VARCHAR(5), create_time DATETIME, PRIMARY KEY (id), UNIQUE (username))''',
+    '''CREATE TABLE ads (
+        id INTEGER NOT NULL, title VARCHAR(100) NOT NULL, content TEXT NOT NULL, image_url VARCHAR(255),
+        link VARCHAR(255), start_date DATE NOT NULL, end_date DATE NOT NULL, status VARCHAR(8),
+        create_time DATETIME, PRIMARY KEY (id))''',
+    '''CREATE TABLE error_logs (
+        id INTEGER NOT NULL, error_type VARCHAR(100) NOT NULL, error_message TEXT NOT NULL,
+        stack_trace TEXT, timestamp DATETIME, PRIMARY KEY (id))''',
+    '''CREATE TABLE system_info (
+        id INTEGER NOT NULL, name VARCHAR(100) NOT NULL, value VARCHAR(255), update_time DATETIME,
+        PRIMARY KEY (id))''',
+    '''CREATE TABLE announcements (
+        id INTEGER NOT NULL, title VARCHAR(200) NOT NULL, content TEXT NOT NULL, creator_id INTEGER NOT NULL,
+        create_time DATETIME, PRIMARY KEY (id), FOREIGN KEY(creator_id) REFERENCES users (id))''',
+    '''CREATE TABLE comments (
+        id INTEGER NOT NULL, content TEXT NOT NULL, user_id INTEGER NOT NULL, create_time DATETIME,
+        PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (id))''',
+    '''CREATE TABLE departments (
+        id INTEGER NOT NULL, name VARCHAR(100) NOT NULL, manager_id INTEGER, create_time DATETIME,
+        PRIMARY KEY (id), UNIQUE (name), FOREIGN KEY(manager_id) REFERENCES users (id))''',
+    '''CREATE TABLE login_logs (
+        id INTEGER NOT NULL, user_id INTEGER NOT NULL, ip_address VARCHAR(50) NOT NULL, login_time DATETIME,
+        PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (id))''',
+    '''CREATE TABLE operation_logs (
+        id INTEGER NOT NULL, user_id INTEGER NOT NULL, operation_type VARCHAR(100) NOT NULL,
+        operation_content TEXT, operation_time DATETIME, PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES users (id))''',
+    '''CREATE TABLE members (
+        id INTEGER NOT NULL, name VARCHAR(100) NOT NULL, email VARCHAR(100) NOT NULL,
+        department_id INTEGER NOT NULL, position VARCHAR(100), create_time DATETIME, PRIMARY KEY (id),
+        UNIQUE (email), FOREIGN KEY(department_id) REFERENCES departments (id))''',
+]
+
+
+def test_upgrade_baseline_database(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "baseline.db"}')
+    with engine.begin() as connection:
+        for statement in BASELINE_SCHEMA:
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql(
+            "INSERT INTO error_logs (error_type, error_message, timestamp) "
+            "VALUES ('ValueError', 'boom', '2024-01-01 00:00:00')"
+        )
+
+    applied = migrations.upgrade(engine)
+
+    assert applied == [version for version, _, _ in migrations.MIGRATIONS]
+    inspector = inspect(engine)
+    error_log_indexes = {index['name'] for index in inspector.get_indexes('error_logs')}
+    assert {'ix_error_logs_timestamp', 'ix_error_logs_fingerprint'} <= error_log_indexes
+    assert {'ix_departments_parent_id', 'ix_departments_path'} <= {
+        index['name'] for index in inspector.get_indexes('departments')
+    }
+    with engine.connect() as connection:
+        first_seen = connection.exec_driver_sql('SELECT first_seen FROM error_logs').scalar()
+        versions = list(connection.execute(select(SchemaMigration.version)).scalars())
+    assert first_seen is not None
+    assert sorted(versions) == applied
+    assert migrations.upgrade(engine) == []
+
@@ -0,0 +1,23 @@
+from config import Config
+from monitor import metrics_sampler
+
+
+def test_stream_cap_leaves_threads_for_requests():
+    assert Config.SYSTEM_METRICS_MAX_STREAMS == 2  # 默认 GUNICORN_THREADS=4
+
+
+# 连接数达到上限后返回 503，不再占用线程；关闭一条连接后可以重新连接
+def test_stream_limit(app, admin_client):
+    url = '/system/metrics/stream'
+    streams = [admin_client.get(url, buffered=False) for _ in range(app.config['SYSTEM_METRICS_MAX_STREAMS'])]
+    assert all(response.status_code == 200 for response in streams)
+    assert admin_client.get(url).status_code == 503
+    # 普通请求不受影响
+    assert admin_client.get('/system/cache').status_code == 200
+
+    streams.pop().close()
+    response = admin_client.get(url, buffered=False)
+    assert response.status_code == 200
+    for response in streams + [response]:
+        response.close()
+    assert not metrics_sampler._subscribers
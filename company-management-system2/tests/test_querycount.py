@@ -0,0 +1,56 @@
+import pytest
+
+from cache import fragment_cache
+from models import db, User, Department, Member, Announcement, Comment, LoginLog, OperationLog, ErrorLog
+from querycount import assert_max_queries
+
+ROWS = 12
+
+# 列表页每次请求的 SQL 条数上限：与行数无关，关联对象（经理、部门、作者、上级部门）都随列表一次加载
+PAGE_QUERY_LIMITS = [
+    ('/members/', 1),
+    ('/api/v1/members', 2),
+    ('/departments/', 2),
+    ('/api/v1/departments', 2),
+    ('/operations/announcements', 2),
+    ('/comments/', 2),
+    ('/users/', 2),
+    ('/logs/login_logs', 1),
+    ('/logs/operation_logs', 1),
+    ('/logs/list_error_logs', 1),
+]
+
+
+# 每行关联不同的用户和部门，懒加载时每行都会多出一条查询
+@pytest.fixture
+def populated(admin_client):
+    users = [User(username=f'user{i}', role='user', password_hash='x') for i in range(ROWS)]
+    db.session.add_all(users)
+    db.session.flush()
+    departments = []
+    for i, user in enumerate(users):
+        parent = departments[-1] if departments and i % 2 else None
+        department = Department(name=f'部门{i}', manager_id=user.id, parent_id=parent.id if parent else None)
+        db.session.add(department)
+        db.session.flush()
+        departments.append(department)
+    for i, (user, department) in enumerate(zip(users, departments)):
+        db.session.add_all([
+            Member(name=f'成员{i}', email=f'member{i}@example.com', department_id=department.id, position='职员'),
+            Announcement(title=f'公告{i}', content='内容', creator_id=user.id),
+            Comment(content=f'评论{i}', user_id=user.id),
+            LoginLog(user_id=user.id, ip_address='127.0.0.1'),
+            OperationLog(user_id=user.id, operation_type='system', operation_content=f'操作{i}'),
+            ErrorLog(error_type='ValueError', error_message=f'错误{i}', fingerprint=f'fingerprint{i}'),
+        ])
+    db.session.commit()
+    fragment_cache.enabled = False  # 测量的是实际查询，不能被片段缓存挡住
+    admin_client.get('/')  # 预热登录身份缓存
+    return admin_client
+
+
+@pytest.mark.parametrize('path, limit', PAGE_QUERY_LIMITS)
+def test_list_page_query_count(populated, path, limit):
+    with assert_max_queries(limit):
+        response = populated.get(path)
+    assert response.status_code == 200
@@ -0,0 +1,79 @@
+import math
+
+import pytest
+from sqlalchemy import event
+
+import search
+from models import db, Announcement, User
+
+
+@pytest.fixture
+def announce(app):
+    author = User(username='author', role='user', password_hash='x')
+    db.session.add(author)
+    db.session.commit()
+
+    def announce(title, content='x'):
+        announcement = Announcement(title=title, content=content, creator_id=author.id)
+        db.session.add(announcement)
+        db.session.commit()
+        return announcement.id
+    return announce
+
+
+def titles(q, **options):
+    return [result['title'] for result in search.search(q, **options)]
+
+
+# 同一个词项同时满足多个词项组（输入联想时最后一个词总是按前缀匹配）
+@pytest.mark.parametrize('q', ['release', 'rel', 'release rel', 'release release', 'release '])
+def test_one_term_matching_several_groups(app, announce, q):
+    announce('release')
+    with app.test_request_context():
+        assert titles(q) == ['release']
+
+
+def test_prefix_terms(app, announce):
+    announce('release notes')
+    announce('relay station')
+    announce('reload')
+    with app.test_request_context():
+        assert sorted(titles('rel')) == ['relay station', 'release notes', 'reload']
+        assert titles('notes rel') == ['release notes']
+        assert titles('rela') == ['relay station']
+        assert titles('rel ') == []  # 以空格结尾时按完整词匹配
+        assert titles('relz') == []
+
+
+# 文档频率按命中的不同文档数计算：一篇文档的多个词项命中同一个前缀组只算一次
+def test_document_frequency_counts_documents(app, announce):
+    announce('release relay')
+    announce('other')
+    with app.test_request_context():
+        [result] = search.search('rel')
+    idf = math.log(1 + (2 - 1 + 0.5) / (1 + 0.5))
+    assert result['score'] == round(2 * 3 * idf, 4)  # release、relay 两个标题词项，权重各为 3
+
+
+# 检索按词项走倒排表主键，不能退化为按文档类型扫描整张倒排表
+def test_search_uses_term_index(app, announce):
+    announce('release notes')
+    statements = []
+
+    def collect(connection, cursor, statement, parameters, context, executemany):
+        if 'search_postings' in statement:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', collect)
+    try:
+        with app.test_request_context():
+            search.search('notes rel', types=['announcement', 'comment'])
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', collect)
+
+    assert statements
+    for statement, parameters in statements:
+        connection = db.session.connection()
+        plan = ' '.join(row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters))
+        assert 'sqlite_autoindex_search_postings_1' in plan
+        assert 'ix_search_postings_doc_id' not in plan
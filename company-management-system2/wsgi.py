@@ -0,0 +1,7 @@
+# WSGI 入口：gunicorn -c gunicorn.conf.py wsgi:app
+# 默认使用生产配置，可通过 FLASK_CONFIG 环境变量切换
+import os
+
+from app import create_app
+
+app = create_app(os.getenv('FLASK_CONFIG', 'production'))
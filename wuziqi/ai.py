@@ -0,0 +1,332 @@
+"""五子棋电脑棋手：迭代加深 alpha-beta 搜索，Zobrist 哈希置换表，只在已有棋子附近生成候选点，叶节点用棋型表增量评估。"""
+import threading
+import time
+from collections import namedtuple
+
+from engine import EMPTY
+from evaluation import PatternEvaluator
+from threats import ThreatSolver
+
+INFINITY = 10 ** 9
+WIN_SCORE = 10 ** 8
+WIN_THRESHOLD = WIN_SCORE - 1000  # 高于此值表示已找到必胜（分值越高胜得越快）
+
+# 置换表条目类型：精确值、下界（发生了 beta 截断）、上界（没有着法超过 alpha）
+EXACT, LOWER, UPPER = 0, 1, 2
+
+SearchResult = namedtuple('SearchResult', 'move score depth nodes elapsed')
+THINKING = object()  # BackgroundWorker.poll() 的返回值：仍在计算
+
+
+class SearchTimeout(Exception):
+    """搜索超过时间预算或被取消"""
+
+
+class TranspositionTable:
+    """固定容量的置换表：按哈希低位定位槽位，每个槽位只保存一条结果。
+
+    替换策略（深度优先 + 世代）：槽位为空、保存的是同一局面、旧结果来自之前的搜索、
+    或新结果的搜索深度不低于旧结果时才覆盖，保证表的内存占用有上限且深层结果不会被浅层结果挤掉。
+    """
+
+    def __init__(self, bits=18):
+        self.size = 1 << bits
+        self.mask = self.size - 1
+        self.keys = [0] * self.size
+        self.entries = [None] * self.size  # (深度, 分值, 类型, 最佳着法, 世代)
+        self.generation = 0
+
+    def new_search(self):
+        self.generation = (self.generation + 1) & 0xff
+
+    def clear(self):
+        self.keys = [0] * self.size
+        self.entries = [None] * self.size
+
+    def probe(self, key):
+        slot = key & self.mask
+        if self.keys[slot] == key:
+            return self.entries[slot]
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        slot = key & self.mask
+        entry = self.entries[slot]
+        if (entry is None or self.keys[slot] == key or entry[4] != self.generation
+                or depth >= entry[0]):
+            self.keys[slot] = key
+            self.entries[slot] = (depth, score, flag, move, self.generation)
+
+
+def _to_table(score, ply):
+    """必胜/必败分值与距根的步数有关，存表时换算为相对当前局面的步数"""
+    if score > WIN_THRESHOLD:
+        return score + ply
+    if score < -WIN_THRESHOLD:
+        return score - ply
+    return score
+
+
+def _from_table(score, ply):
+    if score > WIN_THRESHOLD:
+        return score - ply
+    if score < -WIN_THRESHOLD:
+        return score + ply
+    return score
+
+
+class Searcher:
+    """迭代加深 alpha-beta（negamax）搜索。
+
+    只考虑距已有棋子 radius 格以内的空点，按落子后己方棋型分的增量（进攻）加对方在此落子的增量（防守）排序，
+    取前 max_candidates 个；
+    置换表中的最佳着法排在最前。每一轮加深都复用置换表，超时后返回最后一轮完整搜索的结果。
+    搜索前先用 ThreatSolver 求 vcf_threats 步内的 VCF 和 vct_threats 步内的 VCT，找到必胜时直接返回（vcf_threats 为 0 时不求解）。
+    """
+
+    def __init__(self, table=None, radius=2, max_candidates=15, evaluator_class=PatternEvaluator,
+                 vcf_threats=12, vct_threats=4, solver_nodes=3000):
+        self.table = table if table is not None else TranspositionTable()
+        self.radius = radius
+        self.max_candidates = max_candidates
+        self.evaluator_class = evaluator_class
+        self.vcf_threats = vcf_threats
+        self.vct_threats = vct_threats
+        self.stop_event = threading.Event()
+        # 求解器与搜索共用停止事件和截止时间：stop() 同样能中止求解，求解用时计入本步的时限
+        self.solver = ThreatSolver(solver_nodes, stop_event=self.stop_event) if vcf_threats else None
+        self.state = None
+        self.evaluator = None
+        self.nodes = 0
+        self.deadline = float('inf')
+
+    def candidates(self, state, first=None):
+        player = state.to_move
+        gain = self.evaluator.move_gain
+        scored = sorted(
+            ((gain(index, player) * 2 + gain(index, 3 - player), index) for index in state.neighbors(self.radius)),
+            reverse=True
+        )
+        moves = [index for _, index in scored[:self.max_candidates]]
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        elif first is not None and state.cells[first] == EMPTY:
+            moves.insert(0, first)
+        return moves
+
+    def search(self, state, time_limit=1.0, max_depth=32, callback=None, start_depth=1):
+        """在 state 的副本上搜索，返回 SearchResult（move 为 (x, y)）；callback 在每完成一轮加深后调用。
+        start_depth 为迭代加深的起始深度（并行搜索中各辅助进程错开深度）"""
+        self.state = state = state.copy()
+        self.evaluator = self.evaluator_class(state)
+        self.table.new_search()
+        self.nodes = 0
+        started = time.perf_counter()
+        self.deadline = started + time_limit if time_limit else float('inf')
+        root_length = len(state.history)
+
+        moves = self.candidates(state)
+        result = SearchResult(state.coords(moves[0]) if moves else None, 0, 0, 0, 0.0)
+        if not moves or state.is_over():
+            return result
+        if self.solver is not None:
+            solved = self.solver.solve(state, self.vcf_threats, self.vct_threats, deadline=self.deadline)
+            if solved.move is not None:
+                plies = 2 * solved.threats + 1
+                return SearchResult(solved.move, WIN_SCORE - plies, plies, solved.nodes,
+                                    time.perf_counter() - started)
+        for depth in range(start_depth, max_depth + 1):
+            try:
+                score, best = self._root(depth, moves)
+            except SearchTimeout:
+                while len(state.history) > root_length:
+                    self.evaluator.unmake()
+                break
+            moves.remove(best)
+            moves.insert(0, best)
+            result = SearchResult(state.coords(best), score, depth, self.nodes, time.perf_counter() - started)
+            if callback is not None:
+                callback(result)
+            if abs(score) > WIN_THRESHOLD:
+                break
+        return result._replace(nodes=self.nodes, elapsed=time.perf_counter() - started)
+
+    def stop(self):
+        """中止正在进行的搜索（可从其他线程调用）；之后需 stop_event.clear() 才能再次搜索"""
+        self.stop_event.set()
+
+    def _check_time(self):
+        if time.perf_counter() > self.deadline or self.stop_event.is_set():
+            raise SearchTimeout()
+
+    def _root(self, depth, moves):
+        state = self.state
+        evaluator = self.evaluator
+        alpha = -INFINITY
+        best_move = moves[0]
+        for index in moves:
+            if evaluator.make(index):
+                score = WIN_SCORE - 1
+            else:
+                score = -self._negamax(depth - 1, -INFINITY, -alpha, 1)
+            evaluator.unmake()
+            if score > alpha:
+                alpha = score
+                best_move = index
+        self.table.store(state.hash, depth, alpha, EXACT, best_move)
+        return alpha, best_move
+
+    def _negamax(self, depth, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & 1023:
+            self._check_time()
+        state = self.state
+        evaluator = self.evaluator
+        if depth <= 0:
+            return evaluator.evaluate()
+
+        key = state.hash
+        entry = self.table.probe(key)
+        table_move = None
+        if entry is not None:
+            table_depth, table_score, flag, table_move, _ = entry
+            if table_depth >= depth:
+                table_score = _from_table(table_score, ply)
+                if flag == EXACT:
+                    return table_score
+                if flag == LOWER:
+                    alpha = max(alpha, table_score)
+                elif flag == UPPER:
+                    beta = min(beta, table_score)
+                if alpha >= beta:
+                    return table_score
+
+        moves = self.candidates(state, table_move)
+        if not moves:
+            return 0
+        original_alpha = alpha
+        best = -INFINITY
+        best_move = moves[0]
+        for index in moves:
+            if evaluator.make(index):
+                evaluator.unmake()
+                best, best_move = WIN_SCORE - ply - 1, index
+                break
+            score = -self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            evaluator.unmake()
+            if score > best:
+                best, best_move = score, index
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if best <= original_alpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.store(key, depth, _to_table(best, ply), flag, best_move)
+        return best
+
+
+class BackgroundWorker:
+    """在后台线程中计算，不阻塞 tkinter 事件循环：start() 开始计算，界面定时调用 poll() 取回结果。
+    子类提供 compute(state)、stop_event 和 stop()（置位 stop_event 并让计算尽快返回）"""
+
+    thread_name = 'wuziqi-worker'
+
+    def __init__(self):
+        self._thread = None
+        self._result = None
+        self._lock = threading.Lock()
+
+    @property
+    def thinking(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, state):
+        self.cancel()
+        self.stop_event.clear()
+        snapshot = state.copy()
+        self._thread = threading.Thread(target=self._run, args=(snapshot,), name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def _run(self, state):
+        result = self.compute(state)
+        with self._lock:
+            if not self.stop_event.is_set():
+                self._result = result
+
+    def poll(self):
+        """取走计算结果；仍在计算时返回 THINKING，没有在计算也没有结果（已取走或已取消）时返回 None"""
+        # 先看线程是否还在运行再取结果：线程先写入结果再退出，已退出时结果一定已经写入
+        alive = self.thinking
+        with self._lock:
+            result, self._result = self._result, None
+        if result is None and alive:
+            return THINKING
+        return result
+
+    def cancel(self):
+        if self.thinking:
+            self.stop()
+            self._thread.join()
+        self._result = None
+
+
+class AIPlayer(BackgroundWorker):
+    """在后台线程中搜索的电脑棋手，start() 开始思考，poll() 取回 SearchResult。
+    workers 大于 1 时使用多进程并行搜索"""
+
+    thread_name = 'wuziqi-ai'
+
+    def __init__(self, player, time_limit=1.0, workers=1, **options):
+        super().__init__()
+        self.player = player
+        self.time_limit = time_limit
+        if workers > 1:
+            from parallel import ParallelSearcher
+            self.searcher = ParallelSearcher(workers, **options)
+        else:
+            self.searcher = Searcher(**options)
+
+    @property
+    def stop_event(self):
+        return self.searcher.stop_event
+
+    def stop(self):
+        self.searcher.stop()
+
+    def compute(self, state):
+        return self.searcher.search(state, self.time_limit)
+
+    def close(self):
+        """停止思考并释放并行搜索的工作进程"""
+        self.cancel()
+        if hasattr(self.searcher, 'close'):
+            self.searcher.close()
+
+
+class HintSolver(BackgroundWorker):
+    """在后台线程中为轮到走棋的一方求解 VCF/VCT 必胜提示，start() 开始求解，poll() 取回 threats.SolveResult"""
+
+    thread_name = 'wuziqi-hint'
+
+    def __init__(self, max_threats=12, vct_threats=6, node_limit=5000):
+        super().__init__()
+        self.max_threats = max_threats
+        self.vct_threats = vct_threats
+        self.solver = ThreatSolver(node_limit)
+
+    @property
+    def stop_event(self):
+        return self.solver.stop_event
+
+    def stop(self):
+        self.solver.stop()
+
+    def compute(self, state):
+        return self.solver.solve(state, self.max_threats, self.vct_threats)
@@ -0,0 +1,116 @@
+"""搜索引擎速度基准：在一组固定局面上测量落子/悔棋速度、固定深度搜索的每秒节点数、限时搜索能达到的深度和必胜求解用时。
+指定 --workers 时比较 1 到 N 个进程并行搜索的加速比（固定深度用时）和限时搜索的深度增加。
+
+用法（在 wuziqi 目录下）:
+    python benchmark.py
+    python benchmark.py --depth 5 --time 3
+    python benchmark.py --workers 1,2,4,8
+"""
+import argparse
+import os
+import time
+
+from ai import Searcher, TranspositionTable
+from engine import GameState
+from parallel import ParallelSearcher
+from threats import ThreatSolver
+
+# 测试局面：黑先交替落子的 (x, y) 序列
+POSITIONS = {
+    '开局': [(7, 7), (8, 8), (8, 6)],
+    '活三': [(7, 7), (6, 6), (9, 9), (6, 7), (12, 3), (6, 8)],
+    '中盘': [(7, 7), (8, 8), (6, 8), (8, 6), (8, 7), (6, 7), (7, 6), (9, 7), (7, 8), (7, 9),
+            (7, 5), (7, 4), (6, 10), (9, 8), (8, 5), (9, 9)],
+    '冲四': [(7, 7), (0, 0), (8, 8), (0, 1), (5, 5), (0, 2), (9, 12), (0, 3)],
+}
+
+# 必胜求解测试局面：在上面的局面之外再加两个自对弈中出现的轮到走棋一方有 VCF / VCT 的局面
+SOLVER_POSITIONS = dict(POSITIONS, **{
+    'VCF': [(7, 7), (6, 7), (8, 8), (7, 8), (6, 6), (9, 9), (8, 6), (8, 9), (5, 5), (4, 4), (5, 6), (7, 6),
+            (5, 3), (9, 10), (10, 11), (5, 4), (6, 8), (5, 9), (6, 4), (6, 9), (7, 9), (9, 7)],
+    'VCT': [(7, 7), (6, 7), (6, 8), (7, 8), (8, 9), (6, 9), (8, 6), (5, 9), (8, 8), (8, 7), (9, 5), (10, 4),
+            (9, 6)],
+})
+
+
+def bench_make_unmake(rounds=2000):
+    """落子 + 悔棋的速度（含每步的胜负判断）"""
+    state = GameState.from_moves(POSITIONS['中盘'])
+    moves = state.neighbors(2)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for index in moves:
+            state.make(index)
+            state.unmake()
+    return rounds * len(moves) / (time.perf_counter() - started)
+
+
+def bench_parallel(workers_list, depth, time_limit):
+    """每种进程数在各局面上的固定深度用时和限时深度，返回 {进程数: (总用时, 平均深度, 节点/s)}"""
+    results = {}
+    for workers in workers_list:
+        with ParallelSearcher(workers) as searcher:
+            searcher.search(GameState.from_moves(POSITIONS['开局']), time_limit=None, max_depth=2)  # 启动进程池
+            elapsed = depths = nodes = 0
+            for moves in POSITIONS.values():
+                searcher.table.clear()
+                result = searcher.search(GameState.from_moves(moves), time_limit=None, max_depth=depth)
+                elapsed += result.elapsed
+            for moves in POSITIONS.values():
+                searcher.table.clear()
+                result = searcher.search(GameState.from_moves(moves), time_limit=time_limit)
+                depths += result.depth
+                nodes += result.nodes
+        results[workers] = (elapsed, depths / len(POSITIONS), nodes / (time_limit * len(POSITIONS)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='五子棋搜索引擎速度基准')
+    parser.add_argument('--depth', type=int, default=4, help='固定深度搜索的深度')
+    parser.add_argument('--time', type=float, default=2.0, help='限时搜索每个局面的时间（秒）')
+    parser.add_argument('--vct', type=int, default=4, help='必胜求解的 VCT 步数')
+    parser.add_argument('--workers', help=f'并行搜索的进程数列表，如 1,2,4（本机 {os.cpu_count()} 核）')
+    args = parser.parse_args()
+
+    if args.workers:
+        workers_list = sorted({int(value) for value in args.workers.split(',')} | {1})
+        results = bench_parallel(workers_list, args.depth, args.time)
+        base_elapsed, base_depth, _ = results[1]
+        print(f'并行搜索（固定深度 {args.depth} 的总用时；限时 {args.time} s 的平均深度）:')
+        print(f'  {"进程数":<4} {"用时":>8} {"加速比":>6} {"平均深度":>8} {"深度增加":>8} {"节点/s":>10}')
+        for workers, (elapsed, depth, rate) in results.items():
+            print(f'  {workers:<7} {elapsed:7.2f}s {base_elapsed / elapsed:8.2f} {depth:11.2f} '
+                  f'{depth - base_depth:+11.2f} {rate:12,.0f}')
+        return
+
+    print(f'落子+悔棋: {bench_make_unmake():,.0f} 次/s\n')
+
+    total_nodes = total_elapsed = 0
+    print(f'固定深度 {args.depth}:')
+    for name, moves in POSITIONS.items():
+        searcher = Searcher(TranspositionTable())
+        result = searcher.search(GameState.from_moves(moves), time_limit=None, max_depth=args.depth)
+        total_nodes += result.nodes
+        total_elapsed += result.elapsed
+        print(f'  {name:<6} 着法 {result.move}  分值 {result.score:>10}  {result.nodes:>8} 节点  '
+              f'{result.elapsed:6.2f} s  {result.nodes / result.elapsed:8,.0f} 节点/s')
+    print(f'  合计 {total_nodes / total_elapsed:,.0f} 节点/s\n')
+
+    print(f'必胜求解（VCF 12 步 + VCT {args.vct} 步）:')
+    for name, moves in SOLVER_POSITIONS.items():
+        result = ThreatSolver().solve(GameState.from_moves(moves), 12, args.vct)
+        found = f'{"VCT" if result.vct else "VCF"} {result.threats} 步，先走 {result.move}' if result.move else '无'
+        print(f'  {name:<6} {found:<20} {result.nodes:>8} 节点  {result.elapsed * 1000:8.1f} ms')
+    print()
+
+    print(f'限时 {args.time} s:')
+    for name, moves in POSITIONS.items():
+        searcher = Searcher(TranspositionTable())
+        result = searcher.search(GameState.from_moves(moves), time_limit=args.time)
+        print(f'  {name:<6} 着法 {result.move}  深度 {result.depth:>2}  {result.nodes:>8} 节点  '
+              f'{result.nodes / result.elapsed:8,.0f} 节点/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""五子棋无界面对局引擎：棋盘状态、落子/悔棋和胜负判断，可供界面、搜索和测试共同使用。"""
+import random
+
+EMPTY = 0
+BLACK = 1
+WHITE = 2
+BORDER = 3  # 棋盘外的哨兵格
+
+COLOR_NAMES = {BLACK: 'black', WHITE: 'white'}
+
+PADDING = 2  # 每行末尾的哨兵列数，也是 neighbors() 支持的最大半径（位移不会跨行绕回棋盘内）
+ZOBRIST_SEED = 20240731  # 固定种子：不同进程算出的局面哈希一致，置换表可以跨进程共享
+_zobrist_cache = {}
+
+
+def zobrist_keys(length, seed=ZOBRIST_SEED):
+    """每个下标、每一方一个 64 位随机数；keys[player][index]"""
+    keys = _zobrist_cache.get((length, seed))
+    if keys is None:
+        rng = random.Random(seed)
+        keys = [[0] * length,
+                [rng.getrandbits(64) for _ in range(length)],
+                [rng.getrandbits(64) for _ in range(length)]]
+        _zobrist_cache[(length, seed)] = keys
+    return keys
+
+
+def opponent(player):
+    """返回对手（黑白互换）"""
+    return 3 - player
+
+
+class GameState:
+    """对局状态。
+
+    棋盘按一维下标存储：每行末尾多留 PADDING 个哨兵格，上下各留一行哨兵，
+    这样沿四个方向（步长 1、stride、stride+1、stride-1）走出棋盘时一定会碰到哨兵格，无需边界判断。
+    cells 为每格一个字节的棋盘（EMPTY/BLACK/WHITE/BORDER），bits[player] 为该方棋子的位棋盘（Python 整数，
+    第 i 位对应下标 i），用于求邻域；hash 为随落子增量更新的 Zobrist 哈希。
+    """
+
+    def __init__(self, size=15, win_length=5):
+        if size < win_length:
+            raise ValueError(f'棋盘尺寸 {size} 小于连珠长度 {win_length}')
+        self.size = size
+        self.win_length = win_length
+        self.stride = size + PADDING
+        self.directions = (1, self.stride, self.stride + 1, self.stride - 1)
+        # 各邻域半径内的正向位移量（反向位移即右移）
+        self.offsets = {radius: [dy * self.stride + dx for dy in range(radius + 1)
+                                 for dx in range(-radius, radius + 1) if dy > 0 or dx > 0]
+                        for radius in range(1, PADDING + 1)}
+        self.cells = bytearray([BORDER]) * ((size + 2) * self.stride)
+        for y in range(size):
+            start = self.index(0, y)
+            self.cells[start:start + size] = bytes(size)
+        self.board_mask = sum(1 << i for i, cell in enumerate(self.cells) if cell == EMPTY)
+        self.zobrist = zobrist_keys(len(self.cells))
+        self.hash = 0
+        self.bits = [0, 0, 0]
+        self.history = []  # 已落子的下标，按落子顺序
+        self.to_move = BLACK
+        self.winner = None
+        self._winners = []  # 每一步落子后的 winner，悔棋时恢复
+
+    def index(self, x, y):
+        """交点 (x 列, y 行) 对应的一维下标"""
+        return (y + 1) * self.stride + x
+
+    def coords(self, index):
+        """一维下标对应的交点 (x 列, y 行)"""
+        y, x = divmod(index, self.stride)
+        return x, y - 1
+
+    def on_board(self, x, y):
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    def get(self, x, y):
+        return self.cells[self.index(x, y)]
+
+    @property
+    def move_count(self):
+        return len(self.history)
+
+    @property
+    def last_move(self):
+        return self.history[-1] if self.history else None
+
+    def is_full(self):
+        return len(self.history) == self.size * self.size
+
+    def is_over(self):
+        return self.winner is not None or self.is_full()
+
+    def empty_cells(self):
+        """全部空交点的下标"""
+        cells = self.cells
+        return [i for i in range(len(cells)) if cells[i] == EMPTY]
+
+    def neighbors(self, radius=2):
+        """距已有棋子不超过 radius 格（含斜向）的空交点下标；空棋盘返回天元。
+        用位棋盘整体位移求邻域，代价与棋子数无关"""
+        occupied = self.bits[BLACK] | self.bits[WHITE]
+        if not occupied:
+            return [self.index(self.size // 2, self.size // 2)]
+        area = 0
+        if not 1 <= radius <= PADDING:
+            raise ValueError(f'邻域半径需在 1 到 {PADDING} 之间')
+        for shift in self.offsets[radius]:
+            area |= (occupied << shift) | (occupied >> shift)
+        area &= self.board_mask & ~occupied
+        result = []
+        while area:
+            low = area & -area
+            result.append(low.bit_length() - 1)
+            area ^= low
+        return result
+
+    def line_length(self, index, step, player):
+        """经过 index 沿 ±step 方向与 player 同色的连续棋子数（index 本身视为 player 的棋子）"""
+        cells = self.cells
+        count = 1
+        i = index + step
+        while cells[i] == player:
+            count += 1
+            i += step
+        i = index - step
+        while cells[i] == player:
+            count += 1
+            i -= step
+        return count
+
+    def is_win(self, index, player):
+        """在 index 落下 player 的棋子后是否成五：只检查经过该点的四条线，每个方向走到第一个非 player 的格（空点、对方棋子或哨兵）为止"""
+        for step in self.directions:
+            if self.line_length(index, step, player) >= self.win_length:
+                return True
+        return False
+
+    def make(self, index):
+        """落子（不做合法性检查，供搜索使用）；返回这一步是否获胜"""
+        player = self.to_move
+        self.cells[index] = player
+        self.bits[player] |= 1 << index
+        self.hash ^= self.zobrist[player][index]
+        self.history.append(index)
+        self._winners.append(self.winner)
+        self.to_move = 3 - player
+        if self.is_win(index, player):
+            self.winner = player
+            return True
+        return False
+
+    def unmake(self):
+        """撤销最后一步，返回被撤销的下标"""
+        index = self.history.pop()
+        player = self.cells[index]
+        self.cells[index] = EMPTY
+        self.bits[player] &= ~(1 << index)
+        self.hash ^= self.zobrist[player][index]
+        self.to_move = player
+        self.winner = self._winners.pop()
+        return index
+
+    def play(self, x, y):
+        """带检查的落子（供界面使用）；返回获胜方，未分胜负时返回 None"""
+        if self.winner is not None:
+            raise ValueError('对局已经结束')
+        if not self.on_board(x, y):
+            raise ValueError(f'({x}, {y}) 不在棋盘上')
+        index = self.index(x, y)
+        if self.cells[index] != EMPTY:
+            raise ValueError(f'({x}, {y}) 已有棋子')
+        self.make(index)
+        return self.winner
+
+    def undo(self):
+        """悔一步棋，返回被撤销的交点 (x, y)；没有可悔的棋时返回 None"""
+        if not self.history:
+            return None
+        return self.coords(self.unmake())
+
+    def moves(self):
+        """已落子的交点序列 [(x, y, player)]"""
+        return [self.coords(index) + (self.cells[index],) for index in self.history]
+
+    def copy(self):
+        state = GameState.__new__(GameState)
+        state.__dict__.update(self.__dict__)
+        state.cells = bytearray(self.cells)
+        state.bits = list(self.bits)
+        state.history = list(self.history)
+        state._winners = list(self._winners)
+        return state
+
+    @classmethod
+    def from_moves(cls, moves, size=15, win_length=5):
+        """按 [(x, y)] 依次落子构造局面（黑先，交替落子）"""
+        state = cls(size, win_length)
+        for x, y in moves:
+            state.play(x, y)
+        return state
+
+    def __str__(self):
+        symbols = {EMPTY: '.', BLACK: 'X', WHITE: 'O'}
+        return '\n'.join(
+            ' '.join(symbols[self.get(x, y)] for x in range(self.size)) for y in range(self.size)
+        )
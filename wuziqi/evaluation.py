@@ -0,0 +1,269 @@
+"""按棋型查表的局面评估：每条横线、竖线和斜线编码为整数，用预先计算的棋型表给活四、冲四、活三、眠三、活二、眠二计分。
+
+对某一方来说，一条线被对方棋子和棋盘边缘切成若干"段"，段内只有己方棋子和空位，棋型只取决于段长和段内己方棋子的位置，
+因此按 (段长, 己方棋子位掩码) 预先算出每一段的棋型即可查表。落子只会改变经过该点的四条线，评估器只重算这四条线。
+"""
+from engine import EMPTY, BLACK, WHITE, BORDER
+
+try:
+    import numpy as np
+except ImportError:  # 批量评估需要 NumPy，单局面评估不需要
+    np = None
+
+NONE, TWO, OPEN_TWO, THREE, OPEN_THREE, FOUR, OPEN_FOUR, FIVE = range(8)
+SHAPE_NAMES = ['无', '眠二', '活二', '眠三', '活三', '冲四', '活四', '五连']
+SHAPE_SCORES = [0, 10, 100, 100, 5000, 5000, 100000, 1000000]
+
+WIN_LENGTH = 5
+LINE_CACHE_LIMIT = 1 << 20
+
+_segment_shapes = {}
+_segment_scores = {}
+_line_cache = {}
+_geometries = {}
+
+
+def _has_five(mask):
+    return mask & (mask >> 1) & (mask >> 2) & (mask >> 3) & (mask >> 4)
+
+
+def segment_shapes(length):
+    """长度为 length 的段内每种己方棋子掩码对应的棋型（bytearray，下标为掩码）。
+
+    按棋子数从多到少计算，再落一子后的棋型已在表中：
+    一步成五的空位有两个以上为活四、一个为冲四；再落一子能成活四为活三、成冲四为眠三；能成活三为活二、成眠三为眠二。
+    """
+    shapes = _segment_shapes.get(length)
+    if shapes is not None:
+        return shapes
+    shapes = bytearray(1 << length)
+    full = (1 << length) - 1
+    for mask in sorted(range(1 << length), key=lambda value: -bin(value).count('1')):
+        if _has_five(mask):
+            shapes[mask] = FIVE
+            continue
+        empty = full & ~mask
+        best = NONE
+        wins = 0
+        while empty:
+            low = empty & -empty
+            empty ^= low
+            after = shapes[mask | low]
+            if after == FIVE:
+                wins += 1
+            elif after == OPEN_FOUR:
+                best = max(best, OPEN_THREE)
+            elif after == FOUR:
+                best = max(best, THREE)
+            elif after == OPEN_THREE:
+                best = max(best, OPEN_TWO)
+            elif after == THREE:
+                best = max(best, TWO)
+        if wins >= 2:
+            best = OPEN_FOUR
+        elif wins == 1:
+            best = FOUR
+        shapes[mask] = best
+    _segment_shapes[length] = shapes
+    _segment_scores[length] = [SHAPE_SCORES[shape] for shape in shapes]
+    return shapes
+
+
+def segment_scores(length):
+    if length not in _segment_scores:
+        segment_shapes(length)
+    return _segment_scores[length]
+
+
+def line_score(own, blocked, length):
+    """一条线上某一方的棋型分：own 为己方棋子位掩码，blocked 为对方棋子位掩码，length 为线长"""
+    key = own | (blocked << 64) | (length << 128)
+    score = _line_cache.get(key)
+    if score is not None:
+        return score
+    score = 0
+    free = ~blocked & ((1 << length) - 1)
+    while free:
+        start = (free & -free).bit_length() - 1
+        run = free >> start
+        size = (run ^ (run + 1)).bit_length() - 1  # 从 start 起连续空闲（非对方棋子）的格数
+        if size >= WIN_LENGTH:
+            score += segment_scores(size)[(own >> start) & ((1 << size) - 1)]
+        free &= ~(((1 << size) - 1) << start)
+    if len(_line_cache) >= LINE_CACHE_LIMIT:
+        _line_cache.clear()
+    _line_cache[key] = score
+    return score
+
+
+class Geometry:
+    """棋盘上所有长度不小于 5 的线：lines[i] 为第 i 条线依次经过的下标，cell_lines[下标] 为经过该点的 (线号, 位号)"""
+
+    def __init__(self, state):
+        cells = state.cells
+        self.lines = []
+        for step in state.directions:
+            for start in range(len(cells)):
+                if cells[start] == BORDER or cells[start - step] != BORDER:
+                    continue
+                line = []
+                index = start
+                while cells[index] != BORDER:
+                    line.append(index)
+                    index += step
+                if len(line) >= WIN_LENGTH:
+                    self.lines.append(line)
+        self.lengths = [len(line) for line in self.lines]
+        self.cell_lines = {}
+        for line_id, line in enumerate(self.lines):
+            for position, index in enumerate(line):
+                self.cell_lines.setdefault(index, []).append((line_id, position))
+        for length in set(self.lengths):
+            segment_shapes(length)
+
+
+def geometry(state):
+    key = (state.size, state.stride)
+    if key not in _geometries:
+        _geometries[key] = Geometry(state)
+    return _geometries[key]
+
+
+class PatternEvaluator:
+    """增量评估器：与一个 GameState 绑定，通过 make/unmake 落子和悔棋，只重算经过该点的四条线。
+
+    totals[player] 为该方全部线的棋型分之和；evaluate() 站在轮到走棋的一方返回双方之差。
+    """
+
+    def __init__(self, state):
+        self.state = state
+        self.geometry = geometry(state)
+        count = len(self.geometry.lines)
+        self.line_bits = [None, [0] * count, [0] * count]
+        self.line_scores = [None, [0] * count, [0] * count]
+        self.totals = [0, 0, 0]
+        for index in state.history:
+            self._update(index, state.cells[index], True)
+
+    def _update(self, index, player, placed):
+        geometry = self.geometry
+        black_bits, white_bits = self.line_bits[BLACK], self.line_bits[WHITE]
+        own_bits = self.line_bits[player]
+        black_scores, white_scores = self.line_scores[BLACK], self.line_scores[WHITE]
+        totals = self.totals
+        for line_id, position in geometry.cell_lines[index]:
+            if placed:
+                own_bits[line_id] |= 1 << position
+            else:
+                own_bits[line_id] &= ~(1 << position)
+            length = geometry.lengths[line_id]
+            black = line_score(black_bits[line_id], white_bits[line_id], length)
+            white = line_score(white_bits[line_id], black_bits[line_id], length)
+            totals[BLACK] += black - black_scores[line_id]
+            totals[WHITE] += white - white_scores[line_id]
+            black_scores[line_id] = black
+            white_scores[line_id] = white
+
+    def make(self, index):
+        """落子并更新评估，返回这一步是否获胜"""
+        player = self.state.to_move
+        won = self.state.make(index)
+        self._update(index, player, True)
+        return won
+
+    def unmake(self):
+        index = self.state.unmake()
+        self._update(index, self.state.to_move, False)
+        return index
+
+    def evaluate(self):
+        player = self.state.to_move
+        return self.totals[player] - self.totals[3 - player]
+
+    def move_gain(self, index, player):
+        """player 在空点 index 落子后，经过该点的各线上该方棋型分的增加量（用于着法排序：己方为进攻分，对方为防守分）"""
+        geometry = self.geometry
+        own_bits = self.line_bits[player]
+        other_bits = self.line_bits[3 - player]
+        scores = self.line_scores[player]
+        gain = 0
+        for line_id, position in geometry.cell_lines[index]:
+            gain += line_score(own_bits[line_id] | (1 << position), other_bits[line_id],
+                               geometry.lengths[line_id]) - scores[line_id]
+        return gain
+
+
+def evaluate(state):
+    """单个局面的评估（站在轮到走棋的一方）；搜索中应使用 PatternEvaluator 增量更新"""
+    return PatternEvaluator(state).evaluate()
+
+
+class BatchEvaluator:
+    """用 NumPy 一次评估多个同尺寸棋盘（自对弈、生成训练数据），结果与 PatternEvaluator 一致。
+
+    所有线补齐到相同长度（两端和较短斜线的空缺用边界填充），对每种可能的 (起点, 段长) 组合
+    判断它是否为一个完整的段，再用段内己方棋子掩码查棋型分表，全部运算都是整批数组运算。
+    """
+
+    def __init__(self, size=15):
+        if np is None:
+            raise RuntimeError('批量评估需要安装 NumPy')
+        if size > 61:
+            raise ValueError('批量评估支持的最大棋盘尺寸为 61')
+        from engine import GameState
+        state = GameState(size)
+        self.size = size
+        lines = geometry(state).lines
+        width = max(len(line) for line in lines) + 2
+        # gather[i, j]：第 i 条线第 j 格在"行优先、末尾追加一个边界格"的扁平棋盘中的位置
+        border = size * size
+        gather = np.full((len(lines), width), border, dtype=np.intp)
+        for line_id, line in enumerate(lines):
+            for position, index in enumerate(line):
+                x, y = state.coords(index)
+                gather[line_id, position + 1] = y * size + x
+        self.gather = gather
+        self.width = width
+        self.combos = [(start, length) for length in range(WIN_LENGTH, width - 1)
+                       for start in range(1, width - length)]
+        self.tables = {length: np.array(segment_scores(length), dtype=np.int64)
+                       for length in range(WIN_LENGTH, width - 1)}
+
+    def scores(self, boards):
+        """boards 为 (N, size, size) 的数组（0 空，1 黑，2 白），返回 (N, 3) 的各方棋型分，第 0 列为 0"""
+        boards = np.asarray(boards, dtype=np.int8).reshape(len(boards), -1)
+        padded = np.concatenate([boards, np.full((len(boards), 1), BORDER, dtype=np.int8)], axis=1)
+        lines = padded[:, self.gather]  # (N, 线数, width)
+        weights = np.left_shift(np.int64(1), np.arange(self.width, dtype=np.int64))
+        result = np.zeros((len(boards), 3), dtype=np.int64)
+        for player in (BLACK, WHITE):
+            own = lines == player
+            blocked = ~own & (lines != EMPTY)
+            own_keys = (own * weights).sum(axis=-1)
+            blocked_prefix = np.concatenate(
+                [np.zeros(blocked.shape[:-1] + (1,), dtype=np.int64), np.cumsum(blocked, axis=-1)], axis=-1
+            )
+            total = np.zeros(own_keys.shape, dtype=np.int64)
+            for start, length in self.combos:
+                segment = (blocked[..., start - 1] & blocked[..., start + length]
+                           & (blocked_prefix[..., start + length] == blocked_prefix[..., start]))
+                masks = (own_keys >> start) & ((1 << length) - 1)
+                total += np.where(segment, self.tables[length][masks], 0)
+            result[:, player] = total.sum(axis=-1)
+        return result
+
+    def evaluate(self, boards, to_move):
+        """各棋盘站在 to_move（长度 N 的数组或单个值）一方的评估值"""
+        scores = self.scores(boards)
+        to_move = np.broadcast_to(np.asarray(to_move), (len(scores),))
+        rows = np.arange(len(scores))
+        return scores[rows, to_move] - scores[rows, 3 - to_move]
+
+
+def board_array(state):
+    """GameState 转为 (size, size) 的 NumPy 数组，供 BatchEvaluator 使用"""
+    board = np.zeros((state.size, state.size), dtype=np.int8)
+    for index in state.history:
+        x, y = state.coords(index)
+        board[y, x] = state.cells[index]
+    return board
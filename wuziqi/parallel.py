@@ -0,0 +1,153 @@
+"""多进程并行搜索（Lazy SMP）：各进程搜索同一局面，通过共享内存中的置换表互相利用对方的结果。
+
+主进程中的搜索器和 workers - 1 个辅助进程同时对根局面做迭代加深，辅助进程错开起始深度、打乱根着法顺序，
+从而先走到不同的分支；任何进程存入置换表的结果（截断界、最佳着法）都会被其他进程直接用上。
+结果取完成深度最大的一个（深度相同时取主进程的）。
+"""
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from ai import Searcher
+
+SCORE_OFFSET = 1 << 31
+MOVE_MASK = (1 << 14) - 1
+
+_worker_searcher = None  # 辅助进程内的搜索器，由 _init_worker 创建
+
+
+class SharedTranspositionTable:
+    """放在共享内存中的置换表，接口与 ai.TranspositionTable 相同，可被多个进程同时读写。
+
+    每个槽位两个 64 位整数：条目打包后的数据 data，以及 key ^ data。读出时用 key ^ data 还原哈希并与
+    要查的局面比较，两个字写入之间被其他进程插入的"半条"条目校验不通过，当作未命中（无锁哈希表），
+    因此不需要跨进程加锁。data 的布局：分值（加偏移）32 位、深度 8 位、类型 2 位、着法 14 位、世代 8 位。
+    """
+
+    def __init__(self, bits=18, array=None):
+        self.size = 1 << bits
+        self.mask = self.size - 1
+        # RawArray 在 fork/spawn 时随进程参数传给子进程，各进程映射的是同一块内存
+        self.array = array if array is not None else multiprocessing.RawArray('Q', self.size * 2)
+        self.slots = memoryview(self.array).cast('B').cast('Q')
+        self.generation = 0
+
+    def new_search(self):
+        self.generation = (self.generation + 1) & 0xff
+
+    def clear(self):
+        self.slots[:] = memoryview(bytes(self.size * 16)).cast('Q')
+
+    def probe(self, key):
+        slot = (key & self.mask) << 1
+        data = self.slots[slot + 1]
+        if not data or self.slots[slot] ^ data != key:
+            return None
+        return ((data >> 32) & 0xff, (data & 0xffffffff) - SCORE_OFFSET, (data >> 40) & 3,
+                (data >> 42) & MOVE_MASK, data >> 56)
+
+    def store(self, key, depth, score, flag, move):
+        slot = (key & self.mask) << 1
+        old = self.slots[slot + 1]
+        if (old and self.slots[slot] ^ old != key and old >> 56 == self.generation
+                and depth < (old >> 32) & 0xff):
+            return
+        data = ((score + SCORE_OFFSET) | depth << 32 | flag << 40 | move << 42 | self.generation << 56)
+        self.slots[slot + 1] = data
+        self.slots[slot] = key ^ data
+
+
+class HelperSearcher(Searcher):
+    """辅助进程的搜索器：奇数号从深度 2 开始迭代加深，根节点除前两个以外的候选着法按编号打乱，
+    使各进程先搜索不同的分支，而不是重复主进程的工作"""
+
+    def __init__(self, table=None, **options):
+        super().__init__(table, **options)
+        self.random = random.Random()
+        self.root_length = None
+
+    def candidates(self, state, first=None):
+        moves = super().candidates(state, first)
+        if len(state.history) == self.root_length:
+            tail = moves[2:]
+            self.random.shuffle(tail)
+            moves[2:] = tail
+        return moves
+
+    def search(self, state, time_limit=1.0, max_depth=32, callback=None, helper_id=1):
+        self.random.seed(helper_id)
+        self.root_length = len(state.history)
+        return super().search(state, time_limit, max_depth, callback, start_depth=1 + helper_id % 2)
+
+
+def _init_worker(array, bits, stop_event, options):
+    global _worker_searcher
+    _worker_searcher = HelperSearcher(SharedTranspositionTable(bits, array), **options)
+    _worker_searcher.stop_event = stop_event
+    if _worker_searcher.solver is not None:
+        _worker_searcher.solver.stop_event = stop_event
+
+
+def _helper_search(state, time_limit, max_depth, helper_id, generation):
+    searcher = _worker_searcher
+    searcher.table.generation = (generation - 1) & 0xff  # search() 中 new_search() 后与主进程同一世代
+    return searcher.search(state, time_limit, max_depth, helper_id=helper_id)
+
+
+class ParallelSearcher:
+    """Lazy SMP 并行搜索器，接口与 ai.Searcher 相同（search/stop/stop_event/table），可直接用于 AIPlayer。
+
+    workers 为参与搜索的进程数（含主进程，默认为 CPU 核数）；workers 为 1 时不创建进程池，
+    等同于使用共享置换表的单进程搜索。用完后调用 close() 释放进程池。
+    """
+
+    def __init__(self, workers=None, table_bits=18, **options):
+        self.workers = workers or os.cpu_count() or 1
+        self.table = SharedTranspositionTable(table_bits)
+        self.searcher = Searcher(self.table, **options)
+        self.stop_event = self.searcher.stop_event
+        context = multiprocessing.get_context()
+        self._helpers_stop = context.Event()
+        self.pool = None
+        if self.workers > 1:
+            self.pool = ProcessPoolExecutor(self.workers - 1, mp_context=context, initializer=_init_worker,
+                                            initargs=(self.table.array, table_bits, self._helpers_stop, options))
+
+    def search(self, state, time_limit=1.0, max_depth=32, callback=None):
+        """主进程搜索的同时在辅助进程中搜索同一局面；主进程结束后通知辅助进程停止，
+        返回完成深度最大的结果，nodes 为所有进程的节点数之和"""
+        self._helpers_stop.clear()
+        generation = (self.table.generation + 1) & 0xff
+        futures = []
+        if self.pool is not None:
+            futures = [self.pool.submit(_helper_search, state, time_limit, max_depth, helper_id, generation)
+                       for helper_id in range(1, self.workers)]
+        try:
+            result = self.searcher.search(state, time_limit, max_depth, callback)
+        finally:
+            self._helpers_stop.set()
+        nodes = result.nodes
+        for future in futures:
+            helper = future.result()
+            nodes += helper.nodes
+            if helper.move is not None and helper.depth > result.depth:
+                result = helper
+        return result._replace(nodes=nodes)
+
+    def stop(self):
+        """中止正在进行的搜索（可从其他线程调用）"""
+        self.stop_event.set()
+        self._helpers_stop.set()
+
+    def close(self):
+        if self.pool is not None:
+            self._helpers_stop.set()
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
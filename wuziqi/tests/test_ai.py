@@ -0,0 +1,33 @@
+from ai import Searcher, TranspositionTable
+from benchmark import SOLVER_POSITIONS
+from engine import GameState
+
+
+def vcf_state():
+    return GameState.from_moves(SOLVER_POSITIONS['VCF'])
+
+
+# 正常搜索时先由必胜求解直接给出 VCF 的第一步
+def test_search_returns_solver_win():
+    result = Searcher(TranspositionTable()).search(vcf_state(), time_limit=None, max_depth=2)
+    assert result.move == (7, 5) and result.depth == 13
+
+
+# stop() 也中止搜索前的必胜求解
+def test_stop_interrupts_solver():
+    searcher = Searcher(TranspositionTable())
+    searcher.stop()
+    assert searcher.solver.stop_event is searcher.stop_event
+    searcher.search(vcf_state(), time_limit=None, max_depth=2)
+    assert searcher.solver.nodes == 1
+    searcher.stop_event.clear()
+    assert searcher.search(vcf_state(), time_limit=None, max_depth=2).move == (7, 5)
+
+
+# 必胜求解计入本步时限：时限用完时求解在第一个节点就放弃
+def test_solver_respects_time_limit():
+    searcher = Searcher(TranspositionTable())
+    result = searcher.search(vcf_state(), time_limit=1e-9)
+    assert searcher.solver.nodes == 1
+    assert result.depth < 13
+
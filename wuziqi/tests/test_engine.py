@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+from engine import BLACK, EMPTY, WHITE, GameState
+
+
+def line(start, step, count):
+    x, y = start
+    dx, dy = step
+    return [(x + k * dx, y + k * dy) for k in range(count)]
+
+
+def build(black, white):
+    """黑白交替落子：black 比 white 多一子或一样多"""
+    moves = []
+    for index, point in enumerate(black):
+        moves.append(point)
+        if index < len(white):
+            moves.append(white[index])
+    return GameState.from_moves(moves)
+
+
+def scattered(exclude, count):
+    """count 个互不相邻（坐标都是偶数）且不在 exclude 中的交点，用作不成棋型的陪衬子"""
+    points = [(x, y) for y in range(0, 15, 2) for x in range(0, 15, 2) if (x, y) not in exclude]
+    return points[:count]
+
+
+# 四个方向各自成五，最后一子落下时才判胜
+@pytest.mark.parametrize('start, step', [
+    ((3, 7), (1, 0)),
+    ((7, 3), (0, 1)),
+    ((3, 3), (1, 1)),
+    ((11, 3), (-1, 1)),
+])
+def test_five_in_each_direction(start, step):
+    black = line(start, step, 5)
+    state = build(black[:4], scattered(black, 4))
+    assert state.winner is None
+    assert state.play(*black[4]) == BLACK
+    assert state.is_over()
+
+
+# 贴着四条边和角上的五连也能判出，且不会跨行绕回另一侧
+@pytest.mark.parametrize('start, step', [
+    ((0, 0), (1, 0)),
+    ((10, 14), (1, 0)),
+    ((0, 10), (0, 1)),
+    ((14, 0), (0, 1)),
+    ((10, 10), (1, 1)),
+    ((4, 10), (-1, 1)),
+])
+def test_five_at_board_edge(start, step):
+    black = line(start, step, 5)
+    state = build(black, scattered(black, 4))
+    assert state.winner == BLACK
+
+
+# 跨越行尾的"一行"不算连续：第 0 行最后两格和第 1 行最前三格
+def test_no_wrap_around_row_end():
+    black = [(13, 0), (14, 0), (0, 1), (1, 1), (2, 1)]
+    state = build(black, scattered(black, 4))
+    assert state.winner is None
+
+
+# 被对方棋子隔断的两段不连起来算；填上中间一点成六（长连）也算赢
+def test_blocked_line_and_overline():
+    black = [(0, 9), (1, 9), (2, 9), (4, 9), (5, 9)]
+    state = build(black, [(3, 9)] + scattered(black + [(3, 9)], 3))
+    assert state.winner is None
+    assert state.line_length(state.index(2, 9), 1, BLACK) == 3
+    state = build(black, scattered(black + [(3, 9)], 4))
+    assert state.winner is None
+    assert state.is_win(state.index(3, 9), BLACK)
+    assert not state.is_win(state.index(3, 9), WHITE)
+    state.play(*scattered(black + [(3, 9)], 5)[4])
+    assert state.play(3, 9) == BLACK
+    assert state.line_length(state.index(3, 9), 1, BLACK) == 6
+
+
+# 随机对局中每一步 make 后 unmake 都恢复 cells、bits、hash 和 winner
+def test_make_unmake_restores_state():
+    rng = random.Random(1)
+    for _ in range(20):
+        state = GameState()
+        snapshots = []
+        while not state.is_over():
+            snapshots.append((bytes(state.cells), list(state.bits), state.hash, state.winner, state.to_move))
+            state.make(rng.choice(state.neighbors(2)))
+        assert state.winner is not None or state.is_full()
+        while state.history:
+            state.unmake()
+            assert (bytes(state.cells), state.bits, state.hash, state.winner, state.to_move) == snapshots.pop()
+        assert state.hash == 0 and state.bits == [0, 0, 0]
+        assert all(cell != BLACK and cell != WHITE for cell in state.cells)
+
+
+# 哈希只取决于局面，与落子顺序无关
+def test_hash_independent_of_move_order():
+    moves = [(7, 7), (8, 8), (6, 6), (9, 9), (5, 5)]
+    first = GameState.from_moves(moves)
+    second = GameState.from_moves([moves[i] for i in (4, 1, 2, 3, 0)])
+    assert first.hash == second.hash
+    assert first.hash != GameState.from_moves(moves[:4]).hash
+
+
+def test_play_rejects_illegal_moves():
+    state = GameState.from_moves([(7, 7)])
+    with pytest.raises(ValueError):
+        state.play(7, 7)
+    with pytest.raises(ValueError):
+        state.play(15, 0)
+    assert state.get(7, 7) == BLACK and state.get(0, 0) == EMPTY
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from engine import GameState
+from evaluation import BatchEvaluator, PatternEvaluator, board_array, evaluate, np
+
+
+def random_games(count, seed=7):
+    """count 局随机对局（只在已有棋子附近落子），逐步产出 (评估器, 局面)，增量评估器一路跟着 make"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        state = GameState()
+        evaluator = PatternEvaluator(state)
+        while not state.is_over():
+            evaluator.make(rng.choice(state.neighbors(2)))
+            yield evaluator, state
+
+
+# 增量更新的分数与从头重算一致，悔棋回到空棋盘后各项归零
+def test_incremental_matches_full_evaluation():
+    evaluators = []
+    for evaluator, state in random_games(60):
+        assert evaluator.evaluate() == evaluate(state)
+        if state.is_over():
+            evaluators.append(evaluator)
+    assert len(evaluators) == 60
+    for evaluator in evaluators[:10]:
+        while evaluator.state.history:
+            evaluator.unmake()
+            assert evaluator.evaluate() == evaluate(evaluator.state)
+        assert evaluator.totals == [0, 0, 0]
+
+
+# move_gain 等于落子前后该方棋型分之差
+def test_move_gain_matches_make():
+    rng = random.Random(3)
+    state = GameState.from_moves([(7, 7), (8, 8), (6, 8), (8, 6), (8, 7), (6, 7), (7, 6)])
+    evaluator = PatternEvaluator(state)
+    for index in rng.sample(state.neighbors(2), 10):
+        player = state.to_move
+        before = evaluator.totals[player]
+        gain = evaluator.move_gain(index, player)
+        evaluator.make(index)
+        assert evaluator.totals[player] - before == gain
+        evaluator.unmake()
+
+
+# NumPy 批量评估与逐个局面的 PatternEvaluator 结果一致
+@pytest.mark.skipif(np is None, reason='需要 NumPy')
+def test_batch_matches_pattern_evaluator():
+    boards, to_move, expected = [], [], []
+    for evaluator, state in random_games(60):
+        boards.append(board_array(state))
+        to_move.append(state.to_move)
+        expected.append(evaluator.evaluate())
+    batch = BatchEvaluator(15)
+    assert batch.evaluate(np.array(boards), np.array(to_move)).tolist() == expected
@@ -0,0 +1,49 @@
+import pytest
+
+from benchmark import POSITIONS, SOLVER_POSITIONS
+from engine import GameState
+from threats import ThreatSolver, five_points
+
+
+# VCF 局面：只求 VCF 就能找到，且按求解结果走下去，每步都是冲四（有成五点），防守方堵住一个成五点，最终在给出的步数内成五
+def test_vcf_position_is_won():
+    state = GameState.from_moves(SOLVER_POSITIONS['VCF'])
+    attacker = state.to_move
+    solver = ThreatSolver()
+    result = solver.solve(state, 12)
+    assert result.move is not None and not result.vct
+    for _ in range(result.threats + 1):
+        move = solver.solve(state, 12).move
+        if state.play(*move) is not None:
+            break
+        blocks = five_points(state, attacker)
+        assert blocks
+        state.play(*state.coords(blocks.bit_length() - 1))
+    assert state.winner == attacker
+
+
+# VCT 局面：VCF 找不到，加上活三后能找到
+def test_vct_position_needs_threes():
+    state = GameState.from_moves(SOLVER_POSITIONS['VCT'])
+    assert ThreatSolver().solve(state, 12).move is None
+    result = ThreatSolver().solve(state, 12, 4)
+    assert result.move is not None and result.vct
+    assert state.move_count == len(SOLVER_POSITIONS['VCT'])  # 求解在副本上进行，不改动传入的局面
+
+
+# 开局等普通局面没有必胜
+@pytest.mark.parametrize('name', list(POSITIONS))
+def test_no_win_in_quiet_positions(name):
+    result = ThreatSolver().solve(GameState.from_moves(POSITIONS[name]), 12, 4)
+    assert result.move is None
+
+
+# 超过节点上限或被 stop() 中止时返回未找到
+def test_abort_returns_no_win():
+    state = GameState.from_moves(SOLVER_POSITIONS['VCF'])
+    assert ThreatSolver().solve(state, 12, node_limit=5).move is None
+    solver = ThreatSolver()
+    solver.stop()
+    assert solver.solve(state, 12).move is None
+    solver.stop_event.clear()
+    assert solver.solve(state, 12).move is not None
@@ -0,0 +1,277 @@
+"""连续冲四（VCF）/ 连续活三冲四（VCT）必胜求解：只搜索进攻方的威胁着法和防守方的应对，判断轮到走棋的一方
+能否在 N 步威胁之内强制取胜。
+
+棋型用位棋盘按窗口整体计算：沿每个方向取全部连续 5 格（或 6 格）的窗口，窗口内没有对方棋子和边界时，
+按窗口内己方棋子数得到成五点（4 子）、冲四点（3 子）；两端为空、中间 4 格有 3 子的 6 格窗口是活三，
+中间 4 格有 2 子的 6 格窗口中的空位是做活三的点。这样每个节点的着法生成只需几十次大整数位运算。
+
+进攻方每一步必须是威胁：冲四时防守方只能堵唯一的成五点；活三时防守方的应对为同时落在所有活三窗口内的空位
+加上防守方自己的冲四。防守方若已有成五点，进攻方必须先堵住它（且这一步本身也是威胁）。
+"""
+import threading
+import time
+from collections import namedtuple
+
+from engine import BLACK, WHITE, BORDER
+
+INFINITY = 1 << 30
+CACHE_LIMIT = 1 << 18
+
+_line_masks = {}
+
+SolveResult = namedtuple('SolveResult', 'move threats vct nodes elapsed')
+
+
+class SolverAbort(Exception):
+    """求解超过节点数上限、超过截止时间或被取消"""
+
+
+def _window_planes(own, free, step, length):
+    """长度为 length 的窗口（第 w 位表示格子 w, w+step, ...）：返回 (valid, b0, b1, b2)。
+    valid 为全部格子都不是对方棋子或边界的窗口，b0/b1/b2 为窗口内己方棋子数的二进制各位"""
+    valid = free
+    b0, b1, b2 = own, 0, 0
+    for j in range(1, length):
+        shift = j * step
+        valid &= free >> shift
+        bit = own >> shift
+        carry = b0 & bit
+        b0 ^= bit
+        b2 |= b1 & carry
+        b1 ^= carry
+    return valid, b0, b1, b2
+
+
+def _spread(windows, step, first, last):
+    """窗口第 first 到 last 格对应的格子"""
+    cells = 0
+    for j in range(first, last + 1):
+        cells |= windows << (j * step)
+    return cells
+
+
+def _empty(state):
+    return state.board_mask & ~(state.bits[BLACK] | state.bits[WHITE])
+
+
+def threat_points(state, player):
+    """player 的 (成五点, 冲四点)：落下即成五的空点，和落下后形成冲四或活四的空点（位掩码）"""
+    own = state.bits[player]
+    empty = _empty(state)
+    free = own | empty
+    fives = fours = 0
+    for step in state.directions:
+        valid, b0, b1, b2 = _window_planes(own, free, step, 5)
+        fives |= _spread(valid & b2 & ~b1 & ~b0, step, 0, 4)
+        fours |= _spread(valid & b1 & b0 & ~b2, step, 0, 4)
+    return fives & empty, fours & empty
+
+
+def five_points(state, player):
+    """player 落下即成五的空点"""
+    return threat_points(state, player)[0]
+
+
+def four_moves(state, player):
+    """player 落下后形成冲四或活四的空点"""
+    return threat_points(state, player)[1]
+
+
+def line_masks(state):
+    """每个交点沿四个方向前后各 4 格以内的交点（位掩码），用于限定后续威胁与上一步威胁相关"""
+    key = (state.size, state.stride)
+    masks = _line_masks.get(key)
+    if masks is None:
+        cells = state.cells
+        masks = {}
+        for index in range(len(cells)):
+            if cells[index] == BORDER:
+                continue
+            mask = 1 << index
+            for step in state.directions:
+                for direction in (step, -step):
+                    point = index + direction
+                    for _ in range(4):
+                        if cells[point] == BORDER:
+                            break
+                        mask |= 1 << point
+                        point += direction
+            masks[index] = mask
+        _line_masks[key] = masks
+    return masks
+
+
+def _open_windows(state, player, count):
+    """两端为空、中间 4 格没有对方棋子且有 count 个己方棋子的 6 格窗口，返回 [(方向, 窗口起点掩码)]"""
+    own = state.bits[player]
+    empty = _empty(state)
+    free = own | empty
+    result = []
+    for step in state.directions:
+        valid, b0, b1, b2 = _window_planes(own, free, step, 4)
+        inner = valid & (b1 if count & 2 else ~b1) & (b0 if count & 1 else ~b0) & ~b2
+        windows = empty & (inner >> step) & (empty >> (5 * step))
+        if windows:
+            result.append((step, windows))
+    return result
+
+
+def three_defenses(state, player):
+    """player 活三（再落一子即成活四）的防守点。防守方必须落在每一个活三窗口内，否则进攻方可以在剩下的窗口里
+    做成活四，因此返回各窗口空位的交集（双活三时通常为空）；没有活三时返回 None"""
+    empty = _empty(state)
+    defenses = None
+    for step, windows in _open_windows(state, player, 3):
+        for start in _indexes(windows):
+            cells = _spread(1 << start, step, 0, 5) & empty
+            defenses = cells if defenses is None else defenses & cells
+    return defenses
+
+
+def three_moves(state, player):
+    """player 落下后形成活三的空点"""
+    cells = 0
+    for step, windows in _open_windows(state, player, 2):
+        cells |= _spread(windows, step, 1, 4)
+    return cells & _empty(state)
+
+
+def _indexes(mask):
+    result = []
+    while mask:
+        low = mask & -mask
+        result.append(low.bit_length() - 1)
+        mask ^= low
+    return result
+
+
+class ThreatSolver:
+    """VCF/VCT 求解器，带独立的置换缓存（局面哈希 → 已证明必胜的最少威胁步数、已证明不能取胜的步数、必胜着法）。
+
+    solve() 按威胁步数迭代加深，找到的是步数最少的必胜；超过 node_limit 个节点时放弃并返回未找到。
+    VCT 在根节点之后只考虑与进攻方上一步在同一条线上的威胁（不影响必胜结论的正确性，只会漏掉一些取胜路线）。
+    缓存在多次求解之间保留，对局中连续调用时后面的求解大多直接命中。
+    """
+
+    def __init__(self, node_limit=20000, cache_limit=CACHE_LIMIT, stop_event=None):
+        self.node_limit = node_limit
+        self.cache_limit = cache_limit
+        self.cache = {}
+        self.state = None
+        self.vct = False
+        self.nodes = 0
+        self.root_length = 0
+        self.deadline = float('inf')
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+
+    def solve(self, state, max_threats=12, vct_threats=0, node_limit=None, deadline=None):
+        """轮到走棋的一方能否在 max_threats 步冲四（VCF）内必胜；vct_threats 大于 0 时 VCF 失败后
+        再求 vct_threats 步以内的 VCT（活三的分支多得多，步数宜小）。返回 SolveResult，move 为第一步 (x, y)，
+        vct 表示是否用到活三；未找到时 move 为 None。deadline 为 time.perf_counter() 的截止时刻，到时放弃"""
+        started = time.perf_counter()
+        self.state = state = state.copy()
+        self.nodes = 0
+        self.deadline = deadline if deadline is not None else float('inf')
+        limit = node_limit if node_limit is not None else self.node_limit
+        result = SolveResult(None, 0, False, 0, 0.0)
+        if state.is_over():
+            return result
+        self.root_length = root_length = len(state.history)
+        for self.vct, threats_limit in ((False, max_threats), (True, vct_threats)):
+            if self.vct and not vct_threats:
+                break
+            try:
+                for threats in range(threats_limit + 1):
+                    move = self._attack(threats, limit)
+                    if move is not None:
+                        return SolveResult(state.coords(move), threats, self.vct, self.nodes,
+                                           time.perf_counter() - started)
+            except SolverAbort:
+                while len(state.history) > root_length:
+                    state.unmake()
+                break
+        return result._replace(nodes=self.nodes, elapsed=time.perf_counter() - started)
+
+    def stop(self):
+        """中止正在进行的求解（可从其他线程调用），solve() 返回未找到；之后需 stop_event.clear() 才能再次求解"""
+        self.stop_event.set()
+
+    def clear(self):
+        self.cache.clear()
+
+    def _store(self, key, win, fail, move):
+        if len(self.cache) >= self.cache_limit:
+            self.cache.clear()
+        self.cache[key] = (win, fail, move)
+
+    def _attack(self, remaining, limit):
+        """进攻方走棋的节点：返回 remaining 步威胁内的必胜着法（下标），不能取胜时返回 None"""
+        self.nodes += 1
+        if self.nodes > limit or self.stop_event.is_set() or time.perf_counter() > self.deadline:
+            raise SolverAbort()
+        state = self.state
+        attacker = state.to_move
+        defender = 3 - attacker
+        wins, fours = threat_points(state, attacker)
+        if wins:
+            return (wins & -wins).bit_length() - 1
+        if remaining <= 0:
+            return None
+
+        key = (state.hash, self.vct)
+        entry = self.cache.get(key)
+        win, fail = INFINITY, 0
+        if entry is not None:
+            win, fail, move = entry
+            if win <= remaining:
+                return move
+            if fail >= remaining:
+                return None
+
+        threats = five_points(state, defender)
+        if threats & (threats - 1):  # 对方有两个成五点，堵不过来
+            self._store(key, win, INFINITY, None)
+            return None
+        if self.vct:
+            threes = three_moves(state, attacker) & ~fours
+            if len(state.history) > self.root_length:  # 根节点之后只考虑与上一步威胁在同一条线上的冲四和活三
+                related = line_masks(state)[state.history[-2]]
+                fours &= related
+                threes &= related
+            moves = _indexes(fours) + _indexes(threes)
+        else:
+            moves = _indexes(fours)
+        if threats:  # 必须先堵对方的冲四
+            moves = [index for index in moves if (threats >> index) & 1]
+        for index in moves:
+            if self._threat(index, remaining, limit):
+                self._store(key, remaining, fail, index)
+                return index
+        self._store(key, win, remaining, None)
+        return None
+
+    def _threat(self, index, remaining, limit):
+        """进攻方在 index 落下威胁后，防守方的每一种应对是否都仍然必胜"""
+        state = self.state
+        attacker = state.to_move
+        state.make(index)
+        try:
+            wins = five_points(state, attacker)
+            if wins:
+                if wins & (wins - 1):  # 活四或双四
+                    return True
+                replies = wins
+            else:
+                replies = three_defenses(state, attacker)
+                if replies is None:
+                    return False
+                replies |= four_moves(state, 3 - attacker)  # 防守方也可以先冲四反击
+            for reply in _indexes(replies):
+                state.make(reply)
+                proven = self._attack(remaining - 1, limit) is not None
+                state.unmake()
+                if not proven:
+                    return False
+            return True
+        finally:
+            state.unmake()
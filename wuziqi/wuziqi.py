@@ -1,15 +1,21 @@
+import argparse
 import tkinter as tk
 from tkinter import messagebox
 
+from ai import AIPlayer, HintSolver, THINKING
+from engine import GameState, BLACK, WHITE, COLOR_NAMES
+
 BOARD_SIZE = 15  # 棋盘尺寸（15x15 交点）
 CELL_GAP = 40    # 相邻交点间距（像素）
 WINDOW_WIDTH = (BOARD_SIZE - 1) * CELL_GAP  # 窗口宽度，基于交点计算
 WINDOW_HEIGHT = (BOARD_SIZE - 1) * CELL_GAP # 窗口高度，基于交点计算
 
-# 全局变量：棋盘状态（None=空，'black'=黑棋，'white'=白棋）
-board = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
-is_black_turn = True  # 黑棋先行标记
-game_over = False     # 游戏结束标记
+# 全局变量：对局状态（落子、轮次和胜负判断都由引擎负责，界面只负责绘制和转发点击）
+game = GameState(BOARD_SIZE)
+ai_player = None   # 电脑棋手（None 表示双人对弈）
+AI_POLL_MS = 50    # 检查后台搜索结果的间隔（毫秒）
+hint_mode = False  # 提示模式：每步后为轮到走棋的玩家求解必胜（按 H 切换）
+hint_solver = HintSolver(max_threats=12, vct_threats=6, node_limit=5000)  # 在后台线程中求解提示
 
 
 def draw_chessboard(canvas):
@@ -38,92 +44,142 @@ def draw_chess_piece(canvas, x, y, color):
     y1 = y * CELL_GAP - 15
     x2 = x * CELL_GAP + 15
     y2 = y * CELL_GAP + 15
-    canvas.create_oval(x1, y1, x2, y2, fill=color)
-
-
-def check_five_in_a_row(x, y, color):
-    """检查五子连珠（横向、纵向、对角线）"""
-    # 1. 横向检查（同一行）
-    count = 0
-    for col in range(BOARD_SIZE):
-        if board[y][col] == color:
-            count += 1
-            if count == 5:
-                return True
-        else:
-            count = 0
-
-    # 2. 纵向检查（同一列）
-    count = 0
-    for row in range(BOARD_SIZE):
-        if board[row][x] == color:
-            count += 1
-            if count == 5:
-                return True
-        else:
-            count = 0
-
-    # 3. 主对角线（左上→右下）检查
-    count = 0
-    start_col = x - min(x, y)
-    start_row = y - min(x, y)
-    for i in range(min(BOARD_SIZE - start_col, BOARD_SIZE - start_row)):
-        if board[start_row + i][start_col + i] == color:
-            count += 1
-            if count == 5:
-                return True
-        else:
-            count = 0
-
-    # 4. 副对角线（右上→左下）检查
-    count = 0
-    start_col = x + y
-    start_row = 0 if start_col < BOARD_SIZE else start_col - BOARD_SIZE + 1
-    start_col = start_col if start_col < BOARD_SIZE else BOARD_SIZE - 1
-    for i in range(min(BOARD_SIZE - start_row, start_col + 1)):
-        if board[start_row + i][start_col - i] == color:
-            count += 1
-            if count == 5:
-                return True
-        else:
-            count = 0
-
-    return False  # 未五子连珠
+    canvas.create_oval(x1, y1, x2, y2, fill=color, tags='piece')
 
 
-def place_black_chess(event, canvas):
-    """左键落黑棋逻辑"""
-    global is_black_turn, game_over
-    if game_over or not is_black_turn:
+def redraw_pieces(canvas):
+    """按引擎中的对局重画全部棋子（悔棋后使用）"""
+    canvas.delete('piece')
+    for x, y, player in game.moves():
+        draw_chess_piece(canvas, x, y, COLOR_NAMES[player])
+
+
+def show_hint(canvas):
+    """提示模式下在后台线程中求解轮到走棋的一方是否有 VCF/VCT 必胜，并定时检查结果；之前未完成的求解作废"""
+    hint_solver.cancel()
+    canvas.delete('hint')
+    if not hint_mode or game.is_over():
+        return
+    if ai_player is not None and game.to_move == ai_player.player:
         return
+    hint_solver.start(game)
+    canvas.after(AI_POLL_MS, lambda: poll_hint(canvas))
+
+
+def poll_hint(canvas):
+    """取回提示结果，在第一步处画红圈并在标题栏显示步数；求解未完成则稍后再查"""
+    result = hint_solver.poll()
+    if result is THINKING:
+        canvas.after(AI_POLL_MS, lambda: poll_hint(canvas))
+        return
+    if result is None:  # 已被新的局面或关闭提示取消
+        return
+    side = "黑方" if game.to_move == BLACK else "白方"
+    if result.move is None:
+        canvas.winfo_toplevel().title(f"五子棋 - 提示：{side}未发现必胜")
+        return
+    x, y = result.move
+    canvas.create_oval(x * CELL_GAP - 8, y * CELL_GAP - 8, x * CELL_GAP + 8, y * CELL_GAP + 8,
+                       outline='red', width=3, tags='hint')
+    kind = "VCT" if result.vct else "VCF"
+    canvas.winfo_toplevel().title(f"五子棋 - 提示：{side} {kind} {result.threats} 步威胁必胜，先走 ({x}, {y})")
+
+
+def toggle_hint(canvas):
+    """切换提示模式"""
+    global hint_mode
+    hint_mode = not hint_mode
+    if hint_mode:
+        show_hint(canvas)
+    else:
+        hint_solver.cancel()
+        canvas.delete('hint')
+        canvas.winfo_toplevel().title("五子棋")
+
+
+def play_move(canvas, x, y):
+    """落子并绘制，对局结束时提示结果；未结束且轮到电脑时让电脑开始思考"""
+    player = game.to_move
+    winner = game.play(x, y)
+    draw_chess_piece(canvas, x, y, COLOR_NAMES[player])
+    canvas.delete('hint')
+    if winner is not None:
+        messagebox.showinfo("游戏结束", ("黑方" if winner == BLACK else "白方") + "获胜！")
+    elif game.is_full():
+        messagebox.showinfo("游戏结束", "平局！")
+    else:
+        start_ai(canvas)
+        show_hint(canvas)
+
+
+def place_chess(event, canvas, player):
+    """轮到 player 时在点击处落子，成五则结束对局"""
+    if game.is_over() or game.to_move != player:
+        return
+    if ai_player is not None and ai_player.player == player:
+        return  # 电脑的回合不接受点击
     x, y = get_chess_point(event)  # 获取交点坐标
-    if board[y][x] is None:  # 空交点才能落子
-        draw_chess_piece(canvas, x, y, 'black')
-        board[y][x] = 'black'
-        if check_five_in_a_row(x, y, 'black'):
-            messagebox.showinfo("游戏结束", "黑方获胜！")
-            game_over = True
-            return
-        is_black_turn = False  # 切换白棋回合
+    if game.get(x, y):  # 空交点才能落子
+        return
+    play_move(canvas, x, y)
+
+
+def start_ai(canvas):
+    """轮到电脑时在后台线程中开始搜索，并定时检查结果（tkinter 控件只能在主线程中操作）"""
+    if ai_player is None or game.is_over() or game.to_move != ai_player.player:
+        return
+    ai_player.start(game)
+    canvas.winfo_toplevel().title("五子棋 - 电脑思考中…")
+    canvas.after(AI_POLL_MS, lambda: poll_ai(canvas))
+
+
+def poll_ai(canvas):
+    """取回电脑的着法并落子；搜索未完成则稍后再查"""
+    result = ai_player.poll()
+    if result is THINKING:
+        canvas.after(AI_POLL_MS, lambda: poll_ai(canvas))
+        return
+    if result is None:  # 已被悔棋取消
+        return
+    canvas.winfo_toplevel().title(f"五子棋 - 电脑搜索深度 {result.depth}，{result.nodes} 个节点")
+    play_move(canvas, *result.move)
+
+
+def place_black_chess(event, canvas):
+    """左键落黑棋逻辑"""
+    place_chess(event, canvas, BLACK)
 
 
 def place_white_chess(event, canvas):
     """右键落白棋逻辑"""
-    global is_black_turn, game_over
-    if game_over or is_black_turn:
+    place_chess(event, canvas, WHITE)
+
+
+def undo_chess(canvas):
+    """悔一步棋（对局结束后也可以悔棋继续）；与电脑对弈时连同电脑的一步一起撤销，回到玩家的回合"""
+    if ai_player is not None:
+        ai_player.cancel()
+    if game.undo() is None:
         return
-    x, y = get_chess_point(event)  # 获取交点坐标
-    if board[y][x] is None:  # 空交点才能落子
-        draw_chess_piece(canvas, x, y, 'white')
-        board[y][x] = 'white'
-        if check_five_in_a_row(x, y, 'white'):
-            messagebox.showinfo("游戏结束", "白方获胜！")
-            game_over = True
-            return
-        is_black_turn = True  # 切换黑棋回合
+    if ai_player is not None and game.to_move == ai_player.player:
+        game.undo()
+    redraw_pieces(canvas)
+    start_ai(canvas)
+    show_hint(canvas)
 
 
 def main():
+    global ai_player, hint_mode
+    parser = argparse.ArgumentParser(description='五子棋')
+    parser.add_argument('--ai', choices=['black', 'white'], help='电脑执黑或执白（默认双人对弈：左键黑棋，右键白棋）')
+    parser.add_argument('--time', type=float, default=1.0, help='电脑每步思考时间（秒）')
+    parser.add_argument('--workers', type=int, default=1, help='电脑并行搜索的进程数')
+    parser.add_argument('--hint', action='store_true', help='开启必胜提示（对局中按 H 切换）')
+    args = parser.parse_args()
+    hint_mode = args.hint
+    if args.ai:
+        ai_player = AIPlayer(BLACK if args.ai == 'black' else WHITE, time_limit=args.time, workers=args.workers)
+
     root = tk.Tk()
     root.title("五子棋")
     canvas = tk.Canvas(root, width=WINDOW_WIDTH, height=WINDOW_HEIGHT)
@@ -133,8 +189,19 @@ def main():
     # 绑定鼠标事件：左键黑棋，右键白棋
     canvas.bind("<Button-1>", lambda event: place_black_chess(event, canvas))
     canvas.bind("<Button-3>", lambda event: place_white_chess(event, canvas))
+    # Ctrl+Z 悔棋
+    root.bind("<Control-z>", lambda event: undo_chess(canvas))
+    # H 切换必胜提示
+    root.bind("<h>", lambda event: toggle_hint(canvas))
+
+    # 电脑执黑时先走
+    start_ai(canvas)
+    show_hint(canvas)
 
     root.mainloop()  # 启动 GUI 循环
+    hint_solver.cancel()
+    if ai_player is not None:
+        ai_player.close()
 
 
 if __name__ == "__main__":